@@ -0,0 +1,180 @@
+import asyncio
+import logging
+
+from boum.api_client import constants
+from boum.api_client.v1.client import ApiClient, ClientConfig
+from boum.api_client.v1.log_shipper import AsyncDeviceLogShipper
+from boum.api_client.v1.token_store import StoredTokens
+from boum.api_client.v1.tracing import start_span
+from boum.api_client.v1.transport import AsyncHttpxSession, ConnectionPoolConfig
+
+
+# pylint: disable=invalid-overridden-method
+class AsyncApiClient(ApiClient):
+    # noinspection PyUnresolvedReferences
+    """
+        Async client for the Boum API v1.
+
+        It uses the same endpoint hierarchy and models as `ApiClient`, but the requests are sent
+        with a non-blocking session, so every endpoint method returns an awaitable. This allows to
+        run many requests concurrently from a single event loop. It is implemented as an async
+        context manager and will automatically refresh the access token when it expires.
+
+        Attributes
+        ----------
+            root: EndpointClient
+                The root endpoint client. It contains all the other nested endpoint clients.
+
+        Example
+        -------
+            >>> import asyncio
+            >>> from boum.api_client.v1.async_client import AsyncApiClient
+            >>>
+            >>> async def main():
+            ...     client = AsyncApiClient(email, password, base_url=base_url)
+            ...     async with client:
+            ...         # Get call to the devices collection
+            ...         device_ids = await client.root.devices.get()
+            ...         # Concurrent get calls to specific devices
+            ...         return await asyncio.gather(
+            ...             *(client.root.devices(i).get() for i in device_ids[:10]))
+            >>>
+            >>> device_models = asyncio.run(main())
+        """
+
+    def __init__(
+            self, email: str = None, password: str = None, refresh_token: str = None,
+            base_url: str = constants.API_URL_PROD, session: AsyncHttpxSession = None,
+            pool_config: ConnectionPoolConfig = None, config: ClientConfig = None):
+        """
+        Parameters
+        ----------
+            email
+                The email of the user. Required if `refresh_token` is not set.
+            password
+                The password of the user. Required if `refresh_token` is not set.
+            refresh_token
+                The refresh token of the user. Required if `email` and `password` are not set.
+            base_url
+                The URL of the API. Defaults to the production API.
+            session
+                The async session that is used for the requests. Defaults to a new
+                `AsyncHttpxSession` that is owned by this client and configured with
+                `pool_config`.
+            pool_config
+                The connection pool and socket settings of the session that the client creates.
+                Can't be combined with `session`.
+            config
+                The retry, token, caching, rate limiting, circuit breaker and observability
+                options of the client. See `ApiClient`. The token store is accessed from a worker
+                thread, so that its lock doesn't block the event loop.
+        """
+        if session is not None and pool_config is not None:
+            raise ValueError('pool_config can only be set if no session is passed')
+
+        super().__init__(
+            email, password, refresh_token, base_url,
+            session=session if session is not None else AsyncHttpxSession(pool_config),
+            config=config)
+        self._access_token_lock = asyncio.Lock()
+
+    def __enter__(self):
+        raise TypeError('AsyncApiClient must be used with `async with`')
+
+    async def __aenter__(self) -> "AsyncApiClient":
+        """Connect to the API and sign in or refresh the access token."""
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Disconnect from the API."""
+        await self.disconnect()
+
+    async def disconnect(self):
+        await self._close_log_shippers()
+        await self._session.aclose()
+        self.root.session = None
+
+    def create_log_shipper(self, **options) -> AsyncDeviceLogShipper:
+        """
+        Create an `AsyncDeviceLogShipper` that sends device logs in the background with this
+        client. It is drained and closed when the client disconnects.
+        """
+        shipper = AsyncDeviceLogShipper(self, **options)
+        self._log_shippers.append(shipper)
+        return shipper
+
+    async def _close_log_shippers(self):
+        while self._log_shippers:
+            await self._log_shippers.pop().aclose()
+
+    async def connect(self):
+        self.root.session = self._session
+        if self._access_token:
+            pass
+        elif self._token_store is not None:
+            async with self._access_token_lock:
+                await self._renew_access_token()
+        elif self._refresh_token:
+            await self._refresh_access_token()
+        else:
+            await self._signin()
+
+    async def _signin(self):
+        self._set_tokens(*await self.root.auth.signin.post(self._email, self._password))
+
+    async def _refresh_access_token(self, requested_at: float | None = None):
+        """Refresh the access token. Concurrent calls are single-flight, see `ApiClient`."""
+        async with self._access_token_lock:
+            if self._is_access_token_updated_since(requested_at):
+                return
+            if not self._refresh_token:
+                raise AttributeError('Refresh token not set')
+
+            await self._renew_access_token()
+
+    async def _ensure_access_token(self):
+        """Refresh the access token ahead of time if it expires within the refresh margin."""
+        if not self._is_access_token_expiring():
+            return
+        async with self._access_token_lock:
+            if self._is_access_token_expiring():
+                logging.info('Access token expires soon. Refreshing...')
+                await self._renew_access_token()
+
+    async def _renew_access_token(self):
+        """Replace the current access token by a new one. See `ApiClient`."""
+        with start_span(self._tracer, 'boum.auth_refresh') as span:
+            if self._token_store is None:
+                span.set_attribute('boum.token_source', 'api')
+                await self._request_tokens()
+                return
+
+            # The lock of the store blocks and is held while the tokens are requested, so it is
+            # taken in a worker thread, which waits for the request on the event loop
+            source = await asyncio.to_thread(
+                self._renew_access_token_from_store, asyncio.get_running_loop())
+            span.set_attribute('boum.token_source', source)
+
+    def _renew_access_token_from_store(self, loop: asyncio.AbstractEventLoop) -> str:
+        """
+        Use the stored tokens if they are usable, otherwise request new ones on the event loop
+        and store them. Runs in a worker thread. Returns where the tokens came from.
+        """
+        with self._token_store.lock(self._token_store_key):
+            stored = self._token_store.load(self._token_store_key)
+            if stored and self._is_stored_access_token_usable(stored):
+                logging.info('Using access token from the token store')
+                self._set_tokens(stored.access_token, stored.refresh_token)
+                return 'token_store'
+
+            asyncio.run_coroutine_threadsafe(self._request_tokens(), loop).result()
+            self._token_store.save(
+                self._token_store_key, StoredTokens(self._access_token, self._refresh_token))
+            return 'api'
+
+    async def _request_tokens(self):
+        if self._refresh_token:
+            self._set_tokens(await self.root.auth.token.post(self._refresh_token))
+        else:
+            await self._signin()
@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import Any, Hashable
+
+
+@dataclass
+class CacheEntry:
+    """
+    A cached response.
+
+    Attributes
+    ----------
+        response
+            The response of the session. Its body is decoded again on every cache hit, so callers
+            can't modify the cached data.
+        path
+            The path template of the endpoint.
+        expires_at
+            The monotonic time until which the response is fresh and used without revalidation.
+        etag
+            The `ETag` header of the response, if any.
+        last_modified
+            The `Last-Modified` header of the response, if any.
+    """
+    response: Any
+    path: str
+    expires_at: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    @property
+    def validators(self) -> dict[str, str]:
+        """The headers of a conditional request that revalidates the response."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    # noinspection PyUnresolvedReferences
+    """
+        LRU cache for the successful responses of GET requests.
+
+        A cached response is used without a request while it is fresh, i.e. for the TTL of its
+        endpoint. After that, it is revalidated with a conditional request, if it has an `ETag` or
+        `Last-Modified` header, and used again if the API responds with 304 Not Modified.
+        Successful writes invalidate the cached responses of the affected endpoints.
+
+        The cache is thread-safe. It must not be shared by clients of different users, because the
+        responses depend on the user.
+
+        Example
+        -------
+            >>> from boum.api_client.v1.client import ApiClient, ClientConfig
+            >>> from boum.api_client.v1.cache import ResponseCache
+            >>>
+            >>> response_cache = ResponseCache(default_ttl=30, ttls={'/devices/{id}/data': None})
+            >>> client = ApiClient(
+            ...     email, password, base_url=base_url,
+            ...     config=ClientConfig(response_cache=response_cache))
+        """
+
+    def __init__(
+            self, default_ttl: float | None = 30.0, ttls: dict[str, float | None] = None,
+            max_entries: int = 256):
+        """
+        Parameters
+        ----------
+            default_ttl
+                The number of seconds a response is fresh. With 0, responses are revalidated on
+                every request. None disables caching for endpoints without a TTL in `ttls`.
+            ttls
+                TTLs per endpoint path template pattern, e.g. `/devices/{id}`, in order of
+                precedence. Patterns are matched with `fnmatch`.
+            max_entries
+                The maximum number of cached responses. The least recently used ones are evicted.
+        """
+        if default_ttl is not None and default_ttl < 0:
+            raise ValueError('default_ttl must not be negative')
+        if max_entries < 1:
+            raise ValueError('max_entries must be at least 1')
+
+        self._default_ttl = default_ttl
+        self._ttls = list((ttls or {}).items())
+        self._ttls_by_path: dict[str, float | None] = {}
+        self._max_entries = max_entries
+        self._entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_ttl(self, path: str) -> float | None:
+        """Get the TTL of an endpoint, or None if its responses are not cached."""
+        if path not in self._ttls_by_path:
+            self._ttls_by_path[path] = next(
+                (ttl for pattern, ttl in self._ttls if fnmatchcase(path, pattern)),
+                self._default_ttl)
+        return self._ttls_by_path[path]
+
+    def get(self, key: Hashable) -> CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, path: str, response):
+        """Cache the response of a successful GET request to an endpoint."""
+        ttl = self.get_ttl(path)
+        if ttl is None:
+            return
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if ttl == 0 and not (etag or last_modified):
+            return
+
+        entry = CacheEntry(response, path, time.monotonic() + ttl, etag, last_modified)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def revalidate(self, key: Hashable, entry: CacheEntry, response):
+        """Mark a cached response as fresh again after the API responded with 304."""
+        entry.expires_at = time.monotonic() + (self.get_ttl(entry.path) or 0)
+        entry.etag = response.headers.get('ETag') or entry.etag
+        entry.last_modified = response.headers.get('Last-Modified') or entry.last_modified
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+    def invalidate(self, paths: tuple[str, ...] | None = None):
+        """
+        Remove the cached responses of endpoints with one of the given path templates or below
+        them, e.g. `/devices` also removes `/devices/{id}`. None removes all responses.
+        """
+        with self._lock:
+            if paths is None:
+                self._entries.clear()
+                return
+            for key in [key for key, entry in self._entries.items()
+                        if any(entry.path == p or entry.path.startswith(p + '/') for p in paths)]:
+                del self._entries[key]
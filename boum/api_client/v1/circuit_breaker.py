@@ -0,0 +1,182 @@
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of sending a request while the circuit breaker is open.
+
+    Attributes
+    ----------
+        retry_after
+            The number of seconds until the circuit breaker lets trial requests through again.
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__(f'Circuit breaker is open. Retry in {retry_after:.1f}s')
+        self.retry_after = retry_after
+
+
+class CircuitState(Enum):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+@dataclass(frozen=True)
+class _Thresholds:
+    failure_rate: float
+    slow_call_duration: float | None
+    slow_call_rate: float
+    minimum_calls: int
+    open_duration: float
+    half_open_calls: int
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to the API while it is failing, so that callers fail fast instead of
+    waiting for timeouts and the API is not loaded further.
+
+    The breaker is closed at first and keeps the outcomes of the last `window_size` requests. It
+    opens if at least `minimum_calls` outcomes are known and the share of failed requests
+    (transport errors and status codes >= 500) reaches `failure_rate_threshold`, or the share of
+    requests slower than `slow_call_duration` reaches `slow_call_rate_threshold`. While it is open,
+    requests raise a `CircuitOpenError`. After `open_duration` seconds, it is half-open and lets up
+    to `half_open_calls` trial requests through. If all of them succeed, it closes, and if one of
+    them fails or is slow, it opens again.
+
+    The breaker is thread-safe and can be shared by sync and async clients of the same API.
+    """
+
+    def __init__(
+            self, failure_rate_threshold: float = 0.5, slow_call_duration: float | None = None,
+            slow_call_rate_threshold: float = 1.0, window_size: int = 20, minimum_calls: int = 10,
+            open_duration: float = 30.0, half_open_calls: int = 3):
+        """
+        Parameters
+        ----------
+            failure_rate_threshold
+                The share of failed requests in the window at which the breaker opens.
+            slow_call_duration
+                Requests that take longer than this many seconds are slow. None disables the
+                latency threshold.
+            slow_call_rate_threshold
+                The share of slow requests in the window at which the breaker opens.
+            window_size
+                The number of recent requests whose outcomes are considered.
+            minimum_calls
+                The minimum number of outcomes in the window before the breaker can open.
+            open_duration
+                The number of seconds the breaker stays open before it lets trial requests
+                through.
+            half_open_calls
+                The number of successful trial requests that are needed to close the breaker.
+        """
+        if not 0 < failure_rate_threshold <= 1:
+            raise ValueError('failure_rate_threshold must be in (0, 1]')
+        if not 0 < slow_call_rate_threshold <= 1:
+            raise ValueError('slow_call_rate_threshold must be in (0, 1]')
+        if window_size < 1 or not 1 <= minimum_calls <= window_size:
+            raise ValueError('minimum_calls must be between 1 and window_size')
+        if open_duration < 0:
+            raise ValueError('open_duration must not be negative')
+        if half_open_calls < 1:
+            raise ValueError('half_open_calls must be at least 1')
+
+        self._thresholds = _Thresholds(
+            failure_rate_threshold, slow_call_duration, slow_call_rate_threshold, minimum_calls,
+            open_duration, half_open_calls)
+
+        self._state = CircuitState.CLOSED
+        # Outcomes of the window as (failed, slow) pairs
+        self._outcomes: deque[tuple[bool, bool]] = deque(maxlen=window_size)
+        # The time at which the breaker opened or became half-open
+        self._changed_at = 0.0
+        # Incremented on every state change, so late outcomes of a previous state are ignored
+        self._generation = 0
+        self._half_open_permits = 0
+        self._half_open_successes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            self._update_state()
+            return self._state
+
+    def acquire(self) -> int:
+        """
+        Get the permission to send a request, or raise a `CircuitOpenError`. The returned permit
+        must be passed to `record` with the outcome of the request.
+        """
+        with self._lock:
+            self._update_state()
+            if self._state is CircuitState.OPEN:
+                raise CircuitOpenError(
+                    self._changed_at + self._thresholds.open_duration - time.monotonic())
+            if self._state is CircuitState.HALF_OPEN:
+                if self._half_open_permits == 0:
+                    raise CircuitOpenError(0.0)
+                self._half_open_permits -= 1
+            return self._generation
+
+    def record(self, permit: int, failed: bool, duration: float):
+        """
+        Record the outcome of a request.
+
+        Parameters
+        ----------
+            permit
+                The permit that `acquire` returned for the request.
+            failed
+                True if the request failed with a transport error or a status code >= 500.
+            duration
+                The number of seconds the request took.
+        """
+        thresholds = self._thresholds
+        slow = thresholds.slow_call_duration is not None \
+            and duration > thresholds.slow_call_duration
+        with self._lock:
+            if permit != self._generation:
+                return
+            if self._state is CircuitState.HALF_OPEN:
+                if failed or slow:
+                    self._transition(CircuitState.OPEN)
+                    return
+                self._half_open_successes += 1
+                if self._half_open_successes >= thresholds.half_open_calls:
+                    self._transition(CircuitState.CLOSED)
+                return
+
+            self._outcomes.append((failed, slow))
+            if len(self._outcomes) < thresholds.minimum_calls:
+                return
+            failure_rate = sum(f for f, _ in self._outcomes) / len(self._outcomes)
+            slow_call_rate = sum(s for _, s in self._outcomes) / len(self._outcomes)
+            if failure_rate >= thresholds.failure_rate \
+                    or slow_call_rate >= thresholds.slow_call_rate:
+                self._transition(CircuitState.OPEN)
+
+    def _update_state(self):
+        elapsed = time.monotonic() - self._changed_at
+        if self._state is CircuitState.OPEN and elapsed >= self._thresholds.open_duration:
+            self._transition(CircuitState.HALF_OPEN)
+        elif self._state is CircuitState.HALF_OPEN and self._half_open_permits == 0 \
+                and elapsed >= self._thresholds.open_duration:
+            # Trial requests whose outcome was never recorded, e.g. because they were cancelled
+            self._transition(CircuitState.HALF_OPEN)
+
+    def _transition(self, state: CircuitState):
+        logging.warning('Circuit breaker %s -> %s', self._state.value, state.value)
+        self._state = state
+        self._generation += 1
+        self._outcomes.clear()
+        self._changed_at = time.monotonic()
+        if state is CircuitState.HALF_OPEN:
+            self._half_open_permits = self._thresholds.half_open_calls
+            self._half_open_successes = 0
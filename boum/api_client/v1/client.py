@@ -1,11 +1,146 @@
 import base64
+import binascii
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import Iterator
 
 import requests
 
 from boum.api_client import constants
-from boum.api_client.v1.endpoint import Endpoint
+from boum.api_client.v1.cache import ResponseCache
+from boum.api_client.v1.circuit_breaker import CircuitBreaker
+from boum.api_client.v1.coalescing import RequestCoalescer
+from boum.api_client.v1.codec import JsonCodec, default_codec
+from boum.api_client.v1.endpoint import Endpoint, EndpointContext, AccessTokenHooks, \
+    ResponseEnvelope
+from boum.api_client.v1.log_shipper import DeviceLogShipper
+from boum.api_client.v1.metrics import MetricsRegistry
+from boum.api_client.v1.rate_limit import RateLimiter
+from boum.api_client.v1.transport import ConnectionPoolConfig, create_session
 from boum.api_client.v1.models import DeviceModel, UserModel, DeviceDataModel, DeviceLogModel
+from boum.api_client.v1.retry import RetryPolicy
+from boum.api_client.v1.telemetry import TelemetryColumns, check_output_format
+from boum.api_client.v1.token_store import TokenStore, StoredTokens
+from boum.api_client.v1.tracing import Tracer, start_span
+
+
+@dataclass
+class ClientConfig:
+    """
+    Options for how an api client handles its requests and tokens. A config can be shared by
+    multiple clients.
+
+    Attributes
+    ----------
+        retry_policy
+            Decides if and when failed requests are retried. Defaults to a `RetryPolicy` with
+            exponential backoff and a retry budget per client. Use `RetryPolicy(max_retries=0)`
+            to disable retries. A policy that is set here is shared with its retry budget by all
+            clients of the config.
+        refresh_margin
+            The access token is refreshed before a request if it expires within this margin,
+            according to its `exp` claim. None disables the proactive refresh, so the token is
+            only refreshed after a request was rejected because it expired.
+        token_store
+            A store that persists the tokens, so that clients in multiple processes can share
+            them. A client reuses stored tokens that are still valid instead of signing in, and
+            only one client at a time obtains new tokens.
+        json_codec
+            The codec that decodes the JSON bodies of the responses. Defaults to the fastest
+            available codec.
+        metrics
+            A registry that records the latency, status codes, retries and token refreshes of the
+            requests per endpoint. It can be shared by multiple clients. None disables the
+            metrics.
+        tracer
+            A tracer that receives spans for the requests, their retries, token refreshes, JSON
+            decoding and model conversions, e.g. an `OpenTelemetryTracer`. None disables tracing.
+        rate_limiter
+            Delays requests, including retries, so that they don't exceed client-side rate
+            limits, globally and per endpoint. It can be shared by multiple clients. None
+            disables rate limiting.
+        circuit_breaker
+            Rejects requests with a `CircuitOpenError` while the API fails or is slow, instead of
+            sending them. It can be shared by multiple clients. None disables it.
+        response_cache
+            Caches the responses of GET requests with TTLs per endpoint and revalidates them with
+            `ETag` and `Last-Modified`. Writes invalidate the affected responses. It must not be
+            shared by clients of different users. None disables caching.
+        coalesce_requests
+            If true, concurrent GET requests with the same url and query parameters share one
+            request and its decoded response body, which must therefore not be modified.
+    """
+    retry_policy: RetryPolicy | None = None
+    refresh_margin: timedelta | None = timedelta(seconds=60)
+    token_store: TokenStore | None = None
+    json_codec: JsonCodec | None = None
+    metrics: MetricsRegistry | None = None
+    tracer: Tracer | None = None
+    rate_limiter: RateLimiter | None = None
+    circuit_breaker: CircuitBreaker | None = None
+    response_cache: ResponseCache | None = None
+    coalesce_requests: bool = False
+
+    def __post_init__(self):
+        """Value validation after initialization"""
+        if self.refresh_margin is not None and not isinstance(self.refresh_margin, timedelta):
+            raise ValueError('refresh_margin must be a timedelta or None')
+
+
+class _Credentials:
+    """
+    The credentials of a user. The secrets are only kept base64 encoded. The key under which the
+    tokens are stored is derived from the initial credentials.
+    """
+
+    def __init__(self, email: str = None, password: str = None, refresh_token: str = None):
+        self.email = None
+        self.__password: bytes | None = None
+        self.__refresh_token: bytes | None = None
+
+        if email and password:
+            self.email = email
+            self.password = password
+        elif refresh_token:
+            self.refresh_token = refresh_token
+        else:
+            raise ValueError('Either email and password or refresh_token must be set')
+
+        self.store_key = email if self.email else \
+            hashlib.sha256(refresh_token.encode('utf-8')).hexdigest()
+
+    @property
+    def password(self) -> str | None:
+        if self.__password:
+            return base64.b64decode(self.__password).decode("utf-8")
+        return None
+
+    @password.setter
+    def password(self, value: str | None):
+        self.__password = base64.b64encode(value.encode('utf-8')) if value else None
+
+    @property
+    def refresh_token(self) -> str | None:
+        if self.__refresh_token:
+            return base64.b64decode(self.__refresh_token).decode("utf-8")
+        return None
+
+    @refresh_token.setter
+    def refresh_token(self, value: str | None):
+        self.__refresh_token = base64.b64encode(value.encode('utf-8')) if value else None
+
+
+@dataclass(frozen=True)
+class _AccessToken:
+    """An access token with the monotonic time at which it was set and its POSIX expiry."""
+    value: str | None = None
+    updated_at: float = float('-inf')
+    expires_at: float | None = None
 
 
 class ApiClient:
@@ -46,7 +181,8 @@ class ApiClient:
 
     def __init__(
             self, email: str = None, password: str = None, refresh_token: str = None, base_url:
-            str = constants.API_URL_PROD, session: requests.Session = requests.Session()):
+            str = constants.API_URL_PROD, session: requests.Session = None,
+            pool_config: ConnectionPoolConfig = None, config: ClientConfig = None):
         """
         Parameters
         ----------
@@ -58,51 +194,83 @@ class ApiClient:
                 The refresh token of the user. Required if `email` and `password` are not set.
             base_url
                 The URL of the API. Defaults to the production API.
+            session
+                The session that is used for the requests. Defaults to a new session that is
+                owned by this client and configured with `pool_config`.
+            pool_config
+                The connection pool and socket settings of the session that the client creates.
+                With `http2` enabled, requests are multiplexed over one HTTP/2 connection. Can't
+                be combined with `session`.
+            config
+                The retry, token, caching, rate limiting, circuit breaker and observability
+                options of the client. Defaults to a `ClientConfig` with its default values.
         """
-        self._email = None
-        self.__access_token: str | None = None
-        self.__refresh_token: bytes | None = None
-        self.__password: bytes | None = None
+        if session is not None and pool_config is not None:
+            raise ValueError('pool_config can only be set if no session is passed')
+
+        self._config = config if config is not None else ClientConfig()
+        self._credentials = _Credentials(email, password, refresh_token)
+        self.__access_token = _AccessToken()
+        self._access_token_lock = threading.Lock()
+        self._log_shippers: list[DeviceLogShipper] = []
+        self._session = session if session is not None else create_session(pool_config)
+        config = self._config
+        context = EndpointContext(
+            access_token=AccessTokenHooks(
+                refresh=self._refresh_access_token,
+                ensure=self._ensure_access_token if config.refresh_margin is not None else None),
+            retry_policy=config.retry_policy if config.retry_policy is not None else RetryPolicy(),
+            codec=config.json_codec if config.json_codec is not None else default_codec(),
+            metrics=config.metrics,
+            tracer=config.tracer,
+            rate_limiter=config.rate_limiter,
+            circuit_breaker=config.circuit_breaker,
+            response_cache=config.response_cache,
+            coalescer=RequestCoalescer() if config.coalesce_requests else None)
+        self.root = RootEndpoint(base_url + '/v1', context=context)
 
-        if email and password:
-            self._email = email
-            self._password = password
-        elif refresh_token:
-            self._refresh_token = refresh_token
-        else:
-            raise ValueError('Either email and password or refresh_token must be set')
+    @property
+    def metrics(self) -> MetricsRegistry | None:
+        """The registry that records the request metrics, if any."""
+        return self._config.metrics
 
-        self._session = session
-        self.root = RootEndpoint(base_url + '/v1', refresh_access_token=self._refresh_access_token)
+    @property
+    def _token_store(self) -> TokenStore | None:
+        return self._config.token_store
+
+    @property
+    def _tracer(self) -> Tracer | None:
+        return self._config.tracer
 
     @property
     def _access_token(self) -> str | None:
-        return self.__access_token
+        return self.__access_token.value
 
     @_access_token.setter
     def _access_token(self, value: str | None):
-        self.__access_token = value
-        self._session.headers.update({'Authorization': f'{self.__access_token}'})
+        self.__access_token = _AccessToken(
+            value, time.monotonic(), get_jwt_expiry(value) if value else None)
+        self._session.headers.update({'Authorization': f'{value}'})
+
+    @property
+    def _email(self) -> str | None:
+        return self._credentials.email
+
+    @property
+    def _password(self) -> str | None:
+        return self._credentials.password
 
     @property
     def _refresh_token(self) -> str | None:
-        if self.__refresh_token:
-            return base64.b64decode(self.__refresh_token).decode("utf-8")
-        return None
+        return self._credentials.refresh_token
 
     @_refresh_token.setter
     def _refresh_token(self, value: str | None):
-        self.__refresh_token = base64.b64encode(value.encode('utf-8')) if value else None
+        self._credentials.refresh_token = value
 
     @property
-    def _password(self) -> str | None:
-        if self.__password:
-            return base64.b64decode(self.__password).decode("utf-8")
-        return None
-
-    @_password.setter
-    def _password(self, value: str | None):
-        self.__password = base64.b64encode(value.encode('utf-8')) if value else None
+    def _token_store_key(self) -> str:
+        return self._credentials.store_key
 
     def __enter__(self) -> "ApiClient":
         """Connect to the API and sign in or refresh the access token."""
@@ -114,30 +282,139 @@ class ApiClient:
         self.disconnect()
 
     def disconnect(self):
+        self._close_log_shippers()
         self._session.close()
         self.root.session = None
 
+    def create_log_shipper(self, **options) -> DeviceLogShipper:
+        """
+        Create a `DeviceLogShipper` that sends device logs in the background with this client.
+        It is drained and closed when the client disconnects.
+
+        Parameters
+        ----------
+            options
+                Keyword arguments that are passed to `DeviceLogShipper`.
+        """
+        shipper = DeviceLogShipper(self, **options)
+        self._log_shippers.append(shipper)
+        return shipper
+
+    def _close_log_shippers(self):
+        while self._log_shippers:
+            self._log_shippers.pop().close()
+
     def connect(self):
         self.root.session = self._session
         if self._access_token:
             pass
+        elif self._token_store is not None:
+            with self._access_token_lock:
+                self._renew_access_token()
         elif self._refresh_token:
             self._refresh_access_token()
         else:
             self._signin()
 
     def _signin(self):
-        self._access_token, self._refresh_token = self.root.auth.signin.post(
-            self._email, self._password)
+        self._set_tokens(*self.root.auth.signin.post(self._email, self._password))
 
-    def _refresh_access_token(self):
-        if not self._refresh_token:
-            raise AttributeError('Refresh token not set')
+    def _set_tokens(self, access_token: str, refresh_token: str | None = None):
+        """Use new tokens. The current refresh token is kept if no new one is given."""
+        self._access_token = access_token
+        if refresh_token:
+            self._refresh_token = refresh_token
 
-        self._access_token = self.root.auth.token.post(self._refresh_token)
+    def _refresh_access_token(self, requested_at: float | None = None):
+        """
+        Refresh the access token. Concurrent calls are single-flight: the first caller refreshes
+        the token while the others wait for it. If the token was updated after `requested_at`,
+        the monotonic time at which the rejected request was sent, the refresh is skipped.
+        """
+        with self._access_token_lock:
+            if self._is_access_token_updated_since(requested_at):
+                return
+            if not self._refresh_token:
+                raise AttributeError('Refresh token not set')
+
+            self._renew_access_token()
+
+    def _is_access_token_updated_since(self, requested_at: float | None) -> bool:
+        return requested_at is not None and self.__access_token.updated_at > requested_at
+
+    def _ensure_access_token(self):
+        """Refresh the access token ahead of time if it expires within the refresh margin."""
+        if not self._is_access_token_expiring():
+            return
+        with self._access_token_lock:
+            if self._is_access_token_expiring():
+                logging.info('Access token expires soon. Refreshing...')
+                self._renew_access_token()
+
+    def _is_access_token_expiring(self) -> bool:
+        return self._refresh_token is not None \
+            and self._is_expiring(self.__access_token.expires_at)
+
+    def _is_expiring(self, expires_at: float | None) -> bool:
+        refresh_margin = self._config.refresh_margin
+        margin = refresh_margin.total_seconds() if refresh_margin else 0
+        return expires_at is not None and time.time() >= expires_at - margin
+
+    def _renew_access_token(self):
+        """
+        Replace the current access token by a new one. Must be called while holding the access
+        token lock. With a token store, tokens that another client stored in the meantime are
+        adopted instead of requesting new ones.
+        """
+        with start_span(self._tracer, 'boum.auth_refresh') as span:
+            if self._token_store is None:
+                span.set_attribute('boum.token_source', 'api')
+                self._request_tokens()
+                return
+
+            with self._token_store.lock(self._token_store_key):
+                stored = self._token_store.load(self._token_store_key)
+                if stored and self._is_stored_access_token_usable(stored):
+                    logging.info('Using access token from the token store')
+                    span.set_attribute('boum.token_source', 'token_store')
+                    self._set_tokens(stored.access_token, stored.refresh_token)
+                    return
+
+                span.set_attribute('boum.token_source', 'api')
+                self._request_tokens()
+                self._token_store.save(
+                    self._token_store_key, StoredTokens(self._access_token, self._refresh_token))
+
+    def _is_stored_access_token_usable(self, stored: StoredTokens) -> bool:
+        return stored.access_token != self._access_token \
+            and not self._is_expiring(get_jwt_expiry(stored.access_token))
+
+    def _request_tokens(self):
+        if self._refresh_token:
+            self._set_tokens(self.root.auth.token.post(self._refresh_token))
+        else:
+            self._signin()
+
+
+def get_jwt_expiry(token: str) -> float | None:
+    """
+    Get the expiry of a JSON web token as POSIX timestamp from its `exp` claim, or None if the
+    token is not a JWT or has no expiry. The signature is not verified.
+    """
+    segments = token.split()[-1].split('.')
+    if len(segments) != 3:
+        return None
+    payload = segments[1]
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    expiry = claims.get('exp') if isinstance(claims, dict) else None
+    return float(expiry) if isinstance(expiry, int | float) else None
 
 
 class AuthTokenEndpoint(Endpoint):
+    _requires_access_token = False
 
     # pylint: disable=useless-parent-delegation
     def __get__(self, parent, owner: type) -> "AuthTokenEndpoint":
@@ -148,12 +425,12 @@ class AuthTokenEndpoint(Endpoint):
             raise ValueError('refresh_token must be a string')
 
         payload = {'refreshToken': refresh_token}
-        response = self._post(payload)
-        data = response.json()['data']
-        return data['accessToken']
+        return self._map_response(
+            self._post(payload), lambda envelope: envelope.data['accessToken'])
 
 
 class AuthSigninEndpoint(Endpoint):
+    _requires_access_token = False
 
     # pylint: disable=useless-parent-delegation
     def __get__(self, parent, owner: type) -> "AuthSigninEndpoint":
@@ -166,9 +443,12 @@ class AuthSigninEndpoint(Endpoint):
             raise ValueError('password must be a string')
 
         payload = {'email': email, 'password': password}
-        response = self._post(payload)
-        data = response.json()['data']
-        return data['accessToken'], data['refreshToken']
+
+        def parse(envelope):
+            data = envelope.data
+            return data['accessToken'], data['refreshToken']
+
+        return self._map_response(self._post(payload), parse)
 
 
 class AuthEndpoint(Endpoint):
@@ -187,7 +467,14 @@ class DevicesDataEndpoint(Endpoint):
     def __get__(self, parent, owner: type) -> "DevicesDataEndpoint":
         return super().__get__(parent, owner)
 
-    def get(self, start: datetime = None, end: datetime = None, interval: timedelta = None):
+    def get(
+            self, start: datetime = None, end: datetime = None, interval: timedelta = None,
+            as_: str = None):
+        """
+        Get the telemetry of the device. By default it is returned as a `DeviceDataModel`. With
+        `as_`, it is parsed into NumPy columns and returned in one of the `OUTPUT_FORMATS`, see
+        `TelemetryColumns.convert`.
+        """
         if self._parent.is_collection:
             raise AttributeError('Cannot get data for a collection of devices')
         if start is not None and not isinstance(start, datetime):
@@ -196,6 +483,7 @@ class DevicesDataEndpoint(Endpoint):
             raise ValueError('end must be a datetime')
         if interval is not None and not isinstance(interval, timedelta):
             raise ValueError('interval must be a timedelta')
+        check_output_format(as_)
 
         query_parameters = {}
         if start:
@@ -206,25 +494,34 @@ class DevicesDataEndpoint(Endpoint):
             interval_seconds = int(interval.total_seconds())
             query_parameters['interval'] = f'{interval_seconds}s'
 
-        response = self._get(query_parameters=query_parameters)
-        return DeviceDataModel.from_payload(response.json()['data'])
+        if as_ is not None:
+            return self._map_response(
+                self._get(query_parameters=query_parameters),
+                lambda envelope: TelemetryColumns.from_payload(envelope.data).convert(as_))
+        return self._map_response(
+            self._get(query_parameters=query_parameters),
+            lambda envelope: DeviceDataModel.from_payload(envelope.data))
 
 
 class DevicesClaimEndpoint(Endpoint):
+    # Claiming changes the claimed devices and the user
+    _invalidated_paths = ('/devices', '/users')
 
     # pylint: disable=useless-parent-delegation
     def __get__(self, parent, owner: type) -> "DevicesClaimedEndpoint":
         return super().__get__(parent, owner)
 
     def put(self):
-        self._put()
+        return self._map_response(self._put(), lambda envelope: None)
 
     def delete(self):
         if self.is_resource:
             raise AttributeError('Cannot unclaim from a specific user')
-        self._delete()
+        return self._map_response(self._delete(), lambda envelope: None)
 
 class DevicesLogEndpoint(Endpoint):
+    # Logs are not returned by any endpoint
+    _invalidated_paths = ()
 
     # pylint: disable=useless-parent-delegation
     def __get__(self, parent, owner: type) -> "DevicesLogEndpoint":
@@ -233,19 +530,28 @@ class DevicesLogEndpoint(Endpoint):
     def post(self, device_log: DeviceLogModel):
         if not isinstance(device_log, DeviceLogModel):
             raise ValueError('device_log must be a DeviceLogModel')
-        payload = device_log.to_payload()
-        self._post(payload)
+        payload = self._to_payload(device_log)
+        return self._map_response(self._post(payload), lambda envelope: None)
 
 
-class DevicesClaimedEndpoint(Endpoint):
-
-    # pylint: disable=useless-parent-delegation
-    def __get__(self, parent, owner: type) -> "DevicesClaimEndpoint":
-        return super().__get__(parent, owner)
+class DeviceListEndpoint(Endpoint):
+    """Base class of the endpoints that list devices, or get a single device as resource."""
 
     def get(self, include_details: bool = False) -> list[str | dict] | DeviceModel:
-        response = self._get()
-        data = response.json()['data']
+        return self._map_response(
+            self._get(), lambda envelope: self._parse_devices(envelope, include_details))
+
+    def iter(self, include_details: bool = False) -> Iterator[str | dict]:
+        """Like `get` for the collection, but streams the devices one by one."""
+        if self.is_resource:
+            raise ValueError('Cannot iterate over a specific device')
+        devices = self._iter_data()
+        return devices if include_details else (device['id'] for device in devices)
+
+    def _parse_devices(
+            self, envelope: ResponseEnvelope,
+            include_details: bool) -> list[str | dict] | DeviceModel:
+        data = envelope.data
         if self.is_collection:
             if include_details:
                 return data
@@ -255,7 +561,14 @@ class DevicesClaimedEndpoint(Endpoint):
         return device_model
 
 
-class DevicesEndpoint(Endpoint):
+class DevicesClaimedEndpoint(DeviceListEndpoint):
+
+    # pylint: disable=useless-parent-delegation
+    def __get__(self, parent, owner: type) -> "DevicesClaimEndpoint":
+        return super().__get__(parent, owner)
+
+
+class DevicesEndpoint(DeviceListEndpoint):
     log = DevicesLogEndpoint('log')
     data = DevicesDataEndpoint('data')
     claim = DevicesClaimEndpoint('claim')
@@ -268,20 +581,8 @@ class DevicesEndpoint(Endpoint):
     def post(self) -> str:
         if self.is_resource:
             raise ValueError('Cannot post to a specific device')
-        response = self._post()
-        data = response.json()['data']
-        return data['deviceId']
-
-    def get(self, include_details: bool = False) -> list[str | dict] | DeviceModel:
-        response = self._get()
-        data = response.json()['data']
-        if self.is_collection:
-            if include_details:
-                return data
-            return [d['id'] for d in data]
-
-        device_model = DeviceModel.from_payload(data)
-        return device_model
+        return self._map_response(
+            self._post(), lambda envelope: envelope.data['deviceId'])
 
     def patch(self, device_model: DeviceModel):
         if self.is_collection:
@@ -289,8 +590,8 @@ class DevicesEndpoint(Endpoint):
         if not isinstance(device_model, DeviceModel):
             raise ValueError('device_model must be a DeviceModel')
 
-        payload = device_model.to_payload()
-        self._patch(payload)
+        payload = self._to_payload(device_model)
+        return self._map_response(self._patch(payload), lambda envelope: None)
 
     def delete(self):
         if self.is_collection:
@@ -305,9 +606,8 @@ class UsersEndpoint(Endpoint):
         return super().__get__(parent, owner)
 
     def get(self) -> UserModel:
-        response = self._get()
-        payload = response.json()['data']
-        return UserModel.from_payload(payload)
+        return self._map_response(
+            self._get(), lambda envelope: UserModel.from_payload(envelope.data))
 
 
 class RootEndpoint(Endpoint):
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class RequestCoalescer:
+    """
+    Lets concurrent identical requests share one request. The first caller with a key sends the
+    request, and callers with the same key that arrive while it is in flight wait for its result
+    instead of sending their own. They also receive its exception, if it fails.
+
+    Blocking callers are coalesced across threads, async callers within their event loop.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[Hashable, Future | asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def run(self, key: Hashable, request: Callable[[], Any]) -> Any:
+        """Call `request`, unless a call with the same key is in flight, and return its result."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self._in_flight[key] = Future()
+        if not is_leader:
+            return future.result()
+
+        try:
+            result = request()
+        except BaseException as error:
+            self._remove(key)
+            future.set_exception(error)
+            raise
+        self._remove(key)
+        future.set_result(result)
+        return result
+
+    async def run_async(self, key: Hashable, request: Callable[[], Awaitable[Any]]) -> Any:
+        """Async version of `run`."""
+        key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            future = self._in_flight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self._in_flight[key] = asyncio.get_running_loop().create_future()
+        if not is_leader:
+            # A cancelled follower must not cancel the request of the others
+            return await asyncio.shield(future)
+
+        try:
+            result = await request()
+        except asyncio.CancelledError:
+            self._remove(key)
+            future.cancel()
+            raise
+        except BaseException as error:
+            self._remove(key)
+            future.set_exception(error)
+            # Mark the exception as retrieved, in case there are no followers
+            future.exception()
+            raise
+        self._remove(key)
+        future.set_result(result)
+        return result
+
+    def _remove(self, key: Hashable):
+        with self._lock:
+            del self._in_flight[key]
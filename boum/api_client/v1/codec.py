@@ -0,0 +1,42 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class JsonCodec(ABC):
+    """
+    Baseclass for the JSON codecs that decode the bodies of API responses. Implementations must
+    raise a `ValueError` if the body is not valid JSON.
+    """
+
+    @abstractmethod
+    def loads(self, content: bytes | str) -> Any:
+        """Decode a JSON document."""
+
+
+class StdlibJsonCodec(JsonCodec):
+    """Codec based on the `json` module of the standard library."""
+
+    def loads(self, content: bytes | str) -> Any:
+        return json.loads(content)
+
+
+class OrjsonCodec(JsonCodec):
+    """Codec based on `orjson`, which decodes large documents several times faster."""
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError('OrjsonCodec requires orjson. Install it with `pip install orjson`.')
+
+    def loads(self, content: bytes | str) -> Any:
+        return orjson.loads(content)  # pylint: disable=no-member
+
+
+def default_codec() -> JsonCodec:
+    """Return the fastest available codec: `OrjsonCodec` if orjson is installed."""
+    return OrjsonCodec() if orjson is not None else StdlibJsonCodec()
@@ -1,10 +1,115 @@
+import asyncio
 import functools
+import inspect
 import logging
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Callable
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
 
 import requests
-from requests import JSONDecodeError
+
+from boum.api_client.v1.cache import CacheEntry, ResponseCache
+from boum.api_client.v1.circuit_breaker import CircuitBreaker
+from boum.api_client.v1.coalescing import RequestCoalescer
+from boum.api_client.v1.codec import JsonCodec, default_codec
+from boum.api_client.v1.metrics import MetricsRegistry
+from boum.api_client.v1.rate_limit import RateLimiter
+from boum.api_client.v1.retry import RetryPolicy
+from boum.api_client.v1.streaming import iter_json_array, iter_response_chunks
+from boum.api_client.v1.tracing import Tracer, start_span
+from boum.api_client.v1.transport import raise_for_status
+
+
+@dataclass
+class ResponseEnvelope:
+    """
+    An API response with its body decoded once into the message and the data of the API's
+    response envelope.
+
+    Attributes
+    ----------
+        status_code
+            The HTTP status code of the response.
+        message
+            The message of the response body, or 'No message' if the body is not JSON.
+        data
+            The data of the response body, or None if there is none.
+        response
+            The underlying response object of the session.
+    """
+    status_code: int
+    message: str | None
+    data: Any
+    response: requests.Response | Any
+
+    @property
+    def is_success(self) -> bool:
+        return self.status_code < 400
+
+
+@dataclass
+class AccessTokenHooks:
+    """
+    Callbacks with which the endpoints keep the access token of the client valid.
+
+    Attributes
+    ----------
+        refresh
+            A callable that, when executed, refreshes the access token. It receives the monotonic
+            time at which the rejected request was sent, so that concurrent callers can skip a
+            refresh that already happened in the meantime. For async sessions, it may return an
+            awaitable.
+        ensure
+            A callable that is executed before every request that requires an access token. It
+            refreshes the access token ahead of time if it is about to expire. For async sessions,
+            it may return an awaitable.
+    """
+    refresh: Callable[[float], Any] | None = None
+    ensure: Callable[[], Any] | None = None
+
+
+@dataclass
+class EndpointContext:
+    """
+    State that is shared by all endpoints of a tree. Changes, e.g. connecting a session, are
+    visible to all endpoints of the tree, including the ones that were already created.
+
+    Attributes
+    ----------
+        session
+            The session to use for the requests. Either a `requests.Session` or an async session.
+        access_token
+            The callbacks that keep the access token valid.
+        retry_policy
+            Decides if and when failed requests are retried. None disables retries.
+        codec
+            The codec that decodes the JSON bodies of the responses.
+        metrics
+            The registry that records the request metrics. None disables the metrics.
+        tracer
+            The tracer that receives the spans of the requests. None disables tracing.
+        rate_limiter
+            Delays requests that exceed the client-side rate limits. None disables it.
+        circuit_breaker
+            Rejects requests while the API is failing. None disables it.
+        response_cache
+            Caches the responses of GET requests. None disables caching.
+        coalescer
+            Lets concurrent identical GET requests share one request. None disables coalescing.
+    """
+    session: requests.Session | Any = None
+    access_token: AccessTokenHooks = field(default_factory=AccessTokenHooks)
+    retry_policy: RetryPolicy | None = None
+    codec: JsonCodec = field(default_factory=default_codec)
+    metrics: MetricsRegistry | None = None
+    tracer: Tracer | None = None
+    rate_limiter: RateLimiter | None = None
+    circuit_breaker: CircuitBreaker | None = None
+    response_cache: ResponseCache | None = None
+    coalescer: RequestCoalescer | None = None
 
 
 class Endpoint(ABC):
@@ -22,15 +127,38 @@ class Endpoint(ABC):
     Only the arguments 'path_segment' and optionally 'disabled_for_collection' need to be set when
     defining child endpoint class attributes. The other arguments will be set automatically when the
     endpoint hierarchy tree is constructed. The root endpoint additionally needs to have the
-    'session' and 'refresh_access_token' arguments set.
+    'session' and 'refresh_access_token' arguments or the 'context' argument set. All endpoints
+    of a tree share the context of the root endpoint.
+
+    Child endpoints are created once per parent and cached, and endpoints for specific resources
+    are cached per resource id in a bounded LRU cache of the collection endpoint. Repeated
+    attribute access like `root.devices(device_id).data` therefore returns the same objects.
+
+    The session can either be a blocking `requests.Session` or an async session whose request
+    methods are coroutine functions (see `boum.api_client.v1.transport.AsyncHttpxSession`). In the
+    latter case, the request methods return awaitables and `refresh_access_token` may be a
+    coroutine function as well. Endpoint methods that post-process responses should use
+    `_map_response` so they work with both kinds of sessions.
+
+    The request methods return a `ResponseEnvelope`, whose body has already been decoded.
+    Endpoint methods should use its `data` instead of decoding the response again. Models should
+    be converted with `_map_response` and `_to_payload`, so that the conversion is traced.
     """
 
     _access_token_expired_message = 'ExpiredAccessToken'  # nosec
+    # Endpoints that are used to obtain access tokens must set this to False
+    _requires_access_token = True
+    # Maximum number of cached resource endpoints per collection endpoint
+    _resource_cache_size = 1024
+    # Path templates whose cached responses are invalidated by successful writes to the endpoint.
+    # None means the top-level collection of the endpoint, e.g. `/devices` for `/devices/{id}`.
+    _invalidated_paths: tuple[str, ...] | None = None
 
     def __init__(
             self, path_segment: str, disabled_for_collection: bool = False,
             resource_id: str | None = None, session: requests.Session = None,
-            refresh_access_token: Callable[[], None] = None, parent: 'Endpoint | None' = None):
+            refresh_access_token: Callable[[float], None] = None, parent: 'Endpoint | None' = None,
+            context: EndpointContext | None = None):
         """
         Parameters
         ----------
@@ -42,25 +170,39 @@ class Endpoint(ABC):
                 The id of the resource that this endpoint represents. If it is none, the enpoint
                 represents a collection of resources.
             session
-                The session to use for the requests.
+                The session to use for the requests. Either a `requests.Session` or an async
+                session.
             refresh_access_token
-                A callable that, when executed, refreshes the access token.
+                A callable that, when executed, refreshes the access token. See
+                `AccessTokenHooks.refresh`.
             parent
                 The parent endpoint. If it is none, the endpoint is the root of the tree.
+            context
+                The state that is shared by all endpoints of the tree. If it is none, a new
+                context is created from the `session` and `refresh_access_token` arguments.
         """
+        if context is None:
+            context = EndpointContext(
+                session=session, access_token=AccessTokenHooks(refresh=refresh_access_token))
+        self._context = context
         self._path_segment = path_segment
-        self._session = session
-        self._refresh_access_token = refresh_access_token
         self._resource_id = resource_id
         self._disabled_for_collection = disabled_for_collection
         self._parent = parent
+        path_elements = [parent.url if parent else None, path_segment, resource_id]
+        self._url = '/'.join(s.strip('/') for s in path_elements if s)
+        self._path_template = '' if parent is None else \
+            f'{parent.path_template}/{path_segment.strip("/")}' + ('/{id}' if resource_id else '')
+        self._children: dict['Endpoint', 'Endpoint'] = {}
+        self._resources: OrderedDict[str, 'Endpoint'] = OrderedDict()
+        self._resources_lock = threading.Lock()
 
     @abstractmethod
     def __get__(self, parent, owner: type):
         """
-        Validate attribute access and return a new instance of the attribute with a parent added.
-        Every subclass must implement this method for propper type hinting with the propper
-        return type as:
+        Validate attribute access and return the instance of the attribute with the parent added.
+        The instance is created on first access and cached in the parent. Every subclass must
+        implement this method for propper type hinting with the propper return type as:
             def __get__(self, instance, owner: type) -> "...Endpoint":
                 return super().__get__(instance, owner)
         """
@@ -68,45 +210,67 @@ class Endpoint(ABC):
             if self._disabled_for_collection and parent.is_collection:
                 raise AttributeError(
                     'This endpoint is only available for a single resource, not for a collection')
-            return type(self)(
-                path_segment=self._path_segment,
-                disabled_for_collection=self._disabled_for_collection,
-                session=parent.session,
-                resource_id=self._resource_id,
-                refresh_access_token=parent._refresh_access_token,
-                parent=parent)
+            child = parent._children.get(self)
+            if child is None:
+                child = parent._children.setdefault(self, type(self)(
+                    path_segment=self._path_segment,
+                    disabled_for_collection=self._disabled_for_collection,
+                    resource_id=self._resource_id,
+                    parent=parent,
+                    context=parent._context))
+            return child
 
         return self
 
     def __call__(self, resource_id: str):
         """
-        Returns a new endpoint of the same classe with an added resource id, representing a
-        specific resource instead of a collection.
+        Returns an endpoint of the same classe with an added resource id, representing a
+        specific resource instead of a collection. The endpoint is cached per resource id.
         """
-        return type(self)(
-            path_segment=self._path_segment,
-            session=self._session,
-            resource_id=resource_id,
-            disabled_for_collection=self._disabled_for_collection,
-            refresh_access_token=self._refresh_access_token,
-            parent=self._parent)
+        with self._resources_lock:
+            resource = self._resources.get(resource_id)
+            if resource is not None:
+                self._resources.move_to_end(resource_id)
+                return resource
+
+            resource = type(self)(
+                path_segment=self._path_segment,
+                resource_id=resource_id,
+                disabled_for_collection=self._disabled_for_collection,
+                parent=self._parent,
+                context=self._context)
+            self._resources[resource_id] = resource
+            if len(self._resources) > self._resource_cache_size:
+                self._resources.popitem(last=False)
+            return resource
 
     @property
     def session(self) -> requests.Session:
         """The session used for the requests."""
-        return self._session
+        return self._context.session
 
     @session.setter
     def session(self, value: requests.Session):
-        self._session = value
+        self._context.session = value
+
+    @property
+    def _session(self) -> requests.Session:
+        return self._context.session
+
+    @property
+    def is_async(self) -> bool:
+        """True if the endpoint is connected with an async session."""
+        return inspect.iscoroutinefunction(getattr(self.session, 'get', None))
 
     @property
     def url(self) -> str:
         """The full url of the endpoint."""
-        path_elemets = [self._parent.url if self._parent else None,
-                        self._path_segment,
-                        self._resource_id]
-        return '/'.join(s.strip('/') for s in path_elemets if s)
+        return self._url
+
+    @property
+    def path_template(self) -> str:
+        """The path of the endpoint relative to the root, with resource ids as `{id}`."""
+        return self._path_template
 
     @property
     def is_collection(self) -> bool:
@@ -123,51 +287,408 @@ class Endpoint(ABC):
         """Returns a list of all child endpoints."""
         return [e for e in vars(self) if isinstance(e, Endpoint)]
 
+    def _map_response(
+            self, response: ResponseEnvelope | Any,
+            callback: Callable[[ResponseEnvelope], Any]) -> Any:
+        """
+        Apply a callback to the response envelope of a request method. If the request method
+        returned an awaitable, because the endpoint is connected with an async session, an
+        awaitable that resolves to the result of the callback is returned instead.
+        """
+        def parse(envelope: ResponseEnvelope) -> Any:
+            with self._start_span('boum.model_parse'):
+                return callback(envelope)
+
+        if inspect.isawaitable(response):
+            async def await_and_map():
+                return parse(await response)
+
+            return await_and_map()
+        return parse(response)
+
+    def _to_payload(self, model) -> dict:
+        """Convert a model into the payload of a request."""
+        with self._start_span('boum.model_serialize', {'boum.model': type(model).__name__}):
+            return model.to_payload()
+
+    def _start_span(self, name: str, attributes: dict[str, Any] = None):
+        attributes = {'http.route': self.path_template, **(attributes or {})}
+        return start_span(self._context.tracer, name, attributes)
+
+    def _parse_envelope(self, response) -> ResponseEnvelope:
+        """Decode the body of a response once into a response envelope."""
+        try:
+            body = self._context.codec.loads(response.content) if response.content else None
+        except ValueError:
+            body = None
+        if isinstance(body, dict):
+            return ResponseEnvelope(
+                response.status_code, body.get('message'), body.get('data'), response)
+        return ResponseEnvelope(response.status_code, 'No message', None, response)
+
+    def _is_access_token_expired(self, envelope: ResponseEnvelope) -> bool:
+        return self._requires_access_token and envelope.status_code == 401 \
+            and self._access_token_expired_message == envelope.message
+
+    @staticmethod
+    def _check_status(envelope: ResponseEnvelope):
+        if envelope.is_success:
+            logging.info('Request successful (%s): %s', envelope.status_code, envelope.message)
+        else:
+            logging.error('Request failed (%s): %s', envelope.status_code, envelope.message)
+            raise_for_status(envelope.response)
+
+    def _get_retry_delay(
+            self, method: str, attempt: int, response=None,
+            error: Exception | None = None) -> float | None:
+        retry_policy = self._context.retry_policy
+        if retry_policy is None:
+            return None
+        delay = retry_policy.get_retry_delay(method, attempt, response=response, error=error)
+        if delay is not None:
+            reason = repr(error) if error is not None else response.status_code
+            logging.warning(
+                'Request failed (%s). Retrying in %.2fs (retry %s)...', reason, delay, attempt + 1)
+            if self._context.metrics:
+                self._context.metrics.record_retry(method, self.path_template)
+        return delay
+
+    def _receive_envelope(
+            self, method: str, response, sent_at: float, permit: int | None,
+            stream: bool = False) -> ResponseEnvelope:
+        """
+        Decode the response into an envelope and record the request outcome. The body of a
+        successful streamed response is left unread for the caller, and the data of its envelope
+        is None.
+        """
+        received_at = time.perf_counter()
+        if permit is not None:
+            self._context.circuit_breaker.record(
+                permit, response.status_code >= 500, received_at - sent_at)
+
+        metrics = self._context.metrics
+        if stream:
+            if response.status_code < 400:
+                if metrics is not None:
+                    metrics.record_request(
+                        method, self.path_template, received_at - sent_at, response.status_code)
+                return ResponseEnvelope(response.status_code, None, None, response)
+            if hasattr(response, 'read'):
+                # Streamed httpx responses must be read before their content is available
+                response.read()
+
+        if metrics is None:
+            with self._start_span('boum.json_decode'):
+                return self._parse_envelope(response)
+
+        with self._start_span('boum.json_decode'):
+            envelope = self._parse_envelope(response)
+        metrics.record_request(
+            method, self.path_template, received_at - sent_at, envelope.status_code,
+            len(response.content or b''), time.perf_counter() - received_at)
+        return envelope
+
+    def _get_rate_limit_delay(self) -> float:
+        if self._context.rate_limiter is None:
+            return 0.0
+        return self._context.rate_limiter.reserve(self.path_template)
+
+    def _acquire_circuit(self) -> int | None:
+        """Get the permit of the circuit breaker to send a request, if there is a breaker."""
+        if self._context.circuit_breaker is None:
+            return None
+        return self._context.circuit_breaker.acquire()
+
+    def _on_request_error(
+            self, method: str, attempt: int, sent_at: float, permit: int | None,
+            error: Exception) -> float | None:
+        """Record a failed request and get the delay before retrying it, if it is retryable."""
+        duration = time.perf_counter() - sent_at
+        if permit is not None:
+            self._context.circuit_breaker.record(permit, True, duration)
+        if self._context.metrics:
+            self._context.metrics.record_request(method, self.path_template, duration)
+        return self._get_retry_delay(method, attempt, error=error)
+
+    def _get_request_key(self, method: str, args: tuple, kwargs: dict) -> Any:
+        """
+        Get a key that identifies a GET request by its url and query parameters, or None if the
+        request is not a GET request without payload.
+        """
+        if method != 'GET':
+            return None
+        arguments = dict(zip(['payload', 'query_parameters'], args), **kwargs)
+        if arguments.get('payload') is not None or arguments.get('stream'):
+            return None
+        query_parameters = arguments.get('query_parameters') or {}
+        return self.url, tuple(sorted(query_parameters.items()))
+
+    def _get_cache_entry(
+            self, method: str, args: tuple, kwargs: dict) -> tuple[Any, CacheEntry | None]:
+        """Get the cache key of a request and its cached response, if it can be cached."""
+        cache = self._context.response_cache
+        if cache is None or cache.get_ttl(self.path_template) is None:
+            return None, None
+
+        key = self._get_request_key(method, args, kwargs)
+        return key, cache.get(key) if key is not None else None
+
+    def _get_cached_envelope(self, entry: CacheEntry) -> ResponseEnvelope:
+        with self._start_span('boum.json_decode'):
+            return self._parse_envelope(entry.response)
+
+    def _update_cache(
+            self, method: str, key: Any, entry: CacheEntry | None,
+            envelope: ResponseEnvelope) -> ResponseEnvelope:
+        """
+        Cache the response of a GET request, or invalidate cached responses after a write. Returns
+        the cached envelope if the API confirmed that the cached response is still valid, and
+        raises a `requests.HTTPError` if it confirmed a response that is not cached.
+        """
+        cache = self._context.response_cache
+        if cache is None:
+            return envelope
+
+        if method != 'GET':
+            if envelope.is_success:
+                paths = self._invalidated_paths
+                if paths is None:
+                    paths = ('/'.join(self.path_template.split('/')[:2]),)
+                cache.invalidate(paths)
+        elif key is not None:
+            if envelope.status_code == 304:
+                if entry is None:
+                    # E.g. validators of the session or a proxy. The response has no data.
+                    logging.error('Request failed (304): No cached response to revalidate')
+                    raise requests.HTTPError(
+                        '304 Not Modified for a response that is not cached',
+                        response=envelope.response)
+                cache.revalidate(key, entry, envelope.response)
+                return self._get_cached_envelope(entry)
+            if envelope.status_code == 200:
+                cache.put(key, self.path_template, envelope.response)
+        return envelope
+
+    def _on_access_token_expired(self, method: str):
+        logging.info('Access token expired. Refreshing...')
+        if self._context.metrics:
+            self._context.metrics.record_token_refresh(method, self.path_template)
+
+    def _handle_request(
+            self, func: Callable[..., requests.Response], *args, **kwargs) -> ResponseEnvelope:
+        """
+        Send a request, or wait for an identical GET request that is in flight. Coalesced
+        callers share the envelope of the request, including its data.
+        """
+        key = None
+        if self._context.coalescer is not None:
+            key = self._get_request_key(func.__name__.strip('_').upper(), args, kwargs)
+        if key is None:
+            return self._send_request(func, *args, **kwargs)
+        return self._context.coalescer.run(
+            key, functools.partial(self._send_request, func, *args, **kwargs))
+
+    async def _handle_request_async(
+            self, func: Callable[..., Any], *args, **kwargs) -> ResponseEnvelope:
+        """Async version of `_handle_request`."""
+        key = None
+        if self._context.coalescer is not None:
+            key = self._get_request_key(func.__name__.strip('_').upper(), args, kwargs)
+        if key is None:
+            return await self._send_request_async(func, *args, **kwargs)
+        return await self._context.coalescer.run_async(
+            key, functools.partial(self._send_request_async, func, *args, **kwargs))
+
+    def _send_request(
+            self, func: Callable[..., requests.Response], *args, **kwargs) -> ResponseEnvelope:
+        method = func.__name__.strip('_').upper()
+        attributes = {'http.method': method, 'http.url': self.url}
+        with self._start_span('boum.request', attributes) as span:
+            cache_key, cache_entry = self._get_cache_entry(method, args, kwargs)
+            if cache_entry is not None:
+                if cache_entry.is_fresh:
+                    span.set_attribute('boum.cache', 'hit')
+                    return self._get_cached_envelope(cache_entry)
+                kwargs = {**kwargs, 'headers': cache_entry.validators}
+
+            if self._context.retry_policy:
+                self._context.retry_policy.on_request()
+            if self._requires_access_token and self._context.access_token.ensure:
+                self._context.access_token.ensure()
+
+            envelope, retries = self._send_with_retries(func, method, args, kwargs)
+            return self._complete_request(span, method, cache_key, cache_entry, envelope, retries)
+
+    def _send_with_retries(
+            self, func: Callable[..., requests.Response], method: str, args: tuple,
+            kwargs: dict) -> tuple[ResponseEnvelope, int]:
+        """
+        Send a request, refreshing the access token and retrying it as needed. Returns the
+        envelope of the final response and the number of retries.
+        """
+        attempt = 0
+        access_token_refreshed = False
+        while True:
+            self._wait_for_rate_limit()
+            permit = self._acquire_circuit()
+            # Monotonic time for the single-flight token refresh, perf_counter for the metrics
+            requested_at = time.monotonic()
+            sent_at = time.perf_counter()
+            try:
+                response = func(self, *args, **kwargs)
+            except Exception as error:  # pylint: disable=broad-except
+                delay = self._on_request_error(method, attempt, sent_at, permit, error)
+                if delay is None:
+                    raise
+            else:
+                envelope = self._receive_envelope(
+                    method, response, sent_at, permit, kwargs.get('stream', False))
+                if not access_token_refreshed and self._is_access_token_expired(envelope):
+                    self._on_access_token_expired(method)
+                    self._context.access_token.refresh(requested_at)
+                    access_token_refreshed = True
+                    logging.info('Access token refreshed. Retrying request...')
+                    continue
+
+                delay = self._get_retry_delay(method, attempt, response=response)
+                if delay is None:
+                    return envelope, attempt
+            with self._start_span('boum.retry', {'boum.retry': attempt + 1}):
+                time.sleep(delay)
+            attempt += 1
+
+    async def _send_request_async(
+            self, func: Callable[..., Any], *args, **kwargs) -> ResponseEnvelope:
+        method = func.__name__.strip('_').upper()
+        attributes = {'http.method': method, 'http.url': self.url}
+        with self._start_span('boum.request', attributes) as span:
+            cache_key, cache_entry = self._get_cache_entry(method, args, kwargs)
+            if cache_entry is not None:
+                if cache_entry.is_fresh:
+                    span.set_attribute('boum.cache', 'hit')
+                    return self._get_cached_envelope(cache_entry)
+                kwargs = {**kwargs, 'headers': cache_entry.validators}
+
+            if self._context.retry_policy:
+                self._context.retry_policy.on_request()
+            if self._requires_access_token and self._context.access_token.ensure:
+                ensured = self._context.access_token.ensure()
+                if inspect.isawaitable(ensured):
+                    await ensured
+
+            envelope, retries = await self._send_with_retries_async(func, method, args, kwargs)
+            return self._complete_request(span, method, cache_key, cache_entry, envelope, retries)
+
+    async def _send_with_retries_async(
+            self, func: Callable[..., Any], method: str, args: tuple,
+            kwargs: dict) -> tuple[ResponseEnvelope, int]:
+        """Async version of `_send_with_retries`."""
+        attempt = 0
+        access_token_refreshed = False
+        while True:
+            await self._wait_for_rate_limit_async()
+            permit = self._acquire_circuit()
+            requested_at = time.monotonic()
+            sent_at = time.perf_counter()
+            try:
+                response = await func(self, *args, **kwargs)
+            except Exception as error:  # pylint: disable=broad-except
+                delay = self._on_request_error(method, attempt, sent_at, permit, error)
+                if delay is None:
+                    raise
+            else:
+                envelope = self._receive_envelope(
+                    method, response, sent_at, permit, kwargs.get('stream', False))
+                if not access_token_refreshed and self._is_access_token_expired(envelope):
+                    self._on_access_token_expired(method)
+                    refreshed = self._context.access_token.refresh(requested_at)
+                    if inspect.isawaitable(refreshed):
+                        await refreshed
+                    access_token_refreshed = True
+                    logging.info('Access token refreshed. Retrying request...')
+                    continue
+
+                delay = self._get_retry_delay(method, attempt, response=response)
+                if delay is None:
+                    return envelope, attempt
+            with self._start_span('boum.retry', {'boum.retry': attempt + 1}):
+                await asyncio.sleep(delay)
+            attempt += 1
+
+    def _wait_for_rate_limit(self):
+        delay = self._get_rate_limit_delay()
+        if delay:
+            with self._start_span('boum.rate_limit', {'boum.delay': delay}):
+                time.sleep(delay)
+
+    async def _wait_for_rate_limit_async(self):
+        delay = self._get_rate_limit_delay()
+        if delay:
+            with self._start_span('boum.rate_limit', {'boum.delay': delay}):
+                await asyncio.sleep(delay)
+
+    def _complete_request(
+            self, span, method: str, cache_key: Any, cache_entry: CacheEntry | None,
+            envelope: ResponseEnvelope, retries: int) -> ResponseEnvelope:
+        """Record the outcome of a request on its span, update the cache and check the status."""
+        span.set_attribute('http.status_code', envelope.status_code)
+        span.set_attribute('boum.retries', retries)
+        envelope = self._update_cache(method, cache_key, cache_entry, envelope)
+        self._check_status(envelope)
+        return envelope
+
     # noinspection PyMethodParameters
     # pylint: disable=no-self-argument no-member protected-access
     def _request_handler(func: Callable[..., requests.Response]):
-        """Decorator to apply the response handling method to the request methods"""
+        """
+        Decorator to apply the response handling method to the request methods. The decorated
+        methods return a `ResponseEnvelope`, or an awaitable of it for async sessions.
+        """
 
         @functools.wraps(func)
         def wrapper(self, *args, **kwargs):
-
-            def execute_and_parse():
-
-                if not self.session:
-                    raise RuntimeError('Endpoint is not connected to the API')
-
-                response = func(self, *args, **kwargs)
-                try:
-                    message = response.json().get('message')
-                except JSONDecodeError:
-                    message = 'No message'
-                return response, message
+            if not self.session:
+                raise RuntimeError('Endpoint is not connected to the API')
 
             logging.info("Calling %s on %s...", func.__name__, self.url)
-            response, message = execute_and_parse()
-
-            if response.status_code == 401 \
-                    and self._access_token_expired_message == message:
-                logging.info('Access token expired. Refreshing...')
-                self._refresh_access_token()
-                logging.info('Access token refreshed. Retrying request...')
-                response, message = execute_and_parse()
-
-            if response.ok:
-                logging.info('Request successful (%s): %s', response.status_code, message)
-            else:
-                logging.error('Request failed (%s): %s', response.status_code, message)
-                response.raise_for_status()
-
-            return response
+            if self.is_async:
+                return self._handle_request_async(func, *args, **kwargs)
+            return self._handle_request(func, *args, **kwargs)
 
         return wrapper
 
     # noinspection PyArgumentList
     @_request_handler
-    def _get(self, payload: dict = None, query_parameters: dict = None):
-        """Send a GET request to the endpoint."""
-        return self._session.get(url=self.url, json=payload, params=query_parameters)
+    def _get(
+            self, payload: dict = None, query_parameters: dict = None, headers: dict = None,
+            stream: bool = False):
+        """
+        Send a GET request to the endpoint. With `stream`, the body of a successful response is
+        not read, see `_iter_data`.
+        """
+        # Headers and stream are only passed if set, e.g. for conditional requests
+        options = {'headers': headers} if headers else {}
+        if stream:
+            options['stream'] = True
+        return self._session.get(url=self.url, json=payload, params=query_parameters, **options)
+
+    def _iter_data(self, query_parameters: dict = None) -> Iterator[Any]:
+        """
+        Send a streamed GET request and decode the items of the data array of the response one by
+        one, so that the whole array is never held in memory. The request is sent when the
+        iteration starts. Only supported with blocking sessions, async sessions raise a
+        `TypeError` right away.
+        """
+        if self.is_async:
+            raise TypeError('Streaming is only supported with blocking sessions')
+        return self._stream_data(query_parameters)
+
+    def _stream_data(self, query_parameters: dict = None) -> Iterator[Any]:
+        envelope = self._get(query_parameters=query_parameters, stream=True)
+        try:
+            yield from iter_json_array(iter_response_chunks(envelope.response))
+        finally:
+            envelope.response.close()
 
     # noinspection PyArgumentList
     @_request_handler
@@ -0,0 +1,356 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Callable
+
+from boum.api_client.v1.models import DeviceLogModel
+
+if TYPE_CHECKING:  # pragma: no cover
+    from boum.api_client.v1.async_client import AsyncApiClient
+    from boum.api_client.v1.client import ApiClient
+
+# Marks the end of the queue when the shipper is closed
+_CLOSE = object()
+
+
+def _log_error(device_log: DeviceLogModel, error: Exception):
+    logging.error('Failed to ship log of device %s: %r', device_log.device_id, error)
+
+
+def _report_error(
+        on_error: Callable[[DeviceLogModel, Exception], None], device_log: DeviceLogModel,
+        error: Exception):
+    """Pass a failed log to `on_error`, without letting its exceptions stop the shipper."""
+    try:
+        on_error(device_log, error)
+    except Exception:  # pylint: disable=broad-except
+        logging.exception('on_error failed for log of device %s', device_log.device_id)
+
+
+class _ClosableQueue(queue.Queue):
+    """
+    A bounded queue that rejects items once it is closed. Closing waits for the puts that already
+    started, so that the end marker is queued behind every accepted item.
+    """
+
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize)
+        self._puts = threading.Condition()
+        self._pending_puts = 0
+        self.closed = False
+
+    def put(self, item, block: bool = True, timeout: float | None = None):
+        with self._puts:
+            if self.closed:
+                raise RuntimeError('The log shipper is closed')
+            self._pending_puts += 1
+        # The put blocks without holding the lock, so that producers keep their own timeouts
+        try:
+            super().put(item, block, timeout)
+        finally:
+            with self._puts:
+                self._pending_puts -= 1
+                self._puts.notify_all()
+
+    def close(self) -> bool:
+        """Reject further items and wait for the pending puts. False if it was already closed."""
+        with self._puts:
+            if self.closed:
+                return False
+            self.closed = True
+            self._puts.wait_for(lambda: not self._pending_puts)
+        return True
+
+    def put_end(self):
+        """Queue the end marker. Must be called after `close`."""
+        super().put(_CLOSE)
+
+
+class _AsyncClosableQueue(asyncio.Queue):
+    """Async version of `_ClosableQueue`."""
+
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize)
+        self._puts = asyncio.Condition()
+        self._pending_puts = 0
+        self.closed = False
+
+    async def put(self, item):
+        if self.closed:
+            raise RuntimeError('The log shipper is closed')
+        self._pending_puts += 1
+        try:
+            await super().put(item)
+        finally:
+            self._pending_puts -= 1
+            async with self._puts:
+                self._puts.notify_all()
+
+    async def close(self) -> bool:
+        """Reject further items and wait for the pending puts. False if it was already closed."""
+        if self.closed:
+            return False
+        self.closed = True
+        async with self._puts:
+            await self._puts.wait_for(lambda: not self._pending_puts)
+        return True
+
+    async def put_end(self):
+        """Queue the end marker. Must be called after `close`."""
+        await super().put(_CLOSE)
+
+
+class DeviceLogShipper:
+    # noinspection PyUnresolvedReferences
+    """
+        Sends device logs in the background, so that callers don't wait for the requests.
+
+        Logs are queued in a bounded buffer. A background thread collects them into batches of up
+        to `batch_size` logs, or whatever arrived within `flush_interval` seconds of the first log
+        of a batch, and posts the logs of a batch concurrently. If the buffer is full, `submit`
+        blocks until there is space, which slows the producers down to the rate at which logs can
+        be sent. Logs that can't be sent, even after the retries of the client, are passed to
+        `on_error`.
+
+        Shippers that are created with `ApiClient.create_log_shipper` are drained and closed when
+        the client disconnects.
+
+        Example
+        -------
+            >>> from boum.api_client.v1.client import ApiClient
+            >>> from boum.resources.device import Device
+            >>>
+            >>> client = ApiClient(email, password, base_url=base_url)
+            >>> with client:
+            ...     shipper = client.create_log_shipper(batch_size=50)
+            ...     device = Device(device_id, client)
+            ...     for i in range(3):
+            ...         device.send_device_log(f'message {i}', shipper=shipper)
+        """
+
+    def __init__(
+            self, api_client: 'ApiClient', max_queue_size: int = 10000, batch_size: int = 100,
+            flush_interval: float = 1.0, max_workers: int = 8,
+            on_error: Callable[[DeviceLogModel, Exception], None] = _log_error):
+        """
+        Parameters
+        ----------
+            api_client
+                The connected api client that sends the logs.
+            max_queue_size
+                The maximum number of logs that are buffered before `submit` blocks.
+            batch_size
+                The maximum number of logs that are sent in one batch.
+            flush_interval
+                The maximum number of seconds a log waits for its batch to fill up.
+            max_workers
+                The maximum number of logs that are sent concurrently.
+            on_error
+                Called with a log and the exception if the log could not be sent.
+        """
+        if max_queue_size < 1 or batch_size < 1 or max_workers < 1:
+            raise ValueError('max_queue_size, batch_size and max_workers must be at least 1')
+        if flush_interval < 0:
+            raise ValueError('flush_interval must not be negative')
+
+        self._api_client = api_client
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._on_error = on_error
+        self._queue = _ClosableQueue(max_queue_size)
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='boum-log-shipper')
+        self.sent = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._run, name='boum-log-shipper', daemon=True)
+        self._thread.start()
+
+    def submit(self, device_log: DeviceLogModel, timeout: float | None = None):
+        """
+        Queue a log for sending. Blocks while the buffer is full.
+
+        Parameters
+        ----------
+            device_log
+                The log. Its `device_id` must be set.
+            timeout
+                The maximum number of seconds to wait for space in the buffer. If it expires,
+                `queue.Full` is raised. None waits indefinitely.
+        """
+        if not isinstance(device_log, DeviceLogModel):
+            raise ValueError('device_log must be a DeviceLogModel')
+        if not device_log.device_id:
+            raise ValueError('device_log.device_id must be set')
+        self._queue.put(device_log, timeout=timeout)
+
+    def flush(self):
+        """Wait until all queued logs have been sent."""
+        self._queue.join()
+
+    def close(self):
+        """
+        Send the queued logs and stop the background thread. Further logs are rejected. Waits for
+        submits that are blocked on a full buffer.
+        """
+        if not self._queue.close():
+            return
+        self._queue.put_end()
+        self._thread.join()
+        self._executor.shutdown()
+
+    def _run(self):
+        while True:
+            batch, closed = self._collect_batch()
+            if batch:
+                self._send_batch(batch)
+            for _ in range(len(batch) + closed):
+                self._queue.task_done()
+            if closed:
+                return
+
+    def _collect_batch(self) -> tuple[list[DeviceLogModel], bool]:
+        """Collect the next batch. Returns the batch and whether the shipper was closed."""
+        batch = []
+        item = self._queue.get()
+        deadline = time.monotonic() + self._flush_interval
+        while item is not _CLOSE:
+            batch.append(item)
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self._batch_size or remaining <= 0:
+                return batch, False
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return batch, False
+        return batch, True
+
+    def _send_batch(self, batch: list[DeviceLogModel]):
+        futures = {self._executor.submit(self._send, device_log): device_log
+                   for device_log in batch}
+        wait(futures)
+        for future, device_log in futures.items():
+            error = future.exception()
+            if error is None:
+                self.sent += 1
+            else:
+                self.failed += 1
+                _report_error(self._on_error, device_log, error)
+
+    def _send(self, device_log: DeviceLogModel):
+        self._api_client.root.devices(device_log.device_id).log.post(device_log)
+
+
+class AsyncDeviceLogShipper:
+    """
+    Async version of `DeviceLogShipper`. The logs are sent from a background task of the event
+    loop in which the first log is submitted, and `submit` awaits space in the buffer.
+    """
+
+    def __init__(
+            self, api_client: 'AsyncApiClient', max_queue_size: int = 10000,
+            batch_size: int = 100, flush_interval: float = 1.0, max_concurrency: int = 8,
+            on_error: Callable[[DeviceLogModel, Exception], None] = _log_error):
+        """
+        Parameters
+        ----------
+            api_client
+                The connected async api client that sends the logs.
+            max_queue_size
+                The maximum number of logs that are buffered before `submit` waits.
+            batch_size
+                The maximum number of logs that are sent in one batch.
+            flush_interval
+                The maximum number of seconds a log waits for its batch to fill up.
+            max_concurrency
+                The maximum number of logs that are sent concurrently.
+            on_error
+                Called with a log and the exception if the log could not be sent.
+        """
+        if max_queue_size < 1 or batch_size < 1 or max_concurrency < 1:
+            raise ValueError('max_queue_size, batch_size and max_concurrency must be at least 1')
+        if flush_interval < 0:
+            raise ValueError('flush_interval must not be negative')
+
+        self._api_client = api_client
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_concurrency = max_concurrency
+        self._on_error = on_error
+        self._queue = _AsyncClosableQueue(max_queue_size)
+        self._task: asyncio.Task | None = None
+        self._getter: asyncio.Future | None = None
+        self.sent = 0
+        self.failed = 0
+
+    async def submit(self, device_log: DeviceLogModel):
+        """Queue a log for sending. Waits while the buffer is full."""
+        if not isinstance(device_log, DeviceLogModel):
+            raise ValueError('device_log must be a DeviceLogModel')
+        if not device_log.device_id:
+            raise ValueError('device_log.device_id must be set')
+        if self._queue.closed:
+            raise RuntimeError('The log shipper is closed')
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        await self._queue.put(device_log)
+
+    async def flush(self):
+        """Wait until all queued logs have been sent."""
+        await self._queue.join()
+
+    async def aclose(self):
+        """Send the queued logs and stop the background task. Further logs are rejected."""
+        if not await self._queue.close():
+            return
+        if self._task is not None:
+            await self._queue.put_end()
+            await self._task
+
+    async def _run(self):
+        while True:
+            batch, closed = await self._collect_batch()
+            if batch:
+                await self._send_batch(batch)
+            for _ in range(len(batch) + closed):
+                self._queue.task_done()
+            if closed:
+                return
+
+    async def _collect_batch(self) -> tuple[list[DeviceLogModel], bool]:
+        # A get that times out is kept for the next batch instead of being cancelled, because
+        # cancelling it could lose an item that it already took from the queue
+        if self._getter is None:
+            self._getter = asyncio.ensure_future(self._queue.get())
+        item = await self._getter
+        self._getter = None
+        batch = []
+        deadline = time.monotonic() + self._flush_interval
+        while item is not _CLOSE:
+            batch.append(item)
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self._batch_size or remaining <= 0:
+                return batch, False
+            self._getter = asyncio.ensure_future(self._queue.get())
+            done, _ = await asyncio.wait({self._getter}, timeout=remaining)
+            if not done:
+                return batch, False
+            item = self._getter.result()
+            self._getter = None
+        return batch, True
+
+    async def _send_batch(self, batch: list[DeviceLogModel]):
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def send(device_log: DeviceLogModel):
+            async with semaphore:
+                await self._api_client.root.devices(device_log.device_id).log.post(device_log)
+
+        results = await asyncio.gather(*(send(log) for log in batch), return_exceptions=True)
+        for device_log, result in zip(batch, results):
+            if isinstance(result, Exception):
+                self.failed += 1
+                _report_error(self._on_error, device_log, result)
+            else:
+                self.sent += 1
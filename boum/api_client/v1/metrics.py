@@ -0,0 +1,214 @@
+import threading
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass, field
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DEFAULT_PARSE_TIME_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class Histogram:
+    """
+    Histogram with fixed bucket boundaries. Observations are counted in the first bucket whose
+    upper bound is greater or equal, or in an overflow bucket. It is not thread-safe by itself.
+    """
+
+    def __init__(self, buckets: tuple[float, ...]):
+        """
+        Parameters
+        ----------
+            buckets
+                The sorted upper bounds of the buckets.
+        """
+        if list(buckets) != sorted(buckets):
+            raise ValueError('buckets must be sorted')
+
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, quantile: float) -> float | None:
+        """
+        Estimate a quantile by linear interpolation within its bucket. Values in the overflow
+        bucket are estimated with the largest bucket bound.
+        """
+        if not 0 <= quantile <= 1:
+            raise ValueError('quantile must be between 0 and 1')
+        if self.count == 0:
+            return None
+
+        rank = quantile * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def snapshot(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': dict(zip([*self.buckets, float('inf')], self.counts)),
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+        }
+
+
+@dataclass
+class EndpointMetrics:
+    """
+    Metrics of the requests with the same HTTP method to the same endpoint path template.
+
+    Attributes
+    ----------
+        requests
+            The number of HTTP requests that were sent, including retries.
+        errors
+            The number of requests that failed with a transport error or a status code >= 400.
+        status_codes
+            The number of responses per status code.
+        retries
+            The number of retries.
+        token_refreshes
+            The number of access token refreshes after the access token was rejected.
+        response_bytes
+            The total size of the response bodies.
+        latency
+            The time from sending a request until the response was received, in seconds.
+        parse_time
+            The time to decode the response bodies, in seconds.
+    """
+    latency: Histogram
+    parse_time: Histogram
+    requests: int = 0
+    errors: int = 0
+    status_codes: Counter = field(default_factory=Counter)
+    retries: int = 0
+    token_refreshes: int = 0
+    response_bytes: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'status_codes': dict(self.status_codes),
+            'retries': self.retries,
+            'token_refreshes': self.token_refreshes,
+            'response_bytes': self.response_bytes,
+            'latency': self.latency.snapshot(),
+            'parse_time': self.parse_time.snapshot(),
+        }
+
+
+class MetricsRegistry:
+    # noinspection PyUnresolvedReferences
+    """
+        Thread-safe registry for request metrics of an api client, grouped by HTTP method and
+        endpoint path template, e.g. `GET /devices/{id}/data`.
+
+        Example
+        -------
+            >>> from boum.api_client.v1.client import ApiClient, ClientConfig
+            >>> from boum.api_client.v1.metrics import MetricsRegistry
+            >>>
+            >>> config = ClientConfig(metrics=MetricsRegistry())
+            >>> client = ApiClient(email, password, base_url=base_url, config=config)
+            >>> with client:
+            ...     device_ids = client.root.devices.get()
+            >>> latency_p99 = client.metrics.snapshot()['GET /devices']['latency']['p99']
+        """
+
+    def __init__(
+            self, latency_buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+            parse_time_buckets: tuple[float, ...] = DEFAULT_PARSE_TIME_BUCKETS):
+        """
+        Parameters
+        ----------
+            latency_buckets
+                The upper bounds of the latency histogram buckets, in seconds.
+            parse_time_buckets
+                The upper bounds of the parse time histogram buckets, in seconds.
+        """
+        self._latency_buckets = latency_buckets
+        self._parse_time_buckets = parse_time_buckets
+        self._endpoints: dict[tuple[str, str], EndpointMetrics] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, method: str, path: str) -> EndpointMetrics:
+        metrics = self._endpoints.get((method, path))
+        if metrics is None:
+            metrics = self._endpoints.setdefault((method, path), EndpointMetrics(
+                Histogram(self._latency_buckets), Histogram(self._parse_time_buckets)))
+        return metrics
+
+    def record_request(
+            self, method: str, path: str, latency: float, status_code: int | None = None,
+            response_bytes: int = 0, parse_time: float | None = None):
+        """Record a request. A status code of None means that it failed with a transport error."""
+        with self._lock:
+            metrics = self._get(method, path)
+            metrics.requests += 1
+            metrics.latency.observe(latency)
+            if status_code is None or status_code >= 400:
+                metrics.errors += 1
+            if status_code is not None:
+                metrics.status_codes[status_code] += 1
+            metrics.response_bytes += response_bytes
+            if parse_time is not None:
+                metrics.parse_time.observe(parse_time)
+
+    def record_retry(self, method: str, path: str):
+        with self._lock:
+            self._get(method, path).retries += 1
+
+    def record_token_refresh(self, method: str, path: str):
+        with self._lock:
+            self._get(method, path).token_refreshes += 1
+
+    def snapshot(self) -> dict[str, dict]:
+        """Return a JSON-serializable copy of all metrics, keyed by `METHOD /path/template`."""
+        with self._lock:
+            return {f'{method} {path}': metrics.snapshot()
+                    for (method, path), metrics in sorted(self._endpoints.items())}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def export_prometheus(self, prefix: str = 'boum_api') -> str:
+        """Export all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for (method, path), metrics in sorted(self._endpoints.items()):
+                labels = f'method="{method}",path="{path}"'
+                lines.append(f'{prefix}_requests_total{{{labels}}} {metrics.requests}')
+                lines.append(f'{prefix}_errors_total{{{labels}}} {metrics.errors}')
+                lines.append(f'{prefix}_retries_total{{{labels}}} {metrics.retries}')
+                lines.append(
+                    f'{prefix}_token_refreshes_total{{{labels}}} {metrics.token_refreshes}')
+                lines.append(
+                    f'{prefix}_response_bytes_total{{{labels}}} {metrics.response_bytes}')
+                for status_code, count in sorted(metrics.status_codes.items()):
+                    lines.append(
+                        f'{prefix}_responses_total{{{labels},status="{status_code}"}} {count}')
+                for name, histogram in [('latency_seconds', metrics.latency),
+                                        ('parse_seconds', metrics.parse_time)]:
+                    cumulative = 0
+                    for bound, count in zip([*histogram.buckets, '+Inf'], histogram.counts):
+                        cumulative += count
+                        lines.append(
+                            f'{prefix}_{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'{prefix}_{name}_sum{{{labels}}} {histogram.sum}')
+                    lines.append(f'{prefix}_{name}_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
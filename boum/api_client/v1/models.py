@@ -308,24 +308,16 @@ class DeviceDataModel(Model):
 
     @staticmethod
     def from_payload(payload: dict[str, any]) -> 'DeviceDataModel':
-        device_ids = DeviceDataModel._parse_device_ids(payload)
-        timestamps = DeviceDataModel._parse_timestamps(payload)
+        # The timestamps of the first time series apply to all of them
+        first_timeseries = next(iter(payload['timeSeries'].values()))
         data = DeviceDataModel._parse_values(payload)
-        data['deviceId'] = device_ids
-        data['timestamp'] = timestamps
+        data['deviceId'] = [payload['details']['deviceId']] * len(first_timeseries)
+        data['timestamp'] = DeviceDataModel._parse_timestamps(first_timeseries)
         return DeviceDataModel(data)
 
     @staticmethod
-    def _parse_timestamps(payload: dict) -> list[datetime]:
-        first_timeseries = list(payload['timeSeries'].values())[0]
-        timestamps = [v['x'] for v in first_timeseries]
-        return [parser.isoparse(t) for t in timestamps]
-
-    @staticmethod
-    def _parse_device_ids(payload: dict) -> list[str]:
-        device_id = payload['details']['deviceId']
-        first_timeseries = list(payload['timeSeries'].values())[0]
-        return [device_id] * len(first_timeseries)
+    def _parse_timestamps(timeseries: list[dict]) -> list[datetime]:
+        return [parser.isoparse(v['x']) for v in timeseries]
 
     @staticmethod
     def _parse_values(payload: dict) -> dict[str, list[any]]:
@@ -0,0 +1,117 @@
+import threading
+import time
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    A rate limit for requests.
+
+    Attributes
+    ----------
+        rate
+            The number of requests per second that can be sent in the long run.
+        burst
+            The number of requests that can be sent at once after a pause. Defaults to one second
+            worth of requests, but at least 1.
+    """
+    rate: float
+    burst: float | None = None
+
+    def __post_init__(self):
+        """Value validation after initialization"""
+        if self.rate <= 0:
+            raise ValueError('rate must be positive')
+        if self.burst is not None and self.burst < 1:
+            raise ValueError('burst must be at least 1')
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket. Every request takes one token and the bucket is refilled at a
+    constant rate up to its capacity.
+
+    Tokens are reserved instead of waited for: if the bucket is empty, the balance becomes
+    negative and the caller gets the time it has to wait before sending. This way the lock is
+    never held while waiting, and blocking and async callers can share the same bucket.
+    """
+
+    def __init__(self, limit: RateLimit):
+        self._rate = limit.rate
+        self._capacity = limit.burst if limit.burst is not None else max(1.0, limit.rate)
+        self._tokens = self._capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return the number of seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+            self._updated_at = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self._rate)
+
+
+class RateLimiter:
+    # noinspection PyUnresolvedReferences
+    """
+        Client-side rate limiter for the requests of one or more api clients.
+
+        A request has to pass the global limit and the limit of the first endpoint pattern that
+        matches its path template, e.g. `/devices/{id}/log`. Patterns are matched with `fnmatch`,
+        so `/auth/*` matches all auth endpoints. All paths that match a pattern share the same
+        bucket. Retries count as requests. The limiter is thread-safe and can be shared by sync and
+        async clients.
+
+        Example
+        -------
+            >>> from boum.api_client.v1.client import ApiClient, ClientConfig
+            >>> from boum.api_client.v1.rate_limit import RateLimit, RateLimiter
+            >>>
+            >>> rate_limiter = RateLimiter(RateLimit(rate=20, burst=40), endpoints={
+            ...     '/devices/{id}/log': RateLimit(rate=5),
+            ...     '/auth/*': RateLimit(rate=1, burst=3)})
+            >>> config = ClientConfig(rate_limiter=rate_limiter)
+            >>> client = ApiClient(email, password, base_url=base_url, config=config)
+        """
+
+    def __init__(self, default: RateLimit | None = None, endpoints: dict[str, RateLimit] = None):
+        """
+        Parameters
+        ----------
+            default
+                The limit for all requests. None means that only the endpoint limits apply.
+            endpoints
+                Limits per endpoint path template pattern, in order of precedence.
+        """
+        self._default = TokenBucket(default) if default is not None else None
+        self._endpoints = [(pattern, TokenBucket(limit))
+                           for pattern, limit in (endpoints or {}).items()]
+        self._buckets_by_path: dict[str, list[TokenBucket]] = {}
+
+    def _get_buckets(self, path: str) -> list[TokenBucket]:
+        buckets = self._buckets_by_path.get(path)
+        if buckets is None:
+            buckets = [self._default] if self._default is not None else []
+            for pattern, bucket in self._endpoints:
+                if fnmatchcase(path, pattern):
+                    buckets.append(bucket)
+                    break
+            buckets = self._buckets_by_path.setdefault(path, buckets)
+        return buckets
+
+    def reserve(self, path: str) -> float:
+        """
+        Reserve a request to an endpoint and return the number of seconds to wait before sending
+        it.
+
+        Parameters
+        ----------
+            path
+                The path template of the endpoint.
+        """
+        return max((bucket.reserve() for bucket in self._get_buckets(path)), default=0.0)
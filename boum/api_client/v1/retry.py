@@ -0,0 +1,181 @@
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+
+from boum.api_client.v1.transport import TRANSIENT_ERRORS
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+
+class RetryBudget:
+    """
+    Limits the retries of a client to a share of its requests, so that retries can't multiply the
+    load on the API during an outage.
+
+    The budget is a token bucket that starts full. Every request deposits `ratio` tokens and every
+    retry withdraws one token. If the bucket is empty, failed requests are not retried anymore
+    until enough new requests have been made. The budget is thread-safe and can be shared by
+    multiple clients.
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 20.0):
+        """
+        Parameters
+        ----------
+            ratio
+                The share of requests that can be retried in the long run.
+            max_tokens
+                The maximum number of retries that can be made in a burst.
+        """
+        if ratio < 0:
+            raise ValueError('ratio must not be negative')
+        if max_tokens < 1:
+            raise ValueError('max_tokens must be at least 1')
+
+        self._ratio = ratio
+        self._max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self) -> float:
+        """The number of retries that are currently available."""
+        return self._tokens
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self._max_tokens, self._tokens + self._ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Decides if and when a failed request is retried.
+
+    Transport errors are only retried for idempotent methods. Responses with a status code in
+    `retry_status_codes` are retried for idempotent methods, and responses with status 429 for
+    all methods, because the API rejected them without processing. The delay between attempts
+    grows exponentially with `backoff_factor * 2 ** attempt` up to `max_backoff`, and is
+    randomized with full jitter. If the response has a `Retry-After` header, its value is used
+    instead.
+
+    Attributes
+    ----------
+        max_retries
+            The maximum number of retries per request. 0 disables retries.
+        backoff_factor
+            The base delay in seconds of the exponential backoff.
+        max_backoff
+            The maximum delay in seconds between two attempts.
+        jitter
+            If true, the delay is drawn uniformly between 0 and the exponential backoff.
+        retry_status_codes
+            Status codes of responses that are retried.
+        retry_methods
+            HTTP methods that are retried on transport errors and on retryable status codes.
+        retry_exceptions
+            Exceptions of the session that are considered transient.
+        respect_retry_after
+            If true, the `Retry-After` header of a response determines the delay.
+        max_retry_after
+            If the `Retry-After` header asks for a longer delay, the request is not retried.
+        budget
+            The retry budget that is shared by all requests of the client. None disables it.
+    """
+    max_retries: int = 3
+    backoff_factor: float = 0.5
+    max_backoff: float = 30.0
+    jitter: bool = True
+    retry_status_codes: frozenset[int] = RETRY_STATUS_CODES
+    retry_methods: frozenset[str] = IDEMPOTENT_METHODS
+    retry_exceptions: tuple[type[Exception], ...] = TRANSIENT_ERRORS
+    respect_retry_after: bool = True
+    max_retry_after: float = 120.0
+    budget: RetryBudget | None = field(default_factory=RetryBudget)
+
+    def __post_init__(self):
+        """Value validation after initialization"""
+        if not isinstance(self.max_retries, int) or self.max_retries < 0:
+            raise ValueError('max_retries must be a non-negative int')
+        if self.backoff_factor < 0:
+            raise ValueError('backoff_factor must not be negative')
+        if self.max_backoff < 0:
+            raise ValueError('max_backoff must not be negative')
+
+    def on_request(self):
+        """Must be called once for every request, before the first attempt."""
+        if self.budget:
+            self.budget.deposit()
+
+    def get_retry_delay(
+            self, method: str, attempt: int, response=None,
+            error: Exception | None = None) -> float | None:
+        """
+        Get the delay before the next attempt of a failed request, or None if the request should
+        not be retried.
+
+        Parameters
+        ----------
+            method
+                The HTTP method of the request.
+            attempt
+                The number of retries that were already made for the request.
+            response
+                The response of the last attempt, if there was one.
+            error
+                The transport error of the last attempt, if there was one.
+        """
+        if attempt >= self.max_retries:
+            return None
+
+        if error is not None:
+            retryable = method in self.retry_methods and isinstance(error, self.retry_exceptions)
+            delay = self.backoff(attempt) if retryable else None
+        else:
+            delay = self._get_response_delay(method, attempt, response)
+
+        if delay is None or (self.budget and not self.budget.withdraw()):
+            return None
+        return delay
+
+    def _get_response_delay(self, method: str, attempt: int, response) -> float | None:
+        """Get the delay before retrying a response, or None if it should not be retried."""
+        status_code = response.status_code
+        if status_code not in self.retry_status_codes or \
+                (method not in self.retry_methods and status_code != 429):
+            return None
+        retry_after = self.retry_after(response) if self.respect_retry_after else None
+        if retry_after is None:
+            return self.backoff(attempt)
+        return retry_after if retry_after <= self.max_retry_after else None
+
+    def backoff(self, attempt: int) -> float:
+        delay = min(self.max_backoff, self.backoff_factor * 2 ** attempt)
+        if self.jitter:
+            delay = random.uniform(0, delay)  # nosec
+        return delay
+
+    @staticmethod
+    def retry_after(response) -> float | None:
+        """Parse the `Retry-After` header, given in seconds or as HTTP date, into seconds."""
+        value = response.headers.get('Retry-After')
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
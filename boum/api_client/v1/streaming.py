@@ -0,0 +1,123 @@
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_DECODER = json.JSONDecoder()
+_DELIMITERS = frozenset(' \t\n\r,:]}')
+
+
+def iter_response_chunks(response, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Iterate over the body of a streamed `requests` or `httpx` response in chunks."""
+    if hasattr(response, 'iter_content'):
+        return response.iter_content(chunk_size)
+    return response.iter_bytes(chunk_size)
+
+
+def iter_json_array(chunks: Iterable[bytes], key: str | None = 'data') -> Iterator[Any]:
+    """
+    Decode the items of a JSON array one by one from a stream of byte chunks, so that only the
+    current item is kept in memory.
+
+    Parameters
+    ----------
+        chunks
+            The chunks of the JSON document, e.g. from `iter_response_chunks`.
+        key
+            The key of the array in the top-level object, e.g. 'data' for the API's response
+            envelope. None if the document itself is the array. Nothing is yielded if the key is
+            missing or null.
+
+    Returns
+    -------
+        Iterator[Any]
+            The decoded items.
+    """
+    reader = _ChunkReader(chunks)
+    if key is not None:
+        reader.expect('{')
+        while True:
+            if reader.peek() == '}':
+                return
+            name = reader.read_value()
+            reader.expect(':')
+            if name == key:
+                break
+            reader.read_value()
+            if reader.peek() == ',':
+                reader.advance()
+        if reader.peek() == 'n':
+            reader.read_value()
+            return
+
+    reader.expect('[')
+    if reader.peek() == ']':
+        return
+    while True:
+        yield reader.read_value()
+        char = reader.peek()
+        reader.advance()
+        if char == ']':
+            return
+        if char != ',':
+            raise ValueError(f'Expected "," or "]" in JSON array, got {char!r}')
+
+
+class _ChunkReader:
+    """Buffers the decoded text of a stream of byte chunks for incremental JSON decoding."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._position = 0
+        self._exhausted = False
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer. Returns False at the end of the stream."""
+        while not self._exhausted:
+            try:
+                text = self._decoder.decode(next(self._chunks))
+            except StopIteration:
+                self._exhausted = True
+                text = self._decoder.decode(b'', final=True)
+            if text:
+                self._buffer = self._buffer[self._position:] + text
+                self._position = 0
+                return True
+        return False
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, or '' at the end of the stream."""
+        while True:
+            self._position = _WHITESPACE.match(self._buffer, self._position).end()
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._fill():
+                return ''
+
+    def advance(self):
+        self._position += 1
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f'Expected {char!r} in JSON document, got {found!r}')
+        self.advance()
+
+    def read_value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number that is not followed by a delimiter may continue in the next chunk
+            if (end == len(self._buffer) or self._buffer[end] not in _DELIMITERS) \
+                    and self._fill():
+                continue
+            self._position = end
+            return value
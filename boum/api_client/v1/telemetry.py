@@ -0,0 +1,340 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from dateutil import parser
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:  # pragma: no cover
+    pd = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover
+    pa = None
+
+OUTPUT_FORMATS = ('columns', 'numpy', 'pandas', 'arrow')
+"""The formats in which columnar telemetry can be returned, see `TelemetryColumns.convert`."""
+
+
+def _check_numpy():
+    if np is None:
+        raise ImportError(
+            'Columnar telemetry requires numpy. Install it with `pip install boum[numpy]`.')
+
+
+def check_output_format(as_: str | None):
+    """Raise a ValueError if `as_` is neither None nor one of `OUTPUT_FORMATS`."""
+    if as_ is not None and as_ not in OUTPUT_FORMATS:
+        raise ValueError(f'as_ must be one of {", ".join(OUTPUT_FORMATS)}')
+
+
+@dataclass
+class TelemetryColumns:
+    # noinspection PyUnresolvedReferences
+    """
+        The telemetry of a device as NumPy columns.
+
+        It is parsed from the payload of `/devices/{id}/data` without building Python objects
+        for the samples, which is much faster than `DeviceDataModel.from_payload` for long time
+        ranges.
+
+        Attributes
+        ----------
+            device_id
+                The device id.
+            timestamps
+                The timestamps of the samples in UTC as a `datetime64[ns]` array.
+            values
+                A `float64` array per metric, with NaN for missing or non-numeric values.
+
+        Example
+        -------
+            >>> from boum.api_client.v1.telemetry import TelemetryColumns
+            >>>
+            >>> columns = TelemetryColumns.from_payload({
+            ...     'details': {'deviceId': 'device_id'},
+            ...     'timeSeries': {'soilMoisture': [{'x': '2023-01-02T03:04:05Z', 'y': 0.5}]}})
+            >>> columns.values['soilMoisture']
+            array([0.5])
+        """
+    device_id: str
+    timestamps: Any
+    values: dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        """Value validation after initialization"""
+        _check_numpy()
+        for name, values in self.values.items():
+            if len(values) != len(self.timestamps):
+                raise ValueError(f'The length of {name} does not match the timestamps')
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, rows: slice) -> 'TelemetryColumns':
+        """Select a range of rows. The columns of the result are views, not copies."""
+        if not isinstance(rows, slice):
+            raise TypeError('TelemetryColumns can only be indexed with slices')
+        return TelemetryColumns(
+            self.device_id, self.timestamps[rows],
+            {name: values[rows] for name, values in self.values.items()})
+
+    def convert(self, as_: str) -> Any:
+        """
+        Convert the columns into one of the `OUTPUT_FORMATS`: 'columns' returns the columns
+        themselves, 'numpy' a dict of arrays, 'pandas' a `pandas.DataFrame` and 'arrow' a
+        `pyarrow.Table`.
+        """
+        check_output_format(as_)
+        if as_ == 'numpy':
+            return self.to_numpy()
+        if as_ == 'pandas':
+            return self.to_pandas()
+        if as_ == 'arrow':
+            return self.to_arrow()
+        return self
+
+    def to_numpy(self) -> dict[str, 'np.ndarray']:
+        """
+        Get the columns as a dict of arrays with the same keys as `DeviceDataModel.data`. The
+        arrays are not copied.
+        """
+        device_ids = np.full(len(self), self.device_id, dtype=object)
+        return {**self.values, 'deviceId': device_ids, 'timestamp': self.timestamps}
+
+    def to_pandas(self) -> 'pd.DataFrame':
+        """
+        Get the columns as a DataFrame with the same columns as `DeviceDataModel.data`, without
+        copying the value arrays. The device ids are categorical and the timestamps are in UTC.
+        """
+        if pd is None:
+            raise ImportError(
+                'DataFrames require pandas. Install it with `pip install boum[pandas]`.')
+        columns = {
+            **self.values,
+            'deviceId': pd.Categorical.from_codes(
+                np.zeros(len(self), dtype=np.int8), [self.device_id]),
+            'timestamp': pd.DatetimeIndex(self.timestamps, tz='UTC'),
+        }
+        return pd.DataFrame(columns, copy=False)
+
+    def to_arrow(self) -> 'pa.Table':
+        """
+        Get the columns as an Arrow table with the same columns as `DeviceDataModel.data`. The
+        device ids are dictionary encoded, the timestamps are in UTC and NaN values are null.
+        """
+        if pa is None:
+            raise ImportError(
+                'Arrow tables require pyarrow. Install it with `pip install boum[arrow]`.')
+        columns = {
+            name: pa.array(values, type=pa.float64(), from_pandas=True)
+            for name, values in self.values.items()}
+        columns['deviceId'] = pa.DictionaryArray.from_arrays(
+            pa.array(np.zeros(len(self), dtype=np.int8)), pa.array([self.device_id]))
+        columns['timestamp'] = pa.array(self.timestamps, type=pa.timestamp('ns', tz='UTC'))
+        return pa.table(columns)
+
+    @staticmethod
+    def from_payload(payload: dict[str, Any]) -> 'TelemetryColumns':
+        """
+        Parse the payload of `/devices/{id}/data`. The timestamps are taken from the first time
+        series, like in `DeviceDataModel.from_payload`.
+        """
+        _check_numpy()
+        series = payload['timeSeries']
+        first_series = next(iter(series.values()), [])
+        return TelemetryColumns(
+            payload['details']['deviceId'],
+            parse_timestamps([sample['x'] for sample in first_series]),
+            {name: parse_values([sample['y'] for sample in samples])
+             for name, samples in series.items()})
+
+
+def concat_columns(chunks: list[TelemetryColumns]) -> TelemetryColumns:
+    """
+    Concatenate the telemetry of consecutive time ranges of a device into one array per column,
+    each allocated once. Metrics that are missing from a chunk are NaN in its rows.
+    """
+    _check_numpy()
+    if not chunks:
+        raise ValueError('chunks must not be empty')
+    timestamps = np.concatenate([chunk.timestamps for chunk in chunks])
+    names = list(dict.fromkeys(name for chunk in chunks for name in chunk.values))
+    values = {}
+    for name in names:
+        column = np.empty(len(timestamps), dtype=np.float64)
+        offset = 0
+        for chunk in chunks:
+            column[offset:offset + len(chunk)] = chunk.values.get(name, np.nan)
+            offset += len(chunk)
+        values[name] = column
+    return TelemetryColumns(chunks[0].device_id, timestamps, values)
+
+
+@dataclass
+class FleetTelemetryColumns:
+    # noinspection PyUnresolvedReferences
+    """
+        The telemetry of many devices as one long-form table of NumPy columns, with one row per
+        device and timestamp.
+
+        Attributes
+        ----------
+            device_ids
+                The device ids.
+            codes
+                The index in `device_ids` of the device of every row as an `int32` array.
+            timestamps
+                The timestamps of the samples in UTC as a `datetime64[ns]` array.
+            values
+                A `float64` array per metric, with NaN for missing values and for the rows of
+                devices that don't have the metric.
+
+        Example
+        -------
+            >>> from boum.api_client.v1.telemetry import TelemetryColumns, stack_columns
+            >>>
+            >>> columns = stack_columns([
+            ...     TelemetryColumns.from_payload({
+            ...         'details': {'deviceId': device_id},
+            ...         'timeSeries': {'soilMoisture': [{'x': '2023-01-02T03:04:05Z', 'y': 0.5}]}})
+            ...     for device_id in ('a', 'b')])
+            >>> columns.convert('pandas')['deviceId'].tolist()
+            ['a', 'b']
+        """
+    device_ids: list[str]
+    codes: Any
+    timestamps: Any
+    values: dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        """Value validation after initialization"""
+        _check_numpy()
+        if len(self.codes) != len(self.timestamps):
+            raise ValueError('The length of the codes does not match the timestamps')
+        for name, values in self.values.items():
+            if len(values) != len(self.timestamps):
+                raise ValueError(f'The length of {name} does not match the timestamps')
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def convert(self, as_: str) -> Any:
+        """
+        Convert the columns into one of the `OUTPUT_FORMATS`, like `TelemetryColumns.convert`.
+        """
+        check_output_format(as_)
+        if as_ == 'numpy':
+            return self.to_numpy()
+        if as_ == 'pandas':
+            return self.to_pandas()
+        if as_ == 'arrow':
+            return self.to_arrow()
+        return self
+
+    def to_numpy(self) -> dict[str, 'np.ndarray']:
+        """Get the columns as a dict of arrays. The value arrays are not copied."""
+        device_ids = np.array(self.device_ids, dtype=object)[self.codes]
+        return {**self.values, 'deviceId': device_ids, 'timestamp': self.timestamps}
+
+    def to_pandas(self) -> 'pd.DataFrame':
+        """
+        Get the columns as a DataFrame without copying the value arrays. The device ids are
+        categorical and the timestamps are in UTC.
+        """
+        if pd is None:
+            raise ImportError(
+                'DataFrames require pandas. Install it with `pip install boum[pandas]`.')
+        columns = {
+            **self.values,
+            'deviceId': pd.Categorical.from_codes(self.codes, self.device_ids),
+            'timestamp': pd.DatetimeIndex(self.timestamps, tz='UTC'),
+        }
+        return pd.DataFrame(columns, copy=False)
+
+    def to_arrow(self) -> 'pa.Table':
+        """
+        Get the columns as an Arrow table. The device ids are dictionary encoded, the timestamps
+        are in UTC and NaN values are null.
+        """
+        if pa is None:
+            raise ImportError(
+                'Arrow tables require pyarrow. Install it with `pip install boum[arrow]`.')
+        columns = {
+            name: pa.array(values, type=pa.float64(), from_pandas=True)
+            for name, values in self.values.items()}
+        columns['deviceId'] = pa.DictionaryArray.from_arrays(
+            pa.array(self.codes), pa.array(self.device_ids, type=pa.string()))
+        columns['timestamp'] = pa.array(self.timestamps, type=pa.timestamp('ns', tz='UTC'))
+        return pa.table(columns)
+
+
+def stack_columns(chunks: list[TelemetryColumns]) -> FleetTelemetryColumns:
+    """
+    Stack the telemetry of many devices into one long-form table, in the order of `chunks`. Each
+    column is allocated once and filled device by device. Metrics that a device doesn't have are
+    NaN in its rows.
+    """
+    _check_numpy()
+    lengths = [len(chunk) for chunk in chunks]
+    total = sum(lengths)
+    codes = np.repeat(np.arange(len(chunks), dtype=np.int32), lengths)
+    timestamps = np.empty(total, dtype='datetime64[ns]')
+    names = list(dict.fromkeys(name for chunk in chunks for name in chunk.values))
+    values = {name: np.empty(total, dtype=np.float64) for name in names}
+    offset = 0
+    for chunk, length in zip(chunks, lengths):
+        rows = slice(offset, offset + length)
+        timestamps[rows] = chunk.timestamps
+        for name, column in values.items():
+            column[rows] = chunk.values.get(name, np.nan)
+        offset += length
+    return FleetTelemetryColumns([chunk.device_id for chunk in chunks], codes, timestamps, values)
+
+
+def parse_timestamps(timestamps: list[str]) -> 'np.ndarray':
+    """
+    Convert ISO 8601 timestamps into a `datetime64[ns]` array in UTC.
+
+    The API's `YYYY-MM-DDTHH:MM:SS(.fff)Z` format is parsed by NumPy in one call. Other formats,
+    e.g. with UTC offsets, fall back to parsing every timestamp with dateutil.
+    """
+    _check_numpy()
+    if all(timestamp[-1:] == 'Z' for timestamp in timestamps):
+        try:
+            return np.array([timestamp[:-1] for timestamp in timestamps], dtype='datetime64[ns]')
+        except ValueError:
+            pass
+    return np.array([_to_utc(parser.isoparse(t)) for t in timestamps], dtype='datetime64[ns]')
+
+
+def parse_values(values: list[Any]) -> 'np.ndarray':
+    """
+    Convert values into a `float64` array. Nulls and values that are not numeric become NaN.
+    """
+    _check_numpy()
+    try:
+        # NumPy converts numbers, numeric strings and None (to NaN) in one call
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([_to_float(value) for value in values], dtype=np.float64)
+
+
+def _to_utc(timestamp: datetime) -> datetime:
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
@@ -0,0 +1,156 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+@dataclass
+class StoredTokens:
+    access_token: str
+    refresh_token: str | None = None
+
+
+class TokenStore(ABC):
+    """
+    Baseclass for stores that persist the tokens of api clients, so that multiple clients, e.g.
+    in different worker processes, can share them instead of signing in separately.
+
+    Tokens are stored under a key that identifies the user. While a client holds the lock of a
+    key, no other client, in any process, can hold it. Clients hold the lock while they load
+    the stored tokens and, if these are not usable, obtain and save new ones. This way only one
+    of them signs in or refreshes the access token.
+    """
+
+    @abstractmethod
+    def lock(self, key: str):
+        """Return a context manager that holds an exclusive, cross-process lock on a key."""
+
+    @abstractmethod
+    def load(self, key: str) -> StoredTokens | None:
+        """Load the tokens that are stored under a key, or None if there are none."""
+
+    @abstractmethod
+    def save(self, key: str, tokens: StoredTokens):
+        """Store tokens under a key."""
+
+
+class FileTokenStore(TokenStore):
+    """
+    Token store that keeps the tokens in a JSON file, which is only readable by its owner.
+    Cross-process locking uses `flock` on a separate lock file and is only available on POSIX
+    systems.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        """
+        Parameters
+        ----------
+            path
+                The path of the JSON file. The lock file is created next to it.
+        """
+        if fcntl is None:
+            raise NotImplementedError('FileTokenStore requires a POSIX system')
+
+        self._path = os.fspath(path)
+        self._lock_path = self._path + '.lock'
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:  # pylint: disable=unused-argument
+        # A single lock file for all keys: refreshes are rare, so contention is not an issue
+        with self._thread_lock:
+            fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+    def load(self, key: str) -> StoredTokens | None:
+        entry = self._read().get(key)
+        if entry is None:
+            return None
+        return StoredTokens(entry['accessToken'], entry.get('refreshToken'))
+
+    def save(self, key: str, tokens: StoredTokens):
+        entries = self._read()
+        entries[key] = {'accessToken': tokens.access_token, 'refreshToken': tokens.refresh_token}
+        temporary_path = f'{self._path}.{os.getpid()}.tmp'
+        fd = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            json.dump(entries, file)
+        os.replace(temporary_path, self._path)
+
+    def _read(self) -> dict:
+        try:
+            with open(self._path, encoding='utf-8') as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+
+class SqliteTokenStore(TokenStore):
+    """
+    Token store that keeps the tokens in a SQLite database. Cross-process locking uses an
+    immediate write transaction, so it works wherever SQLite locking works.
+    """
+
+    def __init__(self, path: str | os.PathLike, timeout: float = 30.0):
+        """
+        Parameters
+        ----------
+            path
+                The path of the database file. It is created if it doesn't exist.
+            timeout
+                Seconds to wait for the lock of another client before giving up.
+        """
+        self._path = os.fspath(path)
+        self._timeout = timeout
+        self._local = threading.local()
+        with closing(self._connect()) as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS tokens ('
+                'key TEXT PRIMARY KEY, access_token TEXT NOT NULL, refresh_token TEXT, '
+                'updated_at REAL NOT NULL)')
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self._path, timeout=self._timeout, isolation_level=None)
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite connections can't be shared between threads
+        if getattr(self._local, 'connection', None) is None:
+            self._local.connection = self._connect()
+        return self._local.connection
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:  # pylint: disable=unused-argument
+        # The write transaction locks the whole database
+        self._connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self._connection.execute('ROLLBACK')
+            raise
+        self._connection.execute('COMMIT')
+
+    def load(self, key: str) -> StoredTokens | None:
+        row = self._connection.execute(
+            'SELECT access_token, refresh_token FROM tokens WHERE key = ?', (key,)).fetchone()
+        return StoredTokens(*row) if row else None
+
+    def save(self, key: str, tokens: StoredTokens):
+        self._connection.execute(
+            'INSERT OR REPLACE INTO tokens (key, access_token, refresh_token, updated_at) '
+            'VALUES (?, ?, ?, ?)', (key, tokens.access_token, tokens.refresh_token, time.time()))
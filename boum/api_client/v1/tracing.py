@@ -0,0 +1,159 @@
+import contextvars
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Any, ContextManager, Iterator
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover
+    otel_trace = None
+
+
+class Span(ABC):
+    """A span that is open while a traced operation runs."""
+
+    @abstractmethod
+    def set_attribute(self, key: str, value: Any):
+        """Add an attribute to the span."""
+
+
+class Tracer(ABC):
+    """
+    Baseclass for the tracers that receive the spans of an api client.
+
+    The client opens the following spans, nested in the span that is current when it is called:
+    - `boum.request` around a request to an endpoint, including its retries,
+      - `boum.retry` around the wait before a retry,
+      - `boum.json_decode` around decoding the body of a response,
+      - `boum.auth_refresh` around obtaining a new access token, which contains its own request,
+    - `boum.model_parse` and `boum.model_serialize` around converting payloads from and to models.
+    """
+
+    @abstractmethod
+    def start_span(self, name: str, attributes: dict[str, Any] = None) -> ContextManager[Span]:
+        """
+        Return a context manager that opens a span, makes it the current span and closes it on
+        exit. If the traced operation raises an exception, the span should record it.
+        """
+
+
+class NoopSpan(Span):
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+def start_span(
+        tracer: Tracer | None, name: str,
+        attributes: dict[str, Any] = None) -> ContextManager[Span]:
+    """Open a span with a tracer, or a no-op span if the tracer is None."""
+    if tracer is None:
+        return nullcontext(NOOP_SPAN)
+    return tracer.start_span(name, attributes)
+
+
+@dataclass
+class RecordedSpan(Span):
+    """
+    A span of the `RecordingTracer`.
+
+    Attributes
+    ----------
+        name
+            The name of the span.
+        attributes
+            The attributes of the span.
+        parent
+            The span that was current when this span was started, if it was recorded as well.
+        start
+            The perf counter time at which the span was started.
+        end
+            The perf counter time at which the span was closed, or None if it is still open.
+        error
+            The exception that was raised in the span, if any.
+    """
+    name: str
+    attributes: dict[str, Any] = field(default_factory=dict)
+    parent: 'RecordedSpan | None' = field(default=None, repr=False)
+    start: float = 0.0
+    end: float | None = None
+    error: BaseException | None = None
+
+    @property
+    def duration(self) -> float | None:
+        """The duration of the span in seconds, or None if it is still open."""
+        return None if self.end is None else self.end - self.start
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+
+class RecordingTracer(Tracer):
+    # noinspection PyUnresolvedReferences
+    """
+        Tracer that keeps the finished spans in memory, e.g. to find out where the time of a slow
+        call is spent without a tracing backend. The current span is tracked per thread and per
+        asyncio task.
+
+        Example
+        -------
+            >>> from boum.api_client.v1.client import ApiClient, ClientConfig
+            >>> from boum.api_client.v1.tracing import RecordingTracer
+            >>>
+            >>> tracer = RecordingTracer()
+            >>> client = ApiClient(
+            ...     email, password, base_url=base_url, config=ClientConfig(tracer=tracer))
+            >>> with client:
+            ...     device_ids = client.root.devices.get()
+            >>> durations = {span.name: span.duration for span in tracer.spans}
+        """
+
+    def __init__(self):
+        self.spans: list[RecordedSpan] = []
+        self._current: contextvars.ContextVar[RecordedSpan | None] = \
+            contextvars.ContextVar(f'boum_recording_tracer_{id(self)}', default=None)
+
+    @contextmanager
+    def start_span(self, name: str, attributes: dict[str, Any] = None) -> Iterator[RecordedSpan]:
+        span = RecordedSpan(
+            name, dict(attributes or {}), self._current.get(), time.perf_counter())
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as error:
+            span.error = error
+            raise
+        finally:
+            span.end = time.perf_counter()
+            self._current.reset(token)
+            # list.append is atomic, so concurrent spans are recorded safely
+            self.spans.append(span)
+
+    def clear(self):
+        self.spans.clear()
+
+
+class OpenTelemetryTracer(Tracer):
+    """Tracer that forwards the spans to OpenTelemetry. It requires `opentelemetry-api`."""
+
+    def __init__(self, tracer=None):
+        """
+        Parameters
+        ----------
+            tracer
+                The OpenTelemetry tracer. Defaults to the tracer of the global tracer provider.
+        """
+        if otel_trace is None:
+            raise ImportError(
+                'OpenTelemetryTracer requires opentelemetry. Install it with '
+                '`pip install opentelemetry-api`.')
+
+        self._tracer = tracer if tracer is not None else otel_trace.get_tracer('boum')
+
+    def start_span(self, name: str, attributes: dict[str, Any] = None) -> ContextManager[Span]:
+        # OpenTelemetry spans implement `set_attribute` and record exceptions on exit
+        return self._tracer.start_as_current_span(name, attributes=attributes)
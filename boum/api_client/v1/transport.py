@@ -0,0 +1,334 @@
+import socket
+import threading
+from dataclasses import dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+try:
+    import h2
+except ImportError:  # pragma: no cover
+    h2 = None
+
+TRANSIENT_ERRORS: tuple[type[Exception], ...] = (requests.ConnectionError, requests.Timeout)
+"""Transport errors that indicate a transient failure, e.g. a connection reset or timeout."""
+if httpx is not None:
+    TRANSIENT_ERRORS += (httpx.TransportError,)
+
+
+@dataclass
+class ConnectionPoolConfig:
+    """
+    Connection pool and socket settings for the transport that an api client owns.
+
+    Attributes
+    ----------
+        pool_connections
+            The number of hosts for which a connection pool is kept.
+        pool_maxsize
+            The maximum number of connections that are kept open per host. It should be at least
+            as large as the number of concurrent requests, otherwise connections are discarded
+            and reopened under load.
+        pool_block
+            If true, requests wait for a free connection instead of opening additional ones that
+            are discarded afterwards.
+        max_connections
+            The maximum number of connections across all hosts of the async transport. Defaults
+            to `pool_connections * pool_maxsize`.
+        keep_alive
+            If false, connections are closed after every request.
+        keep_alive_expiry
+            Seconds after which idle connections of the async transport are closed.
+        tcp_nodelay
+            Disable Nagle's algorithm on the sockets.
+        tcp_keepalive
+            Enable TCP keep-alive probes on the sockets.
+        http2
+            Multiplex the requests over a single HTTP/2 connection per host instead of opening
+            one HTTP/1.1 connection per concurrent request. The client then uses an httpx based
+            session. HTTP/2 is negotiated during the TLS handshake, so it only applies to https
+            URLs. Requires `pip install boum[http2]`.
+        timeout
+            Seconds to wait for a connection and for data of a response. None waits indefinitely,
+            which is the default of requests. The default of httpx, 5 seconds, is replaced as
+            well, so the timeout doesn't depend on the session.
+    """
+    pool_connections: int = 10
+    pool_maxsize: int = 32
+    pool_block: bool = False
+    max_connections: int | None = None
+    keep_alive: bool = True
+    keep_alive_expiry: float = 5.0
+    tcp_nodelay: bool = True
+    tcp_keepalive: bool = False
+    http2: bool = False
+    timeout: float | None = None
+
+    def __post_init__(self):
+        """Value validation after initialization"""
+        if not isinstance(self.pool_connections, int) or self.pool_connections <= 0:
+            raise ValueError('pool_connections must be a positive int')
+        if not isinstance(self.pool_maxsize, int) or self.pool_maxsize <= 0:
+            raise ValueError('pool_maxsize must be a positive int')
+        if self.max_connections is not None and \
+                (not isinstance(self.max_connections, int) or self.max_connections <= 0):
+            raise ValueError('max_connections must be a positive int or None')
+        if self.timeout is not None and self.timeout <= 0:
+            raise ValueError('timeout must be positive or None')
+
+    @property
+    def socket_options(self) -> list[tuple[int, int, int]]:
+        options = []
+        if self.tcp_nodelay:
+            options.append((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1))
+        if self.tcp_keepalive:
+            options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        return options
+
+
+def raise_for_status(response):
+    """
+    Raise a `requests.HTTPError` if the response has an error status code. The status errors of
+    httpx responses are translated, so that the errors don't depend on the session.
+    """
+    if httpx is None or not isinstance(response, httpx.Response):
+        response.raise_for_status()
+        return
+    try:
+        response.raise_for_status()
+    except httpx.HTTPStatusError as error:
+        raise requests.HTTPError(str(error), response=response) from error
+
+
+class PoolHTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter that additionally applies socket options to the pooled connections, and a
+    timeout to requests without one.
+    """
+
+    def __init__(
+            self, socket_options: list[tuple[int, int, int]], timeout: float | None = None,
+            **kwargs):
+        self._socket_options = socket_options
+        self._timeout = timeout
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = self._socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        return super().send(
+            request, stream=stream, timeout=self._timeout if timeout is None else timeout,
+            verify=verify, cert=cert, proxies=proxies)
+
+
+def create_session(
+        pool_config: ConnectionPoolConfig = None) -> 'requests.Session | HttpxSession':
+    """
+    Create a new `requests.Session` with a connection pool that is configured according to the
+    given config, or an `HttpxSession` if the config enables HTTP/2.
+    """
+    pool_config = pool_config if pool_config is not None else ConnectionPoolConfig()
+    if pool_config.http2:
+        return HttpxSession(pool_config)
+
+    session = requests.Session()
+    adapter = PoolHTTPAdapter(
+        socket_options=pool_config.socket_options,
+        timeout=pool_config.timeout,
+        pool_connections=pool_config.pool_connections,
+        pool_maxsize=pool_config.pool_maxsize,
+        pool_block=pool_config.pool_block)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not pool_config.keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+def _check_httpx(pool_config: ConnectionPoolConfig):
+    if httpx is None:
+        raise ImportError(
+            'httpx sessions require httpx. Install it with `pip install boum[async]`.')
+    if pool_config.http2 and h2 is None:
+        raise ImportError('HTTP/2 requires h2. Install it with `pip install boum[http2]`.')
+
+
+def _create_httpx_transport(
+        transport_class: type, pool_config: ConnectionPoolConfig) -> 'httpx.BaseTransport':
+    """Create an httpx transport whose connection pool is configured according to the config."""
+    limits = httpx.Limits(
+        max_connections=pool_config.max_connections or
+        pool_config.pool_connections * pool_config.pool_maxsize,
+        max_keepalive_connections=pool_config.pool_maxsize if pool_config.keep_alive else 0,
+        keepalive_expiry=pool_config.keep_alive_expiry)
+    return transport_class(
+        limits=limits, socket_options=pool_config.socket_options, http2=pool_config.http2)
+
+
+class HttpxSession:
+    # noinspection PyUnresolvedReferences
+    """
+        Blocking session based on `httpx.Client`, which supports HTTP/2.
+
+        It exposes the same request methods as `requests.Session` (get, post, put, patch, delete),
+        so it can be used as the session of an endpoint tree. With HTTP/2, concurrent requests
+        from multiple threads are multiplexed over one connection per host. The underlying httpx
+        client is created lazily and recreated after the session was closed, which allows
+        reconnecting the same api client.
+
+        Example
+        -------
+            >>> from boum.api_client.v1.client import ApiClient
+            >>> from boum.api_client.v1.transport import ConnectionPoolConfig
+            >>>
+            >>> pool_config = ConnectionPoolConfig(http2=True)
+            >>> client = ApiClient(email, password, base_url=base_url, pool_config=pool_config)
+        """
+
+    def __init__(self, pool_config: ConnectionPoolConfig = None, **client_options):
+        """
+        Parameters
+        ----------
+            pool_config
+                The connection pool, socket, HTTP/2 and timeout settings. The pool settings are
+                ignored if a `transport` is passed in the client options, and the timeout if a
+                `timeout` is passed.
+            client_options
+                Keyword arguments that are passed to `httpx.Client`.
+        """
+        self._pool_config = pool_config if pool_config is not None else ConnectionPoolConfig()
+        _check_httpx(self._pool_config)
+
+        self.headers: dict[str, str] = {}
+        self._client_options = client_options
+        self._client: 'httpx.Client | None' = None
+        self._client_lock = threading.Lock()
+
+    def _create_client(self) -> 'httpx.Client':
+        client_options = dict(self._client_options)
+        client_options.setdefault('timeout', self._pool_config.timeout)
+        if 'transport' not in client_options:
+            client_options['transport'] = _create_httpx_transport(
+                httpx.HTTPTransport, self._pool_config)
+        return httpx.Client(**client_options)
+
+    def request(
+            self, method: str, url: str, json: dict = None, params: dict = None,
+            headers: dict = None, stream: bool = False) -> 'httpx.Response':
+        """Send a request. With `stream`, the body is not read and the response must be closed."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._create_client()
+        request = self._client.build_request(
+            method, url, json=json, params=params,
+            headers={**self.headers, **headers} if headers else self.headers)
+        return self._client.send(request, stream=stream)
+
+    def get(
+            self, url: str, json: dict = None, params: dict = None, headers: dict = None,
+            stream: bool = False) -> 'httpx.Response':
+        return self.request('GET', url, json=json, params=params, headers=headers, stream=stream)
+
+    def post(self, url: str, json: dict = None, params: dict = None) -> 'httpx.Response':
+        return self.request('POST', url, json=json, params=params)
+
+    def put(self, url: str, json: dict = None, params: dict = None) -> 'httpx.Response':
+        return self.request('PUT', url, json=json, params=params)
+
+    def patch(self, url: str, json: dict = None, params: dict = None) -> 'httpx.Response':
+        return self.request('PATCH', url, json=json, params=params)
+
+    def delete(self, url: str, json: dict = None, params: dict = None) -> 'httpx.Response':
+        return self.request('DELETE', url, json=json, params=params)
+
+    def close(self):
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+class AsyncHttpxSession:
+    # noinspection PyUnresolvedReferences
+    """
+        Non-blocking session for the async api client, based on `httpx.AsyncClient`. It supports
+        HTTP/2, see `ConnectionPoolConfig.http2`.
+
+        It exposes the same request methods as `requests.Session` (get, post, put, patch, delete)
+        as coroutine functions, so it can be used as the session of an endpoint tree. The
+        underlying httpx client is created lazily and recreated after the session was closed,
+        which allows reconnecting the same api client.
+
+        Example
+        -------
+            >>> from boum.api_client.v1.async_client import AsyncApiClient
+            >>> from boum.api_client.v1.transport import AsyncHttpxSession
+            >>>
+            >>> session = AsyncHttpxSession(timeout=30)
+            >>> client = AsyncApiClient(email, password, base_url=base_url, session=session)
+        """
+
+    def __init__(self, pool_config: ConnectionPoolConfig = None, **client_options):
+        """
+        Parameters
+        ----------
+            pool_config
+                The connection pool, socket, HTTP/2 and timeout settings. The pool settings are
+                ignored if a `transport` is passed in the client options, and the timeout if a
+                `timeout` is passed.
+            client_options
+                Keyword arguments that are passed to `httpx.AsyncClient`.
+        """
+        self._pool_config = pool_config if pool_config is not None else ConnectionPoolConfig()
+        _check_httpx(self._pool_config)
+
+        self.headers: dict[str, str] = {}
+        self._client_options = client_options
+        self._client: 'httpx.AsyncClient | None' = None
+
+    def _create_client(self) -> 'httpx.AsyncClient':
+        client_options = dict(self._client_options)
+        client_options.setdefault('timeout', self._pool_config.timeout)
+        if 'transport' not in client_options:
+            client_options['transport'] = _create_httpx_transport(
+                httpx.AsyncHTTPTransport, self._pool_config)
+        return httpx.AsyncClient(**client_options)
+
+    async def request(
+            self, method: str, url: str, json: dict = None, params: dict = None,
+            headers: dict = None) -> 'httpx.Response':
+        if self._client is None:
+            self._client = self._create_client()
+        return await self._client.request(
+            method, url, json=json, params=params,
+            headers={**self.headers, **headers} if headers else self.headers)
+
+    async def get(
+            self, url: str, json: dict = None, params: dict = None,
+            headers: dict = None) -> 'httpx.Response':
+        return await self.request('GET', url, json=json, params=params, headers=headers)
+
+    async def post(self, url: str, json: dict = None, params: dict = None) -> 'httpx.Response':
+        return await self.request('POST', url, json=json, params=params)
+
+    async def put(self, url: str, json: dict = None, params: dict = None) -> 'httpx.Response':
+        return await self.request('PUT', url, json=json, params=params)
+
+    async def patch(self, url: str, json: dict = None, params: dict = None) -> 'httpx.Response':
+        return await self.request('PATCH', url, json=json, params=params)
+
+    async def delete(self, url: str, json: dict = None, params: dict = None) -> 'httpx.Response':
+        return await self.request('DELETE', url, json=json, params=params)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Iterable
+
+from boum.api_client.v1.async_client import AsyncApiClient
+from boum.api_client.v1.log_shipper import AsyncDeviceLogShipper
+from boum.api_client.v1.models import DeviceStateModel, DeviceModel, DeviceFlagsModel, \
+    DeviceLogModel
+from boum.resources.device import Device
+
+
+class AsyncDevice:
+    # noinspection PyUnresolvedReferences
+    """
+        Async counterpart of `Device` that works with an `AsyncApiClient`.
+
+        It provides the same methods as `Device`, but they are coroutines, so the interactions with
+        many devices can run concurrently.
+
+        Example
+        -------
+        >>> import asyncio
+        >>> from boum.api_client.v1.async_client import AsyncApiClient
+        >>> from boum.resources.async_device import AsyncDevice
+        >>>
+        >>> async def main():
+        ...    async with AsyncApiClient(email, password, base_url=base_url) as client:
+        ...        device_ids = await AsyncDevice.get_device_ids(client)
+        ...        devices = [AsyncDevice(device_id, client) for device_id in device_ids]
+        ...        # Get the reported and desired states of all devices concurrently
+        ...        return await asyncio.gather(*(d.get_device_states() for d in devices))
+        >>>
+        >>> states = asyncio.run(main())
+        """
+
+    def __init__(self, device_id: str, api_client: AsyncApiClient):
+        """
+        Parameters
+        ----------
+            device_id
+                The device id
+            api_client
+                The async api client that handles the interaction with the api
+        """
+        self.device_id = device_id
+        self._api_client = api_client
+
+    @staticmethod
+    async def get_device_ids(api_client: AsyncApiClient) -> list[str]:
+        """Get all device ids"""
+        return await api_client.root.devices.get()
+
+    @staticmethod
+    async def get_claimed_device_ids(api_client: AsyncApiClient) -> list[str]:
+        """Get all claimed device ids"""
+        return await api_client.root.devices.claimed.get()
+
+    @staticmethod
+    async def get_many(
+            api_client: AsyncApiClient, device_ids: Iterable[str], max_concurrency: int = 16,
+            raise_on_error: bool = False) -> dict[str, DeviceModel]:
+        """Get many devices concurrently. See `Device.get_many`."""
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1')
+        device_ids = list(dict.fromkeys(device_ids))
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def get(device_id: str) -> DeviceModel:
+            async with semaphore:
+                return await api_client.root.devices(device_id).get()
+
+        results = await asyncio.gather(*(get(i) for i in device_ids), return_exceptions=True)
+        devices = {}
+        for device_id, result in zip(device_ids, results):
+            if not isinstance(result, Exception):
+                devices[device_id] = result
+            elif raise_on_error:
+                raise result
+            else:
+                logging.warning('Failed to get device %s: %r', device_id, result)
+        return devices
+
+    @staticmethod
+    async def get_device_details(api_client: AsyncApiClient,
+                                 only_claimed: bool = False,
+                                 only_tested: bool = False,
+                                 sku_contains: str = '',
+                                 created_after: datetime = None) -> list[dict]:
+        """Filter devices and get their details. See `Device.get_device_details`."""
+        all_devices = await api_client.root.devices.get(include_details=True)
+        claimed_devices = await api_client.root.devices.claimed.get(include_details=True)
+        # pylint: disable=protected-access
+        return Device._filter_device_details(
+            all_devices, claimed_devices, only_claimed, only_tested, sku_contains, created_after)
+
+    async def set_desired_device_state(self, desired_device_state: DeviceStateModel):
+        """Set the desired device state."""
+        device_model = DeviceModel(desired_state=desired_device_state)
+        await self._api_client.root.devices(self.device_id).patch(device_model)
+
+    async def set_device_flags(self, flags: DeviceFlagsModel):
+        """Set the device flags."""
+        device_model = DeviceModel(flags=flags)
+        await self._api_client.root.devices(self.device_id).patch(device_model)
+
+    async def get_device_states(self) -> (DeviceStateModel, DeviceStateModel):
+        """Get the reported and desired device state."""
+        device_model = await self._api_client.root.devices(self.device_id).get()
+        return device_model.reported_state, device_model.desired_state
+
+    async def get_device(self) -> DeviceModel:
+        """Get the device."""
+        return await self._api_client.root.devices(self.device_id).get()
+
+    async def get_device_flags(self) -> DeviceFlagsModel:
+        """Get the device flags."""
+        device_model = await self._api_client.root.devices(self.device_id).get()
+        return device_model.flags
+
+    async def send_device_command(self, command: str):
+        """Send a command to the device."""
+        desired_device_state = DeviceStateModel(device_commands=[command])
+        device_model = DeviceModel(desired_state=desired_device_state)
+        await self._api_client.root.devices(self.device_id).patch(device_model)
+
+    async def send_device_log(self,
+                              message: str,
+                              type: str = 'default',  # pylint: disable=redefined-builtin
+                              level: str = 'info',
+                              payload: dict = None,
+                              firmware_version: str = None,
+                              shipper: AsyncDeviceLogShipper = None):
+        """Send a device log, or queue it in a log shipper. See `Device.send_device_log`."""
+        device_log = DeviceLogModel(
+            message=message,
+            type=type,
+            level=level,
+            payload=payload if payload is not None else {},
+            device_id=self.device_id,
+            firmware_version=firmware_version
+        )
+        if shipper is not None:
+            await shipper.submit(device_log)
+        else:
+            await self._api_client.root.devices(self.device_id).log.post(device_log)
+
+    async def get_telemetry_data(
+            self, start: datetime = None, end: datetime = None,
+            interval: timedelta = None, as_: str = None) -> dict[str, list] | Any:
+        """Get telemetry data for a device. See `Device.get_telemetry_data`."""
+        result = await self._api_client.root.devices(self.device_id).data.get(
+            start, end, interval, as_=as_)
+        return result if as_ is not None else result.data
+
+    async def claim(self, user_id: str = None):
+        """Claim a device for the currently signed in use or a specified one."""
+        if user_id:
+            await self._api_client.root.devices(self.device_id).claim(user_id).put()
+        else:
+            await self._api_client.root.devices(self.device_id).claim.put()
+
+    async def unclaim(self):
+        """Remove any claim to the device."""
+        await self._api_client.root.devices(self.device_id).claim.delete()
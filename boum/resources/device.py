@@ -1,7 +1,11 @@
+import logging
 from datetime import datetime, timedelta
+from typing import Any, Iterable, Iterator
 
 from boum.api_client.v1.client import ApiClient
+from boum.api_client.v1.log_shipper import DeviceLogShipper
 from boum.api_client.v1.models import DeviceStateModel, DeviceModel, DeviceFlagsModel, DeviceLogModel
+from boum.resources.inventory import FleetInventory
 
 
 class Device:
@@ -93,6 +97,80 @@ class Device:
         """
         return api_client.root.devices.claimed.get()
     
+    @staticmethod
+    def iter_devices(api_client: ApiClient, include_details: bool = False) -> Iterator[str | dict]:
+        """Iterate over all devices without loading the whole listing into memory
+
+        Parameters
+        ----------
+            api_client
+                The api client that handles the interaction with the api
+            include_details
+                If true, the details of the devices are yielded instead of their ids
+
+        Returns
+        -------
+            Iterator[str | dict]
+                The device ids or details
+        """
+        return api_client.root.devices.iter(include_details=include_details)
+
+    @staticmethod
+    def iter_claimed(api_client: ApiClient, include_details: bool = False) -> Iterator[str | dict]:
+        """Iterate over all claimed devices without loading the whole listing into memory
+
+        Parameters
+        ----------
+            api_client
+                The api client that handles the interaction with the api
+            include_details
+                If true, the details of the claims are yielded instead of the device ids
+
+        Returns
+        -------
+            Iterator[str | dict]
+                The device ids or claim details
+        """
+        return api_client.root.devices.claimed.iter(include_details=include_details)
+
+    @staticmethod
+    def get_many(
+            api_client: ApiClient, device_ids: Iterable[str], max_workers: int = 16,
+            raise_on_error: bool = False) -> dict[str, DeviceModel]:
+        """Get many devices concurrently
+
+        Parameters
+        ----------
+            api_client
+                The api client that handles the interaction with the api
+            device_ids
+                The ids of the devices
+            max_workers
+                The maximum number of concurrent requests
+            raise_on_error
+                If true, the error of the first failed device in `device_ids` is raised after all
+                requests are done. Otherwise devices that could not be fetched are logged and left
+                out of the result. Use `Fleet.get_devices` to get the error of every device.
+
+        Returns
+        -------
+            the devices by device id, in the order of `device_ids`
+        """
+        # pylint: disable=import-outside-toplevel
+        from boum.resources.fleet import Fleet
+
+        fleet = Fleet(device_ids, api_client, max_workers=max_workers)
+        report = fleet.get_devices()
+        # The failures are reported in completion order, so use the requested order instead
+        failed = [device_id for device_id in fleet.device_ids if device_id in report.failed]
+        if raise_on_error and failed:
+            raise report.failed[failed[0]]
+        for device_id in failed:
+            logging.warning('Failed to get device %s: %r', device_id, report.failed[device_id])
+        devices = report.values
+        return {device_id: devices[device_id] for device_id in fleet.device_ids
+                if device_id in devices}
+
     @staticmethod
     def get_device_details(api_client: ApiClient, 
                            only_claimed: bool = False, 
@@ -101,10 +179,20 @@ class Device:
                            created_after: datetime = None) -> list[dict]:
         """Filter devices and get their details
 
+        The filters are combined, so only devices that match all of them are returned.
+
         Parameters
         ----------
             api_client
                 The api client that handles the interaction with the api
+            only_claimed
+                Only return claimed devices, with their owner id and claim time
+            only_tested
+                Leave out devices that are flagged as not tested
+            sku_contains
+                Only return devices whose SKU contains this string
+            created_after
+                Only return devices that were created at or after this time
 
         Returns
         -------
@@ -113,25 +201,18 @@ class Device:
         """
         all_devices = api_client.root.devices.get(include_details=True)
         claimed_devices = api_client.root.devices.claimed.get(include_details=True)
-        claimed_devices = {device['id']: device for device in claimed_devices}
-        device_details_list = []
-        for device in all_devices:
-            add_device = True
-            if only_claimed and device['id'] not in list(claimed_devices.keys()):
-                add_device = False
-            elif sku_contains and sku_contains not in device['sku']:
-                add_device = False
-            elif only_tested and 'hasBeenTested' in device:
-                if not device['hasBeenTested']:
-                    add_device = False
-            elif created_after and datetime.fromtimestamp(device['createdAt']['_seconds']) < created_after:
-                add_device = False
-            if add_device:
-                if only_claimed:
-                    device['claimedAt'] = datetime.fromtimestamp(claimed_devices[device['id']]['createdAt']['_seconds'])
-                    device['ownerId'] = claimed_devices[device['id']]['ownerId']
-                device_details_list.append(device)
-        return device_details_list
+        return Device._filter_device_details(
+            all_devices, claimed_devices, only_claimed, only_tested, sku_contains, created_after)
+
+    @staticmethod
+    def _filter_device_details(
+            all_devices: list[dict], claimed_devices: list[dict], only_claimed: bool,
+            only_tested: bool, sku_contains: str, created_after: datetime | None) -> list[dict]:
+        inventory = FleetInventory(all_devices, claimed_devices)
+        device_ids = inventory.filter(
+            claimed=only_claimed or None, tested=only_tested or None,
+            sku_contains=sku_contains or None, created_after=created_after)
+        return inventory.details(device_ids, include_claims=only_claimed)
     
     def set_desired_device_state(self, desired_device_state: DeviceStateModel):
         """
@@ -208,7 +289,8 @@ class Device:
                         type: str = 'default', 
                         level: str = 'info', 
                         payload: dict = {}, 
-                        firmware_version: str = None):
+                        firmware_version: str = None,
+                        shipper: DeviceLogShipper = None):
         """
         Send a device log.
 
@@ -224,6 +306,9 @@ class Device:
                 The log payload
             firmware_version
                 The firmware version
+            shipper
+                If set, the log is queued in the shipper and sent in the background, instead of
+                being sent before this method returns. See `ApiClient.create_log_shipper`.
         """
         device_log = DeviceLogModel(
             message=message, 
@@ -233,11 +318,14 @@ class Device:
             device_id=self.device_id,
             firmware_version=firmware_version
         )
-        self._api_client.root.devices(self.device_id).log.post(device_log)
+        if shipper is not None:
+            shipper.submit(device_log)
+        else:
+            self._api_client.root.devices(self.device_id).log.post(device_log)
 
     def get_telemetry_data(
             self, start: datetime = None, end: datetime = None,
-            interval: timedelta = None) -> dict[str, list]:
+            interval: timedelta = None, as_: str = None) -> dict[str, list] | Any:
         """
         Get telemetry data for a device
 
@@ -249,15 +337,20 @@ class Device:
                 The end date of the telemetry data
             interval
                 the interpolation interavl for the telemetry data
+            as_
+                If set, the telemetry is parsed straight into columns and returned as 'numpy'
+                (a dict of arrays), 'pandas' (a DataFrame), 'arrow' (a pyarrow Table) or 'columns'
+                (a `TelemetryColumns`), see `TelemetryColumns.convert`
 
         Returns
         -------
-            dict[str, list]
-                The telemetry data in a format that can be easily converted to a pandas dataframe.
+            dict[str, list] | Any
+                The telemetry data in a format that can be easily converted to a pandas dataframe,
+                or in the format of `as_`.
         """
-        device_data_model = self._api_client.root.devices(self.device_id).data.get(
-            start, end, interval)
-        return device_data_model.data
+        result = self._api_client.root.devices(self.device_id).data.get(
+            start, end, interval, as_=as_)
+        return result if as_ is not None else result.data
 
     def claim(self, user_id: str = None):
         """
@@ -0,0 +1,222 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Iterable
+
+from boum.api_client.v1.client import ApiClient
+from boum.api_client.v1.models import DeviceStateModel, DeviceFlagsModel
+from boum.resources.device import Device
+
+
+@dataclass
+class DeviceResult:
+    """
+    The outcome of an operation on a single device.
+
+    Attributes
+    ----------
+        device_id
+            The device id.
+        result
+            The return value of the operation, if it succeeded.
+        error
+            The exception that the operation raised, if it failed.
+    """
+    device_id: str
+    result: Any = None
+    error: Exception | None = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class FleetReport:
+    """
+    The outcome of an operation on a fleet of devices.
+
+    Attributes
+    ----------
+        results
+            The results of the devices on which the operation was executed, by device id.
+        cancelled
+            The ids of the devices on which the operation was not executed, because the fleet
+            operation was cancelled.
+    """
+    results: dict[str, DeviceResult] = field(default_factory=dict)
+    cancelled: list[str] = field(default_factory=list)
+
+    @property
+    def values(self) -> dict[str, Any]:
+        """The results of the devices on which the operation succeeded, by device id."""
+        return {device_id: result.result for device_id, result in self.results.items()
+                if result.succeeded}
+
+    @property
+    def succeeded(self) -> list[str]:
+        return [device_id for device_id, result in self.results.items() if result.succeeded]
+
+    @property
+    def failed(self) -> dict[str, Exception]:
+        return {device_id: result.error for device_id, result in self.results.items()
+                if not result.succeeded}
+
+    @property
+    def all_succeeded(self) -> bool:
+        """True if the operation succeeded on all devices and was not cancelled."""
+        return not self.cancelled and all(
+            result.succeeded for result in self.results.values())
+
+
+class Fleet:
+    # noinspection PyUnresolvedReferences
+    """
+        Runs the same operation on many devices concurrently.
+
+        The operations are executed on a thread pool with at most `max_workers` concurrent
+        requests. Errors of single devices don't stop the others, they are collected in the
+        returned `FleetReport`. A running operation can be cancelled from another thread or from
+        the progress callback, in which case the devices that were not started yet are reported
+        as cancelled. The rate limiter, retry policy and circuit breaker of the client apply to
+        every request.
+
+        Example
+        -------
+            >>> from datetime import time
+            >>> from boum.api_client.v1.client import ApiClient
+            >>> from boum.api_client.v1.models import DeviceStateModel
+            >>> from boum.resources.fleet import Fleet
+            >>>
+            >>> client = ApiClient(email, password, base_url=base_url)
+            >>> with client:
+            ...     fleet = Fleet([device_id], client, max_workers=16)
+            ...     report = fleet.set_desired_device_state(
+            ...         DeviceStateModel(refill_time=time(3, 30)),
+            ...         progress=lambda done, total, result: None)
+            >>> failed_device_ids = list(report.failed)
+        """
+
+    def __init__(self, device_ids: Iterable[str], api_client: ApiClient, max_workers: int = 16):
+        """
+        Parameters
+        ----------
+            device_ids
+                The ids of the devices of the fleet. Duplicates are removed.
+            api_client
+                The api client that handles the interaction with the api. It should have a
+                connection pool with at least `max_workers` connections.
+            max_workers
+                The maximum number of devices that are processed concurrently.
+        """
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+
+        self.device_ids = list(dict.fromkeys(device_ids))
+        self._api_client = api_client
+        self._max_workers = max_workers
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Stop the running operation. Requests that were already sent are completed."""
+        self._cancelled.set()
+
+    def run(
+            self, operation: Callable[[Device], Any],
+            progress: Callable[[int, int, DeviceResult], None] = None) -> FleetReport:
+        """
+        Run an operation on all devices of the fleet.
+
+        Parameters
+        ----------
+            operation
+                Called with the `Device` of every device id. Its return value is the result of the
+                device.
+            progress
+                Called in the calling thread after each device with the number of processed
+                devices, the total number of devices and the result of the device. If it raises,
+                the devices that were not started yet are skipped and the error is re-raised.
+
+        Returns
+        -------
+            FleetReport
+                The results of all devices.
+        """
+        self._cancelled.clear()
+        report = FleetReport()
+        total = len(self.device_ids)
+
+        def execute(device_id: str) -> DeviceResult | None:
+            if self._cancelled.is_set():
+                return None
+            try:
+                return DeviceResult(device_id, operation(Device(device_id, self._api_client)))
+            except Exception as error:  # pylint: disable=broad-except
+                return DeviceResult(device_id, error=error)
+
+        with ThreadPoolExecutor(self._max_workers, thread_name_prefix='boum-fleet') as executor:
+            futures = {executor.submit(execute, device_id): device_id
+                       for device_id in self.device_ids}
+            try:
+                for future in as_completed(futures):
+                    result = future.result()
+                    if result is None:
+                        report.cancelled.append(futures[future])
+                        continue
+                    report.results[result.device_id] = result
+                    if progress is not None:
+                        progress(len(report.results), total, result)
+            except BaseException:
+                # E.g. an error of the progress callback or a KeyboardInterrupt. The devices that
+                # were not started yet are skipped instead of being waited for.
+                self._cancelled.set()
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+        return report
+
+    def get_devices(
+            self, progress: Callable[[int, int, DeviceResult], None] = None) -> FleetReport:
+        """Get all devices. See `Device.get_device`."""
+        return self.run(lambda device: device.get_device(), progress)
+
+    def get_telemetry_data(
+            self, start: datetime = None, end: datetime = None, interval: timedelta = None,
+            progress: Callable[[int, int, DeviceResult], None] = None) -> FleetReport:
+        """
+        Get the telemetry of all devices as `TelemetryColumns`. See `Device.get_telemetry_data`
+        and `get_fleet_telemetry` for one long-form table.
+        """
+        return self.run(
+            lambda device: device.get_telemetry_data(start, end, interval, as_='columns'),
+            progress)
+
+    def set_desired_device_state(
+            self, desired_device_state: DeviceStateModel,
+            progress: Callable[[int, int, DeviceResult], None] = None) -> FleetReport:
+        """Set the desired device state of all devices. See `Device.set_desired_device_state`."""
+        return self.run(
+            lambda device: device.set_desired_device_state(desired_device_state), progress)
+
+    def set_device_flags(
+            self, flags: DeviceFlagsModel,
+            progress: Callable[[int, int, DeviceResult], None] = None) -> FleetReport:
+        """Set the flags of all devices. See `Device.set_device_flags`."""
+        return self.run(lambda device: device.set_device_flags(flags), progress)
+
+    def send_device_command(
+            self, command: str,
+            progress: Callable[[int, int, DeviceResult], None] = None) -> FleetReport:
+        """Send a command to all devices. See `Device.send_device_command`."""
+        return self.run(lambda device: device.send_device_command(command), progress)
+
+    def claim(
+            self, user_id: str = None,
+            progress: Callable[[int, int, DeviceResult], None] = None) -> FleetReport:
+        """Claim all devices. See `Device.claim`."""
+        return self.run(lambda device: device.claim(user_id), progress)
+
+    def unclaim(
+            self, progress: Callable[[int, int, DeviceResult], None] = None) -> FleetReport:
+        """Remove the claims of all devices. See `Device.unclaim`."""
+        return self.run(lambda device: device.unclaim(), progress)
@@ -0,0 +1,275 @@
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Iterable
+
+from boum.api_client.v1.client import ApiClient
+
+
+class FleetInventory:
+    # noinspection PyUnresolvedReferences
+    """
+        In-memory index of the device and claim listings of the API.
+
+        The inventory is built once from the detailed listings of `/devices` and
+        `/devices/claimed` and keeps hash indexes by device id, owner and SKU, and sorted indexes
+        by creation and claim time. `filter` answers queries from these indexes, so its cost
+        depends on the size of the selected groups rather than on the size of the fleet. It
+        returns sets of device ids, which can be combined with the set operators. `update` and
+        `refresh` only re-index the devices whose listing entries changed.
+
+        Devices without a `hasBeenTested` field count as tested, as in
+        `Device.get_device_details`.
+
+        Example
+        -------
+            >>> from datetime import datetime
+            >>> from boum.api_client.v1.client import ApiClient
+            >>> from boum.resources.inventory import FleetInventory
+            >>>
+            >>> client = ApiClient(email, password, base_url=base_url)
+            >>> with client:
+            ...     inventory = FleetInventory.from_api(client)
+            ...     recent = inventory.filter(created_after=datetime(2023, 1, 1))
+            ...     unclaimed_recent = recent - inventory.filter(claimed=True)
+            ...     details = inventory.details(unclaimed_recent)
+            ...     inventory.refresh(client)
+        """
+
+    def __init__(self, devices: Iterable[dict] = (), claimed_devices: Iterable[dict] = ()):
+        """
+        Parameters
+        ----------
+            devices
+                The detailed device listing, as returned by
+                `client.root.devices.get(include_details=True)`.
+            claimed_devices
+                The detailed claim listing, as returned by
+                `client.root.devices.claimed.get(include_details=True)`.
+        """
+        self._devices: dict[str, dict] = {}
+        self._claims: dict[str, dict] = {}
+        self._positions: dict[str, int] = {}
+        self._by_sku: dict[str, set[str]] = {}
+        self._by_owner: dict[str, set[str]] = {}
+        self._untested: set[str] = set()
+        # Sorted (timestamp, device id) pairs
+        self._created: list[tuple[float, str]] = []
+        self._claimed: list[tuple[float, str]] = []
+        self.update(devices, claimed_devices)
+
+    @classmethod
+    def from_api(cls, api_client: ApiClient) -> 'FleetInventory':
+        """Build an inventory from the listings of the API."""
+        inventory = cls()
+        inventory.refresh(api_client)
+        return inventory
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def __contains__(self, device_id: str) -> bool:
+        return device_id in self._devices
+
+    def refresh(self, api_client: ApiClient):
+        """Get the listings from the API again and update the indexes of changed devices."""
+        # The listings are streamed, so that only the indexed entries are held in memory
+        self.update(api_client.root.devices.iter(include_details=True),
+                    api_client.root.devices.claimed.iter(include_details=True))
+
+    def update(self, devices: Iterable[dict], claimed_devices: Iterable[dict]):
+        """
+        Replace the listings. Only devices and claims whose entries were added, removed or changed
+        are re-indexed.
+
+        Parameters
+        ----------
+            devices
+                The new detailed device listing.
+            claimed_devices
+                The new detailed claim listing.
+        """
+        devices = {device['id']: device for device in devices}
+        claims = {claim['id']: claim for claim in claimed_devices}
+
+        created, claimed = [], []
+        for device_id, device in self._devices.items():
+            if devices.get(device_id) != device:
+                self._remove_device(device_id, device)
+        for device_id, device in devices.items():
+            if self._devices.get(device_id) != device:
+                self._add_device(device_id, device, created)
+        for device_id, claim in self._claims.items():
+            if claims.get(device_id) != claim:
+                self._remove_claim(device_id, claim)
+        for device_id, claim in claims.items():
+            if self._claims.get(device_id) != claim:
+                self._add_claim(device_id, claim, claimed)
+        _add_sorted(self._created, created)
+        _add_sorted(self._claimed, claimed)
+
+        self._devices = devices
+        self._claims = claims
+        self._positions = {device_id: i for i, device_id in enumerate(devices)}
+
+    def get(self, device_id: str) -> dict | None:
+        """Get the listing entry of a device, or None if it is not in the inventory."""
+        return self._devices.get(device_id)
+
+    def filter(  # pylint: disable=too-many-arguments
+            self, *, claimed: bool = None, owner_id: str = None, sku: str = None,
+            sku_contains: str = None, tested: bool = None, created_after: datetime = None,
+            created_before: datetime = None, claimed_after: datetime = None,
+            claimed_before: datetime = None) -> set[str]:
+        """
+        Get the ids of the devices that match all given criteria. Criteria that are None are
+        ignored.
+
+        Parameters
+        ----------
+            claimed
+                Whether the devices are claimed.
+            owner_id
+                The id of the user who claimed the devices.
+            sku
+                The SKU of the devices.
+            sku_contains
+                A substring of the SKU of the devices.
+            tested
+                Whether the devices have been tested.
+            created_after, created_before
+                The range of the creation time of the devices. The start is inclusive, the end
+                exclusive.
+            claimed_after, claimed_before
+                The range of the claim time of the devices. The start is inclusive, the end
+                exclusive.
+
+        Returns
+        -------
+            set[str]
+                The device ids.
+        """
+        groups = []
+        if owner_id is not None:
+            groups.append(self._by_owner.get(owner_id, set()))
+        if sku is not None:
+            groups.append(self._by_sku.get(sku, set()))
+        if sku_contains:
+            groups.append(set().union(
+                *(ids for device_sku, ids in self._by_sku.items()
+                  if device_sku and sku_contains in device_sku)))
+        if created_after is not None or created_before is not None:
+            groups.append(self._select_range(self._created, created_after, created_before))
+        if claimed_after is not None or claimed_before is not None:
+            groups.append(self._select_range(self._claimed, claimed_after, claimed_before))
+        if claimed:
+            groups.append(self._claims.keys())
+        if tested is False:
+            groups.append(self._untested)
+
+        if not groups:
+            device_ids = set(self._devices)
+        else:
+            # Each step iterates over the selected ids, not over the other group. Claims of
+            # devices that are missing from the device listing are left out.
+            groups.sort(key=len)
+            device_ids = {device_id for device_id in groups[0] if device_id in self._devices}
+            for group in groups[1:]:
+                device_ids = {device_id for device_id in device_ids if device_id in group}
+
+        if claimed is False:
+            device_ids = {device_id for device_id in device_ids if device_id not in self._claims}
+        if tested:
+            device_ids = {device_id for device_id in device_ids if device_id not in self._untested}
+        return device_ids
+
+    def details(self, device_ids: Iterable[str], include_claims: bool = False) -> list[dict]:
+        """
+        Get copies of the listing entries of devices, in the order of the device listing.
+
+        Parameters
+        ----------
+            device_ids
+                The device ids. Ids that are not in the inventory are ignored.
+            include_claims
+                If true, `claimedAt` and `ownerId` are added to the entries of claimed devices.
+
+        Returns
+        -------
+            list[dict]
+                The device details.
+        """
+        device_ids = sorted(
+            (device_id for device_id in device_ids if device_id in self._positions),
+            key=self._positions.__getitem__)
+        details = []
+        for device_id in device_ids:
+            device = dict(self._devices[device_id])
+            claim = self._claims.get(device_id)
+            if include_claims and claim is not None:
+                device['claimedAt'] = datetime.fromtimestamp(claim['createdAt']['_seconds'])
+                device['ownerId'] = claim['ownerId']
+            details.append(device)
+        return details
+
+    @staticmethod
+    def _select_range(
+            index: list[tuple[float, str]], start: datetime | None,
+            end: datetime | None) -> set[str]:
+        low = 0 if start is None else bisect_left(index, (start.timestamp(),))
+        high = len(index) if end is None else bisect_left(index, (end.timestamp(),))
+        return {device_id for _, device_id in index[low:high]}
+
+    @staticmethod
+    def _get_timestamp(entry: dict) -> float | None:
+        created_at = entry.get('createdAt')
+        return None if created_at is None else created_at['_seconds']
+
+    def _add_device(self, device_id: str, device: dict, created: list[tuple[float, str]]):
+        self._by_sku.setdefault(device.get('sku'), set()).add(device_id)
+        if device.get('hasBeenTested') is False:
+            self._untested.add(device_id)
+        timestamp = self._get_timestamp(device)
+        if timestamp is not None:
+            created.append((timestamp, device_id))
+
+    def _remove_device(self, device_id: str, device: dict):
+        _discard(self._by_sku, device.get('sku'), device_id)
+        self._untested.discard(device_id)
+        timestamp = self._get_timestamp(device)
+        if timestamp is not None:
+            _remove_sorted(self._created, (timestamp, device_id))
+
+    def _add_claim(self, device_id: str, claim: dict, claimed: list[tuple[float, str]]):
+        self._by_owner.setdefault(claim.get('ownerId'), set()).add(device_id)
+        timestamp = self._get_timestamp(claim)
+        if timestamp is not None:
+            claimed.append((timestamp, device_id))
+
+    def _remove_claim(self, device_id: str, claim: dict):
+        _discard(self._by_owner, claim.get('ownerId'), device_id)
+        timestamp = self._get_timestamp(claim)
+        if timestamp is not None:
+            _remove_sorted(self._claimed, (timestamp, device_id))
+
+
+def _discard(index: dict[str, set[str]], key: str, device_id: str):
+    device_ids = index.get(key)
+    if device_ids is not None:
+        device_ids.discard(device_id)
+        if not device_ids:
+            del index[key]
+
+
+def _add_sorted(index: list[tuple[float, str]], items: list[tuple[float, str]]):
+    # Inserting items one by one is quadratic for the unsorted listings, so they are sorted once
+    if len(items) == 1:
+        insort(index, items[0])
+    elif items:
+        index.extend(items)
+        index.sort()
+
+
+def _remove_sorted(index: list[tuple[float, str]], item: tuple[float, str]):
+    i = bisect_left(index, item)
+    if i < len(index) and index[i] == item:
+        del index[i]
@@ -0,0 +1,183 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Iterable
+
+from boum.api_client.v1.client import ApiClient
+from boum.api_client.v1.telemetry import TelemetryColumns, check_output_format, concat_columns, \
+    stack_columns
+from boum.resources.fleet import Fleet
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+def split_range(
+        start: datetime, end: datetime, window: timedelta) -> list[tuple[datetime, datetime]]:
+    """Split `[start, end)` into consecutive windows of at most `window`."""
+    if window <= timedelta(0):
+        raise ValueError('window must be positive')
+    windows = []
+    while start < end:
+        windows.append((start, min(start + window, end)))
+        start += window
+    return windows
+
+
+def stitch_windows(chunks: list[TelemetryColumns]) -> TelemetryColumns:
+    """
+    Concatenate the telemetry of consecutive windows. Samples at the start of a window that are
+    not later than the last sample of the previous windows, e.g. a boundary sample that the API
+    returned for both windows, are dropped.
+    """
+    kept = []
+    last = None
+    for chunk in chunks:
+        if last is not None and len(chunk):
+            chunk = chunk[int(np.searchsorted(chunk.timestamps, last, side='right')):]
+        if len(chunk):
+            last = chunk.timestamps[-1]
+        kept.append(chunk)
+    return concat_columns(kept)
+
+
+def get_fleet_telemetry(
+        api_client: ApiClient, device_ids: Iterable[str], start: datetime = None,
+        end: datetime = None, interval: timedelta = None, as_: str = 'columns',
+        max_workers: int = 16, raise_on_error: bool = False) -> Any:
+    """
+    Get the telemetry of many devices concurrently as one long-form table.
+
+    Every device is parsed into columns as soon as its response arrives, and the result is built
+    with one allocation per column, see `stack_columns`.
+
+    Parameters
+    ----------
+        api_client
+            The api client that handles the interaction with the api.
+        device_ids
+            The ids of the devices. Duplicates are removed.
+        start
+            The start of the time range.
+        end
+            The end of the time range.
+        interval
+            The interpolation interval.
+        as_
+            The output format, one of `OUTPUT_FORMATS`, see `FleetTelemetryColumns.convert`.
+        max_workers
+            The maximum number of concurrent requests.
+        raise_on_error
+            If true, the first error is raised after all requests are done. Otherwise devices
+            whose telemetry could not be fetched are logged and left out of the result. Use
+            `Fleet.get_telemetry_data` to get the error of every device.
+
+    Returns
+    -------
+        Any
+            The telemetry with a row per device and timestamp, in the order of `device_ids`, in
+            the format of `as_`.
+    """
+    check_output_format(as_)
+    fleet = Fleet(device_ids, api_client, max_workers=max_workers)
+    report = fleet.get_telemetry_data(start, end, interval)
+    if raise_on_error and report.failed:
+        raise next(iter(report.failed.values()))
+    for device_id, error in report.failed.items():
+        logging.warning('Failed to get the telemetry of device %s: %r', device_id, error)
+    columns = report.values
+    return stack_columns([columns[device_id] for device_id in fleet.device_ids
+                          if device_id in columns]).convert(as_)
+
+
+class TelemetryRangeFetcher:
+    # noinspection PyUnresolvedReferences
+    """
+        Fetches the telemetry of long time ranges in windows.
+
+        The range is split into windows of `window`, which are fetched concurrently with at most
+        `max_workers` requests. Each window is parsed into columns as soon as it arrives, and the
+        windows are stitched together in order, without duplicate boundary samples. Smaller
+        requests also keep the API below its timeouts.
+
+        Example
+        -------
+            >>> from datetime import datetime, timedelta
+            >>> from boum.api_client.v1.client import ApiClient
+            >>> from boum.resources.telemetry import TelemetryRangeFetcher
+            >>>
+            >>> client = ApiClient(email, password, base_url=base_url)
+            >>> with client:
+            ...     fetcher = TelemetryRangeFetcher(client, window=timedelta(days=7), max_workers=8)
+            ...     start = datetime.now() - timedelta(days=365)
+            ...     df = fetcher.get(device_id, start, datetime.now(), as_='pandas')
+        """
+
+    def __init__(
+            self, api_client: ApiClient, window: timedelta = timedelta(days=7),
+            max_workers: int = 8):
+        """
+        Parameters
+        ----------
+            api_client
+                The api client that handles the interaction with the api.
+            window
+                The maximum time range of one request.
+            max_workers
+                The maximum number of concurrent requests.
+        """
+        if window <= timedelta(0):
+            raise ValueError('window must be positive')
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+
+        self._api_client = api_client
+        self._window = window
+        self._max_workers = max_workers
+
+    def get(
+            self, device_id: str, start: datetime, end: datetime, interval: timedelta = None,
+            as_: str = 'columns') -> Any:
+        """
+        Get the telemetry of a device in `[start, end)`.
+
+        Parameters
+        ----------
+            device_id
+                The device id.
+            start
+                The start of the time range.
+            end
+                The end of the time range.
+            interval
+                The interpolation interval. The window must be a multiple of it, so that the
+                interpolated samples of all windows are on the same grid.
+            as_
+                The output format, one of `OUTPUT_FORMATS`, see `TelemetryColumns.convert`.
+
+        Returns
+        -------
+            Any
+                The telemetry in the format of `as_`.
+        """
+        check_output_format(as_)
+        if interval is not None and self._window % interval:
+            raise ValueError('window must be a multiple of interval')
+        if start >= end:
+            raise ValueError('start must be before end')
+
+        data = self._api_client.root.devices(device_id).data
+        with ThreadPoolExecutor(self._max_workers, thread_name_prefix='boum-telemetry') as executor:
+            futures = [
+                executor.submit(data.get, window_start, window_end, interval, as_='columns')
+                for window_start, window_end in split_range(start, end, self._window)]
+            try:
+                chunks = [future.result() for future in futures]
+            except BaseException:
+                # Don't send the requests of the remaining windows
+                for future in futures:
+                    future.cancel()
+                raise
+        return stitch_windows(chunks).convert(as_)
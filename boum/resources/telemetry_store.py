@@ -0,0 +1,254 @@
+import os
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+from datetime import datetime, timedelta, timezone
+from itertools import repeat
+from typing import Any, Iterator
+
+from boum.api_client.v1.client import ApiClient
+from boum.api_client.v1.telemetry import TelemetryColumns, check_output_format
+from boum.resources.telemetry import TelemetryRangeFetcher
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_ns(timestamp: datetime) -> int:
+    """Convert a datetime into nanoseconds since the epoch. Naive datetimes are UTC."""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return (timestamp - _EPOCH) // timedelta(microseconds=1) * 1000
+
+
+def _from_ns(nanoseconds: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=nanoseconds // 1000)
+
+
+class SqliteTelemetryStore:
+    # noinspection PyUnresolvedReferences
+    """
+        Local SQLite cache of the raw telemetry of devices, which only fetches what it doesn't
+        have yet.
+
+        Samples are stored per device, metric and timestamp, together with the time ranges
+        that have been fetched per device. A query for `[start, end)` fetches only the gaps
+        between the stored ranges, with a `TelemetryRangeFetcher`, stores them and then reads the
+        whole range from the database. Telemetry that is older than `settle_time` is immutable,
+        so ranges are only recorded as fetched up to `now - settle_time`. More recent samples are
+        fetched again by every query.
+
+        The store can be shared by threads and processes. Every thread opens its own connection
+        to the database, which are all closed by `close` or at the end of a `with` block.
+
+        Example
+        -------
+            >>> from datetime import datetime, timedelta
+            >>> from boum.api_client.v1.client import ApiClient
+            >>> from boum.resources.telemetry_store import SqliteTelemetryStore
+            >>>
+            >>> client = ApiClient(email, password, base_url=base_url)
+            >>> with client, SqliteTelemetryStore('/tmp/boum-telemetry.db', client) as store:
+            ...     start = datetime.now() - timedelta(days=30)
+            ...     df = store.get(device_id, start, datetime.now(), as_='pandas')
+            ...     # Only fetches the telemetry since the previous query
+            ...     df = store.get(device_id, start, datetime.now(), as_='pandas')
+        """
+
+    def __init__(
+            self, path: str | os.PathLike, api_client: ApiClient,
+            fetcher: TelemetryRangeFetcher = None, settle_time: timedelta = timedelta(hours=1),
+            timeout: float = 30.0):
+        """
+        Parameters
+        ----------
+            path
+                The path of the database file. It is created if it doesn't exist.
+            api_client
+                The api client that fetches missing telemetry.
+            fetcher
+                The fetcher of missing ranges. By default, a `TelemetryRangeFetcher` with its
+                default window and concurrency.
+            settle_time
+                The age after which telemetry doesn't change anymore.
+            timeout
+                Seconds to wait for the lock of another writer before giving up.
+        """
+        if settle_time < timedelta(0):
+            raise ValueError('settle_time must not be negative')
+
+        self._path = os.fspath(path)
+        self._fetcher = fetcher if fetcher is not None else TelemetryRangeFetcher(api_client)
+        self._settle_time = settle_time
+        self._timeout = timeout
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        with closing(self._connect()) as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS samples ('
+                'device_id TEXT NOT NULL, metric TEXT NOT NULL, timestamp INTEGER NOT NULL, '
+                'value REAL, PRIMARY KEY (device_id, metric, timestamp)) WITHOUT ROWID')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS coverage ('
+                'device_id TEXT NOT NULL, start INTEGER NOT NULL, end INTEGER NOT NULL, '
+                'PRIMARY KEY (device_id, start))')
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS samples_by_timestamp '
+                'ON samples (device_id, timestamp, metric)')
+
+    def __enter__(self) -> "SqliteTelemetryStore":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        Close the connections of all threads. The store opens new connections if it is used
+        again.
+        """
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            self._local = threading.local()
+        for connection in connections:
+            connection.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Every connection is only used by its thread, but can be closed by any thread
+        return sqlite3.connect(
+            self._path, timeout=self._timeout, isolation_level=None, check_same_thread=False)
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite connections can't be shared between threads
+        local = self._local
+        if getattr(local, 'connection', None) is None:
+            local.connection = self._connect()
+            with self._connections_lock:
+                self._connections.append(local.connection)
+        return local.connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        connection = self._connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def get(self, device_id: str, start: datetime, end: datetime, as_: str = 'columns') -> Any:
+        """
+        Get the raw telemetry of a device in `[start, end)`, fetching only the missing ranges.
+
+        Parameters
+        ----------
+            device_id
+                The device id.
+            start
+                The start of the time range. Naive datetimes are UTC.
+            end
+                The end of the time range. Naive datetimes are UTC.
+            as_
+                The output format, one of `OUTPUT_FORMATS`, see `TelemetryColumns.convert`.
+
+        Returns
+        -------
+            Any
+                The telemetry in the format of `as_`.
+        """
+        check_output_format(as_)
+        if start >= end:
+            raise ValueError('start must be before end')
+
+        # The API has a resolution of seconds
+        settled = _to_ns(datetime.now(timezone.utc).replace(microsecond=0) - self._settle_time)
+        for gap_start, gap_end in self.get_gaps(device_id, start, end):
+            columns = self._fetcher.get(device_id, gap_start, gap_end)
+            self._save(device_id, columns, _to_ns(gap_start), min(_to_ns(gap_end), settled))
+        return self._load(device_id, _to_ns(start), _to_ns(end)).convert(as_)
+
+    def get_gaps(
+            self, device_id: str, start: datetime,
+            end: datetime) -> list[tuple[datetime, datetime]]:
+        """Get the parts of `[start, end)` that are not stored yet."""
+        start, end = _to_ns(start), _to_ns(end)
+        rows = self._connection.execute(
+            'SELECT start, end FROM coverage WHERE device_id = ? AND end > ? AND start < ? '
+            'ORDER BY start', (device_id, start, end)).fetchall()
+        gaps = []
+        for covered_start, covered_end in rows:
+            if covered_start > start:
+                gaps.append((start, covered_start))
+            start = max(start, covered_end)
+        if start < end:
+            gaps.append((start, end))
+        return [(_from_ns(gap_start), _from_ns(gap_end)) for gap_start, gap_end in gaps]
+
+    def clear(self, device_id: str = None):
+        """Remove the stored telemetry of a device, or of all devices."""
+        with self._transaction() as connection:
+            if device_id is None:
+                connection.execute('DELETE FROM samples')
+                connection.execute('DELETE FROM coverage')
+            else:
+                connection.execute('DELETE FROM samples WHERE device_id = ?', (device_id,))
+                connection.execute('DELETE FROM coverage WHERE device_id = ?', (device_id,))
+
+    def _save(self, device_id: str, columns: TelemetryColumns, start: int, end: int):
+        """Store fetched samples and record `[start, end)` as fetched, merged with its neighbors."""
+        timestamps = columns.timestamps.astype('int64').tolist()
+        with self._transaction() as connection:
+            for metric, values in columns.values.items():
+                # NaN is stored as NULL
+                connection.executemany(
+                    'INSERT OR REPLACE INTO samples (device_id, metric, timestamp, value) '
+                    'VALUES (?, ?, ?, ?)',
+                    zip(repeat(device_id), repeat(metric), timestamps, values.tolist()))
+            if start >= end:
+                return
+            start, end = connection.execute(
+                'SELECT min(coalesce(min(start), ?1), ?1), max(coalesce(max(end), ?2), ?2) '
+                'FROM coverage WHERE device_id = ?3 AND end >= ?1 AND start <= ?2',
+                (start, end, device_id)).fetchone()
+            connection.execute(
+                'DELETE FROM coverage WHERE device_id = ? AND end >= ? AND start <= ?',
+                (device_id, start, end))
+            connection.execute(
+                'INSERT INTO coverage (device_id, start, end) VALUES (?, ?, ?)',
+                (device_id, start, end))
+
+    def _load(self, device_id: str, start: int, end: int) -> TelemetryColumns:
+        connection = self._connection
+        # Without the index, the primary key would be scanned over the whole device history
+        metrics = [metric for metric, in connection.execute(
+            'SELECT DISTINCT metric FROM samples INDEXED BY samples_by_timestamp '
+            'WHERE device_id = ? AND timestamp >= ? AND timestamp < ? ORDER BY metric',
+            (device_id, start, end))]
+        series = {}
+        for metric in metrics:
+            rows = connection.execute(
+                'SELECT timestamp, value FROM samples WHERE device_id = ? AND metric = ? '
+                'AND timestamp >= ? AND timestamp < ? ORDER BY timestamp',
+                (device_id, metric, start, end)).fetchall()
+            series[metric] = (
+                np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)),
+                np.array([row[1] for row in rows], dtype=np.float64))
+
+        # The metrics usually share their timestamps, but are aligned in case they don't
+        timestamps = np.unique(np.concatenate(
+            [metric_timestamps for metric_timestamps, _ in series.values()] +
+            [np.empty(0, dtype=np.int64)]))
+        values = {}
+        for metric, (metric_timestamps, metric_values) in series.items():
+            column = np.full(len(timestamps), np.nan)
+            column[np.searchsorted(timestamps, metric_timestamps)] = metric_values
+            values[metric] = column
+        return TelemetryColumns(device_id, timestamps.astype('datetime64[ns]'), values)
@@ -2,7 +2,9 @@ import doctest
 
 import pytest
 
+import boum.api_client.v1.async_client
 import boum.api_client.v1.client
+import boum.resources.async_device
 import boum.resources.device
 from tests.fixtures.env import EMAIL, PASSWORD, DEVICE_ID, BASE_URL
 
@@ -29,3 +31,16 @@ def test__client():
 def test__device():
     doctest.testmod(
         boum.resources.device, raise_on_error=True, verbose=True, globs=execution_context)
+
+
+@pytest.mark.flaky(reruns=3)
+def test__async_client():
+    doctest.testmod(
+        boum.api_client.v1.async_client, raise_on_error=True, verbose=True,
+        globs=execution_context)
+
+
+@pytest.mark.flaky(reruns=3)
+def test__async_device():
+    doctest.testmod(
+        boum.resources.async_device, raise_on_error=True, verbose=True, globs=execution_context)
@@ -7,6 +7,7 @@ IMPORTANT: If these objects don't match the expected requests and responses that
 can process, the unit test will not test the code in the correct way. Therefore, this module has
 kept up-to-date with the API
 """
+import json
 from datetime import time, datetime, timedelta
 from unittest.mock import Mock, call
 
@@ -23,16 +24,19 @@ ACCESS_TOKEN = 'access_token'
 USER_ID = 'user_id'
 
 
-def create_mock_response(status_code, data=None, message: str | None = None):
+def create_mock_response(
+        status_code, data=None, message: str | None = None, headers: dict | None = None):
     response = Mock()
     response.status_code = status_code
+    response.headers = headers or {}
+    response.content = b''
     if data or message:
-        json = {}
+        body = {}
         if data:
-            json['data'] = data
+            body['data'] = data
         if message:
-            json['message'] = message
-        response.json.return_value = json
+            body['message'] = message
+        response.content = json.dumps(body).encode('utf-8')
     return response
 
 
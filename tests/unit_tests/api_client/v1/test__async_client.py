@@ -0,0 +1,97 @@
+"""
+This module tests the async api client up to the calls to the API with the async session
+object. It relies on the API fixtures and on their correct representation of the actual API.
+"""
+
+import asyncio
+from unittest.mock import Mock, AsyncMock
+
+import pytest
+
+from boum.api_client.v1.async_client import AsyncApiClient
+from boum.api_client.v1.models import DeviceModel
+from tests.fixtures.api import AuthSigningPost, AuthTokenPost, DevicesGet, Shared, EMAIL, \
+    PASSWORD, BASE_URL, REFRESH_TOKEN, DEVICE_ID, DevicesWithIdPatch
+
+
+@pytest.fixture
+def session_mock():
+    session = Mock()
+    for method in ['get', 'post', 'put', 'patch', 'delete', 'aclose']:
+        setattr(session, method, AsyncMock())
+    session.post.return_value = AuthSigningPost.response
+    return session
+
+
+@pytest.fixture
+def client(session_mock):
+    return AsyncApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock)
+
+
+class TestAsyncClientAuthLogic:
+    def test__instantiated_with_email_and_password__signin_happens(self, client, session_mock):
+        async def run():
+            async with client:
+                assert session_mock.post.call_args == AuthSigningPost.call
+
+        asyncio.run(run())
+
+    def test__instantiated_with_refresh_token__only_token_refresh_happens(self, session_mock):
+        session_mock.post.return_value = AuthTokenPost.response
+        client = AsyncApiClient(
+            refresh_token=REFRESH_TOKEN, base_url=BASE_URL, session=session_mock)
+
+        async def run():
+            async with client:
+                assert session_mock.post.call_args == AuthTokenPost.call
+
+        asyncio.run(run())
+
+    def test__if_access_token_expired__token_is_refreshed(self, client, session_mock):
+        session_mock.get.side_effect = [Shared.response_access_token_expired, DevicesGet.response]
+        session_mock.post.side_effect = [AuthSigningPost.response, AuthTokenPost.response]
+
+        async def run():
+            async with client:
+                assert await client.root.devices.get() == [DEVICE_ID]
+                assert session_mock.get.call_count == 2
+                assert session_mock.post.call_args_list == [
+                    AuthSigningPost.call, AuthTokenPost.call]
+
+        asyncio.run(run())
+
+    def test__used_with_sync_with_statement__raises_type_error(self, client):
+        with pytest.raises(TypeError):
+            with client:
+                pass
+
+
+class TestAsyncClientRequests:
+    def test__concurrent_requests__all_return_results(self, client, session_mock):
+        session_mock.get.return_value = DevicesGet.response
+
+        async def run():
+            async with client:
+                return await asyncio.gather(*(client.root.devices.get() for _ in range(10)))
+
+        assert asyncio.run(run()) == [[DEVICE_ID]] * 10
+        assert session_mock.get.call_args == DevicesGet.call
+
+    def test__patch__calls_session_and_returns_none(self, client, session_mock):
+        session_mock.patch.return_value = DevicesWithIdPatch.response
+        device_model = DeviceModel(desired_state=DevicesWithIdPatch.desired_state)
+
+        async def run():
+            async with client:
+                return await client.root.devices(DEVICE_ID).patch(device_model)
+
+        assert asyncio.run(run()) is None
+
+    def test__request_after_disconnect__raises_runtime_error(self, client):
+        async def run():
+            async with client:
+                pass
+            client.root.devices.get()
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(run())
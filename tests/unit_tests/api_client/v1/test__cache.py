@@ -0,0 +1,138 @@
+"""
+This module tests the response cache and the caching of GET requests by the client.
+"""
+
+from unittest.mock import Mock, call
+
+import pytest
+import requests
+
+from boum.api_client.v1 import cache as cache_module
+from boum.api_client.v1.cache import ResponseCache
+from boum.api_client.v1.client import ApiClient, ClientConfig
+from boum.api_client.v1.models import DeviceModel
+from tests.fixtures.api import AuthSigningPost, DevicesGet, DevicesWithIdPatch, EMAIL, PASSWORD, \
+    BASE_URL, DEVICE_ID, create_mock_response
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Mock(return_value=100.0)
+    monkeypatch.setattr(cache_module.time, 'monotonic', clock)
+    return clock
+
+
+def create_response(etag=None):
+    return create_mock_response(
+        200, data=[{'id': DEVICE_ID}], headers={'ETag': etag} if etag else None)
+
+
+class TestResponseCache:
+
+    def test__entries__expire_after_ttl(self, clock):
+        cache = ResponseCache(default_ttl=10)
+        cache.put('key', '/devices', create_response())
+
+        assert cache.get('key').is_fresh
+        clock.return_value += 10
+        assert not cache.get('key').is_fresh
+
+    def test__ttls__match_path_patterns_before_default(self):
+        cache = ResponseCache(default_ttl=10, ttls={'/devices/{id}/data': None, '/users': 60})
+        assert cache.get_ttl('/devices/{id}/data') is None
+        assert cache.get_ttl('/users') == 60
+        assert cache.get_ttl('/devices') == 10
+
+    def test__responses_without_validators_and_ttl_zero__are_not_cached(self):
+        cache = ResponseCache(default_ttl=0)
+        cache.put('a', '/devices', create_response())
+        cache.put('b', '/devices', create_response(etag='"1"'))
+        assert cache.get('a') is None
+        assert cache.get('b').validators == {'If-None-Match': '"1"'}
+
+    def test__least_recently_used_entries__are_evicted(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put('a', '/devices', create_response())
+        cache.put('b', '/devices', create_response())
+        cache.get('a')
+        cache.put('c', '/devices', create_response())
+        assert cache.get('b') is None
+        assert cache.get('a') is not None and cache.get('c') is not None
+
+    def test__invalidate__removes_paths_and_their_children(self):
+        cache = ResponseCache()
+        cache.put('a', '/devices', create_response())
+        cache.put('b', '/devices/{id}/data', create_response())
+        cache.put('c', '/devicesx', create_response())
+        cache.put('d', '/users', create_response())
+
+        cache.invalidate(('/devices',))
+        assert [cache.get(key) is not None for key in 'abcd'] == [False, False, True, True]
+        cache.invalidate()
+        assert len(cache) == 0
+
+
+class TestClientCache:
+
+    @pytest.fixture
+    def session_mock(self):
+        session_mock = Mock()
+        session_mock.post.return_value = AuthSigningPost.response
+        return session_mock
+
+    @pytest.fixture
+    def client(self, session_mock):
+        return ApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock,
+                         config=ClientConfig(response_cache=ResponseCache(default_ttl=10)))
+
+    @pytest.mark.usefixtures('clock')
+    def test__fresh_response__is_used_without_request(self, client, session_mock):
+        session_mock.get.return_value = DevicesGet.response
+
+        with client:
+            first = client.root.devices.get(include_details=True)
+            first[0]['id'] = 'modified'
+            assert client.root.devices.get() == [DEVICE_ID]
+        assert session_mock.get.call_count == 1
+
+    def test__stale_response__is_revalidated(self, client, session_mock, clock):
+        session_mock.get.side_effect = [create_response(etag='"1"'), create_mock_response(304)]
+
+        with client:
+            client.root.devices.get()
+            clock.return_value += 10
+            assert client.root.devices.get() == [DEVICE_ID]
+
+        assert session_mock.get.call_args == call(
+            url=f'{BASE_URL}/v1/devices', json=None, params=None,
+            headers={'If-None-Match': '"1"'})
+
+    @pytest.mark.usefixtures('clock')
+    def test__not_modified_without_cached_response__raises(self, client, session_mock):
+        session_mock.get.return_value = create_mock_response(304)
+
+        with client, pytest.raises(requests.HTTPError):
+            client.root.devices.get()
+
+    @pytest.mark.usefixtures('clock')
+    def test__write__invalidates_collection(self, client, session_mock):
+        session_mock.get.return_value = DevicesGet.response
+        session_mock.patch.return_value = DevicesWithIdPatch.response
+
+        with client:
+            client.root.devices.get()
+            client.root.devices(DEVICE_ID).patch(
+                DeviceModel(desired_state=DevicesWithIdPatch.desired_state))
+            client.root.devices.get()
+        assert session_mock.get.call_count == 2
+
+    @pytest.mark.usefixtures('clock')
+    def test__claim__invalidates_users(self, client, session_mock):
+        session_mock.get.return_value = create_mock_response(200, data={'id': 'user'})
+        session_mock.put.return_value = create_mock_response(200)
+
+        with client:
+            client.root.users.get()
+            client.root.devices(DEVICE_ID).claim.put()
+            client.root.users.get()
+        assert session_mock.get.call_count == 2
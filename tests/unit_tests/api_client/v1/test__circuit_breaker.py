@@ -0,0 +1,118 @@
+"""
+This module tests the circuit breaker and its application to the requests of the client.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+import requests
+
+from boum.api_client.v1 import circuit_breaker as circuit_breaker_module
+from boum.api_client.v1.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+from boum.api_client.v1.client import ApiClient, ClientConfig
+from boum.api_client.v1.retry import RetryPolicy
+from tests.fixtures.api import AuthSigningPost, DevicesGet, EMAIL, PASSWORD, BASE_URL, \
+    create_mock_response
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Mock(return_value=100.0)
+    monkeypatch.setattr(circuit_breaker_module.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def breaker():
+    return CircuitBreaker(
+        failure_rate_threshold=0.5, window_size=4, minimum_calls=4, open_duration=10,
+        half_open_calls=2)
+
+
+def record(breaker, failed, duration=0.1):
+    breaker.record(breaker.acquire(), failed, duration)
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'failure_rate_threshold': 0}, {'slow_call_rate_threshold': 1.5},
+    {'window_size': 5, 'minimum_calls': 6}, {'half_open_calls': 0}])
+def test__invalid_arguments__raise_value_error(kwargs):
+    with pytest.raises(ValueError):
+        CircuitBreaker(**kwargs)
+
+
+@pytest.mark.usefixtures('clock')
+class TestCircuitBreaker:
+
+    def test__failure_rate_below_threshold__stays_closed(self, breaker):
+        for failed in [True, False, False, False, True, False]:
+            record(breaker, failed)
+        assert breaker.state is CircuitState.CLOSED
+
+    def test__failure_rate_at_threshold__opens_and_fails_fast(self, breaker):
+        for failed in [True, False, True, False]:
+            record(breaker, failed)
+
+        assert breaker.state is CircuitState.OPEN
+        with pytest.raises(CircuitOpenError) as error:
+            breaker.acquire()
+        assert error.value.retry_after == pytest.approx(10)
+
+    def test__slow_calls__open(self):
+        breaker = CircuitBreaker(
+            slow_call_duration=1.0, slow_call_rate_threshold=0.5, window_size=2, minimum_calls=2)
+        record(breaker, False, 2.0)
+        record(breaker, False, 2.0)
+        assert breaker.state is CircuitState.OPEN
+
+    def test__successful_trials_after_open_duration__close(self, breaker, clock):
+        for _ in range(4):
+            record(breaker, True)
+        clock.return_value += 10
+
+        trials = [breaker.acquire(), breaker.acquire()]
+        assert breaker.state is CircuitState.HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.acquire()
+        for permit in trials:
+            breaker.record(permit, False, 0.1)
+        assert breaker.state is CircuitState.CLOSED
+
+    def test__failed_trial__reopens(self, breaker, clock):
+        for _ in range(4):
+            record(breaker, True)
+        clock.return_value += 10
+
+        record(breaker, True)
+        assert breaker.state is CircuitState.OPEN
+
+    def test__outcomes_of_previous_state__are_ignored(self, breaker, clock):
+        late_permit = breaker.acquire()
+        for _ in range(4):
+            record(breaker, True)
+        clock.return_value += 10
+        breaker.acquire()
+
+        breaker.record(late_permit, True, 0.1)
+        assert breaker.state is CircuitState.HALF_OPEN
+
+
+@pytest.mark.usefixtures('clock')
+def test__client_with_open_circuit__fails_fast_without_request(breaker):
+    session_mock = Mock()
+    session_mock.post.return_value = AuthSigningPost.response
+    session_mock.get.side_effect = [
+        requests.ConnectionError(), create_mock_response(503), requests.ConnectionError(),
+        DevicesGet.response]
+    client = ApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock,
+                       config=ClientConfig(retry_policy=RetryPolicy(backoff_factor=0),
+                                           circuit_breaker=breaker))
+
+    with client:
+        with pytest.raises(CircuitOpenError):
+            client.root.devices.get()
+        with pytest.raises(CircuitOpenError):
+            client.root.devices.get()
+
+    # The signin succeeded, then 3 failed attempts opened the circuit before the last retry
+    assert session_mock.get.call_count == 3
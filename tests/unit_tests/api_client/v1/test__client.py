@@ -3,14 +3,24 @@ This module tests the api client up to the calls to the API with the session
 object. It relies on the API fixtures and on their correct representation of the actual API.
 """
 
-from unittest.mock import Mock
+import asyncio
+import base64
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, AsyncMock
 
 import pytest
+import requests
 
-from boum.api_client.v1.client import ApiClient
+from boum.api_client.v1.async_client import AsyncApiClient
+from boum.api_client.v1.client import ApiClient, ClientConfig, get_jwt_expiry
 from boum.api_client.v1.models import DeviceModel
+from boum.api_client.v1.retry import RetryPolicy
 from tests.fixtures.api import AuthSigningPost, AuthTokenPost, DevicesGet, Shared, EMAIL, \
-    PASSWORD, BASE_URL, REFRESH_TOKEN, DEVICE_ID, USER_ID
+    PASSWORD, BASE_URL, REFRESH_TOKEN, DEVICE_ID, USER_ID, DevicesWithIdPatch, \
+    create_mock_response, ACCESS_TOKEN
 
 
 @pytest.fixture
@@ -52,6 +62,80 @@ class TestClientAuthLogic:
             assert session_mock.get.call_count == 2
             assert session_mock.post.call_args_list == [AuthSigningPost.call, AuthTokenPost.call]
 
+    def test__refresh_check__uses_monotonic_clock(self, client, session_mock, monkeypatch):
+        # The latency clock must not be compared with the time of the last token update
+        monkeypatch.setattr(time, 'perf_counter', lambda: 0.0)
+        session_mock.get.side_effect = [Shared.response_access_token_expired, DevicesGet.response]
+        session_mock.post.side_effect = [AuthSigningPost.response, AuthTokenPost.response]
+
+        with client:
+            client.root.devices.get()
+            assert session_mock.post.call_args_list == [AuthSigningPost.call, AuthTokenPost.call]
+
+    def test__concurrent_expired_requests__token_is_refreshed_once(self, client, session_mock):
+        barrier = threading.Barrier(8)
+
+        def get(**_):
+            # Every thread is rejected once, after all threads sent their request with the
+            # expired token
+            if threading.current_thread().name in rejected:
+                return DevicesGet.response
+            rejected.add(threading.current_thread().name)
+            barrier.wait()
+            return Shared.response_access_token_expired
+
+        rejected = set()
+        session_mock.get.side_effect = get
+        session_mock.post.side_effect = [AuthSigningPost.response, AuthTokenPost.response]
+
+        with client:
+            with ThreadPoolExecutor(8) as executor:
+                results = list(executor.map(lambda _: client.root.devices.get(), range(8)))
+
+        assert results == [[DEVICE_ID]] * 8
+        assert session_mock.post.call_args_list == [AuthSigningPost.call, AuthTokenPost.call]
+
+
+def create_jwt(expires_at: float) -> str:
+    def encode(value: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip('=')
+
+    return '.'.join([encode({'alg': 'HS256'}), encode({'exp': expires_at}), 'signature'])
+
+
+class TestClientProactiveTokenRefresh:
+
+    def test__jwt_expiry__is_decoded(self):
+        assert get_jwt_expiry(create_jwt(1700000000)) == 1700000000
+        assert get_jwt_expiry('Bearer ' + create_jwt(1700000000)) == 1700000000
+
+    @pytest.mark.parametrize('token', [ACCESS_TOKEN, 'header.bm90LWpzb24.signature'])
+    def test__token_without_expiry__returns_none(self, token):
+        assert get_jwt_expiry(token) is None
+
+    def test__token_expiring_within_margin__is_refreshed_before_request(
+            self, client, session_mock):
+        session_mock.get.return_value = DevicesGet.response
+        session_mock.post.side_effect = [
+            create_mock_response(200, data={
+                'accessToken': create_jwt(time.time() + 30), 'refreshToken': REFRESH_TOKEN}),
+            AuthTokenPost.response]
+
+        with client:
+            client.root.devices.get()
+            assert session_mock.post.call_args_list[1] == AuthTokenPost.call
+            assert session_mock.get.call_count == 1
+
+    def test__token_not_expiring__is_not_refreshed(self, client, session_mock):
+        session_mock.get.return_value = DevicesGet.response
+        session_mock.post.return_value = create_mock_response(200, data={
+            'accessToken': create_jwt(time.time() + 3600), 'refreshToken': REFRESH_TOKEN})
+
+        with client:
+            client.root.devices.get()
+            assert session_mock.post.call_count == 1
+
+
 class TestClientConnectLogic:
 
     def test__request_without_with_statement_or_connect__raises_runtime_error(self, client):
@@ -75,6 +159,47 @@ class TestClientConnectLogic:
 
 
 
+class TestClientRetryLogic:
+
+    @pytest.fixture
+    def client(self, session_mock):
+        session_mock.post.return_value = AuthSigningPost.response
+        return ApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock,
+                         config=ClientConfig(retry_policy=RetryPolicy(backoff_factor=0)))
+
+    def test__transient_status_on_get__is_retried(self, client, session_mock):
+        session_mock.get.side_effect = [create_mock_response(503), DevicesGet.response]
+
+        with client:
+            assert client.root.devices.get() == [DEVICE_ID]
+            assert session_mock.get.call_count == 2
+
+    def test__connection_error_on_get__is_retried(self, client, session_mock):
+        session_mock.get.side_effect = [requests.ConnectionError(), DevicesGet.response]
+
+        with client:
+            assert client.root.devices.get() == [DEVICE_ID]
+            assert session_mock.get.call_count == 2
+
+    def test__transient_status_on_patch__is_not_retried(self, client, session_mock):
+        session_mock.patch.return_value = create_mock_response(503)
+
+        with client:
+            client.root.devices(DEVICE_ID).patch(
+                DeviceModel(desired_state=DevicesWithIdPatch.desired_state))
+            assert session_mock.patch.call_count == 1
+            assert session_mock.patch.return_value.raise_for_status.called
+
+    def test__retries_exhausted__raises_for_status(self, client, session_mock):
+        session_mock.get.return_value = create_mock_response(503)
+        session_mock.get.return_value.raise_for_status.side_effect = requests.HTTPError()
+
+        with client:
+            with pytest.raises(requests.HTTPError):
+                client.root.devices.get()
+            assert session_mock.get.call_count == 4
+
+
 class TestDevicesEndpoint:
 
     def test__post_with_device_id__raises_value_error(self, client):
@@ -85,6 +210,47 @@ class TestDevicesEndpoint:
         with pytest.raises(ValueError):
             client.root.devices.patch(DeviceModel())
 
+    def test__iter__streams_devices(self, client, session_mock):
+        body = json.dumps({'data': [{'id': 'a'}, {'id': 'b'}], 'message': 'ok'}).encode()
+        response = create_mock_response(200)
+        response.iter_content.return_value = [body[i:i + 5] for i in range(0, len(body), 5)]
+        session_mock.get.return_value = response
+        with client:
+            devices = client.root.devices.iter()
+            assert not session_mock.get.called
+            assert list(devices) == ['a', 'b']
+            assert session_mock.get.call_args.kwargs['stream'] is True
+            assert response.close.called
+            assert not response.content
+
+    def test__iter_with_error_status__raises(self, client, session_mock):
+        session_mock.get.return_value = create_mock_response(404, message='Not found')
+        session_mock.get.return_value.raise_for_status.side_effect = requests.HTTPError
+        with client:
+            with pytest.raises(requests.HTTPError):
+                list(client.root.devices.claimed.iter(include_details=True))
+
+    def test__iter_with_device_id__raises_value_error(self, client):
+        with pytest.raises(ValueError):
+            client.root.devices(DEVICE_ID).iter()
+
+    @pytest.mark.parametrize('endpoint', ['devices', 'claimed'])
+    def test__iter_with_async_session__raises_type_error(self, endpoint):
+        session_mock = Mock()
+        for method in ['get', 'post', 'put', 'patch', 'delete', 'aclose']:
+            setattr(session_mock, method, AsyncMock())
+        session_mock.post.return_value = AuthSigningPost.response
+        client = AsyncApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock)
+
+        async def run():
+            async with client:
+                devices = client.root.devices
+                with pytest.raises(TypeError):
+                    (devices if endpoint == 'devices' else devices.claimed).iter()
+
+        asyncio.run(run())
+        session_mock.get.assert_not_called()
+
 
 class TestDevicesClaimEndpoint:
 
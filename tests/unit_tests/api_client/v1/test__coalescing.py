@@ -0,0 +1,111 @@
+"""
+This module tests the coalescing of concurrent identical requests.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, AsyncMock
+
+import pytest
+
+from boum.api_client.v1.async_client import AsyncApiClient
+from boum.api_client.v1.client import ApiClient, ClientConfig
+from boum.api_client.v1.coalescing import RequestCoalescer
+from tests.fixtures.api import AuthSigningPost, DevicesGet, EMAIL, PASSWORD, BASE_URL, DEVICE_ID
+
+
+class TestRequestCoalescer:
+
+    def test__concurrent_calls_with_same_key__share_one_call(self):
+        coalescer = RequestCoalescer()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def request():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return object()
+
+        with ThreadPoolExecutor(4) as executor:
+            leader = executor.submit(coalescer.run, 'key', request)
+            started.wait(5)
+            followers = [executor.submit(coalescer.run, 'key', request) for _ in range(3)]
+            time.sleep(0.1)
+            release.set()
+            results = [leader.result()] + [f.result() for f in followers]
+
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+
+    def test__exception__is_raised_for_all_callers_and_key_is_released(self):
+        coalescer = RequestCoalescer()
+
+        def request():
+            raise KeyError()
+
+        with pytest.raises(KeyError):
+            coalescer.run('key', request)
+        assert coalescer.run('key', lambda: 1) == 1
+
+    def test__async_calls_with_same_key__share_one_call(self):
+        coalescer = RequestCoalescer()
+        async def sleep_and_return():
+            await asyncio.sleep(0.05)
+            return 'result'
+
+        request = AsyncMock(side_effect=sleep_and_return)
+
+        async def run():
+            return await asyncio.gather(*(coalescer.run_async('key', request) for _ in range(5)))
+
+        assert asyncio.run(run()) == ['result'] * 5
+        assert request.await_count == 1
+
+
+class TestClientCoalescing:
+
+    def test__concurrent_identical_gets__send_one_request(self):
+        session_mock = Mock()
+        session_mock.post.return_value = AuthSigningPost.response
+
+        def get(**_):
+            time.sleep(0.2)
+            return DevicesGet.response
+
+        session_mock.get.side_effect = get
+        client = ApiClient(
+            EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock,
+            config=ClientConfig(coalesce_requests=True))
+
+        with client:
+            with ThreadPoolExecutor(5) as executor:
+                results = list(executor.map(lambda _: client.root.devices.get(), range(5)))
+
+        assert results == [[DEVICE_ID]] * 5
+        assert session_mock.get.call_count == 1
+
+    def test__async_concurrent_identical_gets__send_one_request(self):
+        session_mock = Mock()
+        for method in ['get', 'post', 'put', 'patch', 'delete', 'aclose']:
+            setattr(session_mock, method, AsyncMock())
+        session_mock.post.return_value = AuthSigningPost.response
+
+        async def get(**_):
+            await asyncio.sleep(0.05)
+            return DevicesGet.response
+
+        session_mock.get.side_effect = get
+        client = AsyncApiClient(
+            EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock,
+            config=ClientConfig(coalesce_requests=True))
+
+        async def run():
+            async with client:
+                return await asyncio.gather(*(client.root.devices.get() for _ in range(5)))
+
+        assert asyncio.run(run()) == [[DEVICE_ID]] * 5
+        assert session_mock.get.await_count == 1
@@ -0,0 +1,74 @@
+"""
+This module tests the JSON codecs and the decoding of response bodies into response envelopes.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+
+from boum.api_client.v1 import codec as codec_module
+from boum.api_client.v1.client import ApiClient, ClientConfig
+from boum.api_client.v1.codec import StdlibJsonCodec, OrjsonCodec, default_codec
+from tests.fixtures.api import AuthSigningPost, DevicesWithIdDataGet, EMAIL, PASSWORD, BASE_URL, \
+    DEVICE_ID, create_mock_response
+
+
+class CountingCodec(StdlibJsonCodec):
+    def __init__(self):
+        self.calls = 0
+
+    def loads(self, content):
+        self.calls += 1
+        return super().loads(content)
+
+
+@pytest.mark.parametrize('codec_type', [StdlibJsonCodec, OrjsonCodec])
+def test__codecs__decode_bytes_and_raise_value_error_on_invalid_json(codec_type):
+    if codec_type is OrjsonCodec:
+        pytest.importorskip('orjson')
+    codec = codec_type()
+    assert codec.loads(b'{"data": [1.5, null]}') == {'data': [1.5, None]}
+    with pytest.raises(ValueError):
+        codec.loads(b'<html>')
+
+
+def test__default_codec__is_orjson_if_installed():
+    pytest.importorskip('orjson')
+    assert isinstance(default_codec(), OrjsonCodec)
+
+
+def test__default_codec__without_orjson__is_stdlib(monkeypatch):
+    monkeypatch.setattr(codec_module, 'orjson', None)
+    assert isinstance(default_codec(), StdlibJsonCodec)
+
+
+class TestResponseEnvelope:
+
+    @pytest.fixture
+    def codec(self):
+        return CountingCodec()
+
+    @pytest.fixture
+    def client(self, codec):
+        session_mock = Mock()
+        session_mock.post.return_value = AuthSigningPost.response
+        session_mock.get.return_value = DevicesWithIdDataGet.response
+        with ApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock,
+                       config=ClientConfig(json_codec=codec)) as client:
+            client.session_mock = session_mock
+            yield client
+
+    def test__response_body__is_decoded_once(self, client, codec):
+        codec.calls = 0
+        result = client.root.devices(DEVICE_ID).data.get()
+        assert result.data == DevicesWithIdDataGet.data_clean
+        assert codec.calls == 1
+
+    def test__body_is_not_json__message_is_no_message(self, client):
+        response = create_mock_response(200)
+        response.content = b'<html>'
+        # pylint: disable=protected-access
+        envelope = client.root.devices._parse_envelope(response)
+        assert envelope.message == 'No message'
+        assert envelope.data is None
+        assert envelope.is_success
@@ -77,3 +77,41 @@ def test__request_attempt_with_not_connected_endpoint__raises_runtime_error():
     # noinspection PyTypeChecker
     with pytest.raises(RuntimeError):
         root.endpoint_b('1').get()
+
+
+def test__repeated_attribute_access__returns_cached_endpoints():
+    root = EndpointRoot('base')
+    assert root.endpoint_a is root.endpoint_a
+    assert root.endpoint_a.endpoint_c is root.endpoint_a.endpoint_c
+    assert root.endpoint_b('1') is root.endpoint_b('1')
+    assert root.endpoint_b('1').endpoint_d is root.endpoint_b('1').endpoint_d
+    assert root.endpoint_b('1') is not root.endpoint_b('2')
+
+
+def test__resource_endpoints__are_evicted_least_recently_used_first(monkeypatch):
+    monkeypatch.setattr(EndpointB, '_resource_cache_size', 2)
+    root = EndpointRoot('base')
+    endpoint_1 = root.endpoint_b('1')
+    root.endpoint_b('2')
+    assert root.endpoint_b('1') is endpoint_1
+    root.endpoint_b('3')
+
+    assert root.endpoint_b('1') is endpoint_1
+    # pylint: disable=protected-access
+    assert list(root.endpoint_b._resources) == ['3', '1']
+
+
+def test__session_set_on_root__is_used_by_cached_endpoints():
+    root = EndpointRoot('base')
+    endpoint = root.endpoint_b('1')
+    # The session is a property that writes to the shared context
+    # pylint: disable=attribute-defined-outside-init
+    root.session = 'session'
+    assert endpoint.session == 'session'
+
+
+def test__path_templates__replace_resource_ids_and_omit_base():
+    root = EndpointRoot('base')
+    assert root.path_template == ''
+    assert root.endpoint_a.path_template == '/a'
+    assert root.endpoint_a('3').endpoint_c('4').path_template == '/a/{id}/c/{id}'
@@ -0,0 +1,188 @@
+"""
+This module tests the background shipping of device logs.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+import uuid
+from unittest.mock import Mock, AsyncMock
+
+import pytest
+import requests
+
+from boum.api_client.v1.async_client import AsyncApiClient
+from boum.api_client.v1.client import ApiClient, ClientConfig
+from boum.api_client.v1.log_shipper import DeviceLogShipper
+from boum.api_client.v1.models import DeviceLogModel
+from boum.api_client.v1.retry import RetryPolicy
+from tests.fixtures.api import AuthSigningPost, EMAIL, PASSWORD, BASE_URL, create_mock_response
+
+
+DEVICE_IDS = [str(uuid.uuid4()) for _ in range(3)]
+
+
+def create_log(device_id: str = DEVICE_IDS[0]) -> DeviceLogModel:
+    return DeviceLogModel(
+        message='message', type='default', level='info', payload={}, device_id=device_id)
+
+
+@pytest.fixture
+def session_mock():
+    session_mock = Mock()
+    session_mock.post.return_value = AuthSigningPost.response
+    return session_mock
+
+
+@pytest.fixture
+def client(session_mock):
+    return ApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock,
+                     config=ClientConfig(retry_policy=RetryPolicy(max_retries=0)))
+
+
+def log_post_urls(session_mock) -> list[str]:
+    return sorted(c.kwargs['url'] for c in session_mock.post.call_args_list
+                  if c.kwargs['url'].endswith('/log'))
+
+
+class TestDeviceLogShipper:
+
+    def test__submitted_logs__are_sent_on_flush(self, client, session_mock):
+        with client:
+            session_mock.post.return_value = create_mock_response(200)
+            shipper = client.create_log_shipper(batch_size=2, flush_interval=0.01)
+            for device_id in DEVICE_IDS:
+                shipper.submit(create_log(device_id))
+            shipper.flush()
+
+            assert shipper.sent == 3
+            assert log_post_urls(session_mock) == sorted(
+                f'{BASE_URL}/v1/devices/{device_id}/log' for device_id in DEVICE_IDS)
+
+    def test__disconnect__drains_queue(self, client, session_mock):
+        with client:
+            session_mock.post.return_value = create_mock_response(200)
+            shipper = client.create_log_shipper(flush_interval=60)
+            shipper.submit(create_log())
+
+        assert len(log_post_urls(session_mock)) == 1
+        with pytest.raises(RuntimeError):
+            shipper.submit(create_log())
+
+    def test__failed_logs__are_passed_to_on_error(self, client, session_mock):
+        on_error = Mock()
+        with client:
+            session_mock.post.side_effect = requests.ConnectionError()
+            shipper = client.create_log_shipper(flush_interval=0, on_error=on_error)
+            device_log = create_log()
+            shipper.submit(device_log)
+            shipper.flush()
+
+        assert shipper.failed == 1
+        assert on_error.call_args.args[0] is device_log
+        assert isinstance(on_error.call_args.args[1], requests.ConnectionError)
+
+    def test__failing_on_error__does_not_stop_shipper(self, client, session_mock):
+        on_error = Mock(side_effect=ValueError())
+        with client:
+            session_mock.post.side_effect = requests.ConnectionError()
+            shipper = client.create_log_shipper(flush_interval=0, on_error=on_error)
+            shipper.submit(create_log())
+            shipper.flush()
+            session_mock.post.side_effect = None
+            session_mock.post.return_value = create_mock_response(200)
+            shipper.submit(create_log())
+            shipper.flush()
+
+        assert (shipper.failed, shipper.sent) == (1, 1)
+
+    @pytest.fixture
+    def blocked_shipper(self, client, session_mock):
+        """A shipper whose sender is blocked and whose buffer is full until `release` is set."""
+        release = threading.Event()
+
+        def post(**_):
+            release.wait(5)
+            return create_mock_response(200)
+
+        with client:
+            session_mock.post.side_effect = post
+            shipper = client.create_log_shipper(
+                max_queue_size=1, batch_size=1, flush_interval=0)
+            shipper.submit(create_log())  # taken by the background thread
+            shipper.submit(create_log())  # fills the queue
+            shipper.release = release
+            yield shipper
+            release.set()
+
+    def test__producers_on_full_queue__keep_their_timeouts(self, blocked_shipper):
+        producer = threading.Thread(target=blocked_shipper.submit, args=(create_log(),))
+        producer.start()
+        started_at = time.monotonic()
+        with pytest.raises(queue.Full):
+            blocked_shipper.submit(create_log(), timeout=0.2)
+        assert time.monotonic() - started_at < 1
+
+        blocked_shipper.release.set()
+        producer.join(5)
+        blocked_shipper.flush()
+        assert blocked_shipper.sent == 3
+
+    def test__close__sends_logs_of_blocked_producers(self, blocked_shipper):
+        producer = threading.Thread(target=blocked_shipper.submit, args=(create_log(),))
+        producer.start()
+        time.sleep(0.1)
+        closer = threading.Thread(target=blocked_shipper.close)
+        closer.start()
+        time.sleep(0.1)
+
+        blocked_shipper.release.set()
+        producer.join(5)
+        closer.join(5)
+        assert blocked_shipper.sent == 3
+        with pytest.raises(RuntimeError):
+            blocked_shipper.submit(create_log())
+
+    def test__full_queue__applies_backpressure(self, client, session_mock):
+        release = threading.Event()
+
+        def post(**_):
+            release.wait(5)
+            return create_mock_response(200)
+
+        with client:
+            session_mock.post.side_effect = post
+            shipper = client.create_log_shipper(
+                max_queue_size=1, batch_size=1, flush_interval=0)
+            shipper.submit(create_log())  # taken by the background thread
+            shipper.submit(create_log())  # fills the queue
+            with pytest.raises(queue.Full):
+                shipper.submit(create_log(), timeout=0.1)
+            release.set()
+
+    def test__submit_without_log_model__raises_value_error(self, client):
+        shipper = DeviceLogShipper(client)
+        with pytest.raises(ValueError):
+            shipper.submit({'message': 'message'})
+        shipper.close()
+
+
+def test__async_shipper__sends_logs_and_drains_on_disconnect():
+    session_mock = Mock()
+    for method in ['get', 'post', 'put', 'patch', 'delete', 'aclose']:
+        setattr(session_mock, method, AsyncMock())
+    session_mock.post.return_value = AuthSigningPost.response
+    client = AsyncApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock)
+
+    async def run():
+        async with client:
+            session_mock.post.return_value = create_mock_response(200)
+            shipper = client.create_log_shipper(batch_size=2, flush_interval=60)
+            for device_id in DEVICE_IDS:
+                await shipper.submit(create_log(device_id))
+        return shipper
+
+    shipper = asyncio.run(run())
+    assert shipper.sent == 3
+    assert len(log_post_urls(session_mock)) == 3
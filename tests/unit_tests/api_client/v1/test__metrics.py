@@ -0,0 +1,126 @@
+"""
+This module tests the metrics registry and the recording of request metrics by the endpoints.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+import requests
+
+from boum.api_client.v1.client import ApiClient, ClientConfig
+from boum.api_client.v1.metrics import Histogram, MetricsRegistry
+from boum.api_client.v1.retry import RetryPolicy
+from tests.fixtures.api import AuthSigningPost, AuthTokenPost, DevicesGet, Shared, EMAIL, \
+    PASSWORD, BASE_URL, DEVICE_ID, DevicesWithIdDataGet, create_mock_response
+
+
+class TestHistogram:
+
+    def test__unsorted_buckets__raise_value_error(self):
+        with pytest.raises(ValueError):
+            Histogram((1.0, 0.5))
+
+    def test__quantiles__are_interpolated_within_buckets(self):
+        histogram = Histogram((1.0, 2.0, 4.0))
+        for value in [0.5, 1.5, 1.5, 3.0]:
+            histogram.observe(value)
+
+        assert histogram.counts == [1, 2, 1, 0]
+        assert histogram.quantile(0.5) == pytest.approx(1.5)
+        assert histogram.quantile(1.0) == pytest.approx(4.0)
+
+    def test__overflow__is_estimated_with_largest_bound(self):
+        histogram = Histogram((1.0,))
+        histogram.observe(10.0)
+        assert histogram.quantile(0.99) == 1.0
+
+    def test__empty__has_no_quantiles(self):
+        assert Histogram((1.0,)).quantile(0.5) is None
+
+
+class TestMetricsRegistry:
+
+    def test__requests__are_grouped_by_method_and_path(self):
+        metrics = MetricsRegistry()
+        metrics.record_request('GET', '/devices', 0.1, 200, 10, 0.001)
+        metrics.record_request('GET', '/devices', 0.2, 503, 0)
+        metrics.record_request('PATCH', '/devices/{id}', 0.3)
+
+        snapshot = metrics.snapshot()
+        assert list(snapshot) == ['GET /devices', 'PATCH /devices/{id}']
+        assert snapshot['GET /devices']['requests'] == 2
+        assert snapshot['GET /devices']['errors'] == 1
+        assert snapshot['GET /devices']['status_codes'] == {200: 1, 503: 1}
+        assert snapshot['GET /devices']['response_bytes'] == 10
+        assert snapshot['GET /devices']['parse_time']['count'] == 1
+        assert snapshot['PATCH /devices/{id}']['errors'] == 1
+
+    def test__export_prometheus__contains_cumulative_buckets(self):
+        metrics = MetricsRegistry(latency_buckets=(0.1, 1.0))
+        metrics.record_request('GET', '/devices', 0.05, 200)
+        metrics.record_request('GET', '/devices', 0.5, 200)
+
+        text = metrics.export_prometheus()
+        labels = 'method="GET",path="/devices"'
+        assert f'boum_api_requests_total{{{labels}}} 2' in text
+        assert f'boum_api_latency_seconds_bucket{{{labels},le="0.1"}} 1' in text
+        assert f'boum_api_latency_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+        assert f'boum_api_responses_total{{{labels},status="200"}} 2' in text
+
+    def test__reset__clears_all_metrics(self):
+        metrics = MetricsRegistry()
+        metrics.record_retry('GET', '/devices')
+        metrics.reset()
+        assert metrics.snapshot() == {}
+
+
+class TestClientMetrics:
+
+    @pytest.fixture
+    def session_mock(self):
+        session_mock = Mock()
+        session_mock.post.return_value = AuthSigningPost.response
+        return session_mock
+
+    @pytest.fixture
+    def client(self, session_mock):
+        return ApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock,
+                         config=ClientConfig(retry_policy=RetryPolicy(backoff_factor=0),
+                                             metrics=MetricsRegistry()))
+
+    def test__requests__are_recorded_per_path_template(self, client, session_mock):
+        session_mock.get.side_effect = [DevicesGet.response, DevicesWithIdDataGet.response]
+
+        with client:
+            client.root.devices.get()
+            client.root.devices(DEVICE_ID).data.get()
+
+        snapshot = client.metrics.snapshot()
+        assert snapshot['POST /auth/signin']['requests'] == 1
+        assert snapshot['GET /devices']['status_codes'] == {200: 1}
+        assert snapshot['GET /devices']['response_bytes'] == len(DevicesGet.response.content)
+        assert snapshot['GET /devices/{id}/data']['latency']['count'] == 1
+
+    def test__retries_and_errors__are_recorded(self, client, session_mock):
+        session_mock.get.side_effect = [
+            requests.ConnectionError(), create_mock_response(503), DevicesGet.response]
+
+        with client:
+            client.root.devices.get()
+
+        devices_metrics = client.metrics.snapshot()['GET /devices']
+        assert devices_metrics['requests'] == 3
+        assert devices_metrics['errors'] == 2
+        assert devices_metrics['retries'] == 2
+
+    def test__token_refreshes__are_recorded(self, client, session_mock):
+        session_mock.get.side_effect = [Shared.response_access_token_expired, DevicesGet.response]
+        session_mock.post.side_effect = [AuthSigningPost.response, AuthTokenPost.response]
+
+        with client:
+            client.root.devices.get()
+
+        assert client.metrics.snapshot()['GET /devices']['token_refreshes'] == 1
+
+    def test__without_registry__metrics_are_none(self, session_mock):
+        assert ApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock).metrics is None
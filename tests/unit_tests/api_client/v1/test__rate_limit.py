@@ -0,0 +1,81 @@
+"""
+This module tests the client-side rate limiter and its application to the requests of the client.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+
+from boum.api_client.v1 import endpoint, rate_limit
+from boum.api_client.v1.client import ApiClient, ClientConfig
+from boum.api_client.v1.rate_limit import RateLimit, RateLimiter, TokenBucket
+from tests.fixtures.api import AuthSigningPost, DevicesGet, EMAIL, PASSWORD, BASE_URL
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Mock(return_value=100.0)
+    monkeypatch.setattr(rate_limit.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.mark.parametrize('rate, burst', [(0, None), (-1, None), (1, 0.5)])
+def test__invalid_rate_limit__raises_value_error(rate, burst):
+    with pytest.raises(ValueError):
+        RateLimit(rate, burst)
+
+
+class TestTokenBucket:
+
+    @pytest.mark.usefixtures('clock')
+    def test__requests_beyond_burst__are_delayed_by_rate(self):
+        bucket = TokenBucket(RateLimit(rate=10, burst=2))
+        delays = [bucket.reserve() for _ in range(4)]
+        assert delays == pytest.approx([0, 0, 0.1, 0.2])
+
+    def test__tokens__are_refilled_up_to_burst(self, clock):
+        bucket = TokenBucket(RateLimit(rate=10, burst=2))
+        bucket.reserve()
+        bucket.reserve()
+        clock.return_value += 60
+        delays = [bucket.reserve() for _ in range(3)]
+        assert delays == pytest.approx([0, 0, 0.1])
+
+
+class TestRateLimiter:
+
+    @pytest.mark.usefixtures('clock')
+    def test__first_matching_pattern__applies_in_addition_to_default(self):
+        limiter = RateLimiter(RateLimit(rate=100, burst=100), endpoints={
+            '/devices/{id}/log': RateLimit(rate=1, burst=1),
+            '/devices/*': RateLimit(rate=100, burst=100)})
+
+        assert limiter.reserve('/devices/{id}/log') == 0
+        assert limiter.reserve('/devices/{id}/log') == pytest.approx(1)
+        assert limiter.reserve('/devices/{id}') == 0
+
+    @pytest.mark.usefixtures('clock')
+    def test__paths_matching_a_pattern__share_its_bucket(self):
+        limiter = RateLimiter(endpoints={'/auth/*': RateLimit(rate=1, burst=1)})
+
+        assert limiter.reserve('/auth/signin') == 0
+        assert limiter.reserve('/auth/token') == pytest.approx(1)
+        assert limiter.reserve('/devices') == 0
+
+
+@pytest.mark.usefixtures('clock')
+def test__client_requests__wait_for_rate_limiter(monkeypatch):
+    sleep = Mock()
+    monkeypatch.setattr(endpoint.time, 'sleep', sleep)
+    session_mock = Mock()
+    session_mock.post.return_value = AuthSigningPost.response
+    session_mock.get.return_value = DevicesGet.response
+    rate_limiter = RateLimiter(endpoints={'/devices': RateLimit(rate=2, burst=1)})
+    client = ApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock,
+                       config=ClientConfig(rate_limiter=rate_limiter))
+
+    with client:
+        client.root.devices.get()
+        client.root.devices.get()
+
+    assert sleep.call_args_list == [((0.5,),)]
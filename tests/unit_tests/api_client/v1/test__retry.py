@@ -0,0 +1,84 @@
+"""
+This module tests the decisions of the retry policy and the retry budget.
+"""
+
+import pytest
+import requests
+
+from boum.api_client.v1.retry import RetryPolicy, RetryBudget
+from tests.fixtures.api import create_mock_response
+
+
+class TestRetryPolicy:
+
+    @pytest.mark.parametrize('status_code', [429, 502, 503, 504])
+    def test__retryable_status_for_get__returns_delay(self, status_code):
+        policy = RetryPolicy(jitter=False, budget=None)
+        response = create_mock_response(status_code)
+        assert policy.get_retry_delay('GET', 0, response=response) == 0.5
+
+    @pytest.mark.parametrize('status_code', [200, 400, 401, 404, 500])
+    def test__other_status__returns_none(self, status_code):
+        policy = RetryPolicy(budget=None)
+        response = create_mock_response(status_code)
+        assert policy.get_retry_delay('GET', 0, response=response) is None
+
+    def test__non_idempotent_method__only_retried_on_429(self):
+        policy = RetryPolicy(budget=None)
+        assert policy.get_retry_delay('PATCH', 0, response=create_mock_response(503)) is None
+        assert policy.get_retry_delay('PATCH', 0, response=create_mock_response(429)) is not None
+
+    def test__transport_error__only_retried_for_idempotent_method(self):
+        policy = RetryPolicy(budget=None)
+        error = requests.ConnectionError('Connection reset by peer')
+        assert policy.get_retry_delay('GET', 0, error=error) is not None
+        assert policy.get_retry_delay('POST', 0, error=error) is None
+
+    def test__max_retries_reached__returns_none(self):
+        policy = RetryPolicy(max_retries=2, budget=None)
+        response = create_mock_response(503)
+        assert policy.get_retry_delay('GET', 1, response=response) is not None
+        assert policy.get_retry_delay('GET', 2, response=response) is None
+
+    def test__backoff__is_exponential_and_capped(self):
+        policy = RetryPolicy(backoff_factor=1, max_backoff=5, jitter=False)
+        assert [policy.backoff(a) for a in range(5)] == [1, 2, 4, 5, 5]
+
+    def test__backoff_with_jitter__is_within_bounds(self):
+        policy = RetryPolicy(backoff_factor=1, max_backoff=5)
+        assert all(0 <= policy.backoff(3) <= 5 for _ in range(100))
+
+    def test__retry_after_seconds__is_used_as_delay(self):
+        policy = RetryPolicy(budget=None)
+        response = create_mock_response(429, headers={'Retry-After': '7'})
+        assert policy.get_retry_delay('POST', 0, response=response) == 7
+
+    def test__retry_after_http_date_in_the_past__returns_zero(self):
+        response = create_mock_response(
+            503, headers={'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+        assert RetryPolicy.retry_after(response) == 0
+
+    def test__retry_after_above_maximum__returns_none(self):
+        policy = RetryPolicy(max_retry_after=10, budget=None)
+        response = create_mock_response(503, headers={'Retry-After': '60'})
+        assert policy.get_retry_delay('GET', 0, response=response) is None
+
+    def test__budget_exhausted__returns_none(self):
+        policy = RetryPolicy(budget=RetryBudget(ratio=0, max_tokens=1))
+        response = create_mock_response(503)
+        assert policy.get_retry_delay('GET', 0, response=response) is not None
+        assert policy.get_retry_delay('GET', 0, response=response) is None
+
+
+class TestRetryBudget:
+
+    def test__deposits__refill_up_to_max_tokens(self):
+        budget = RetryBudget(ratio=0.5, max_tokens=2)
+        assert budget.withdraw() and budget.withdraw()
+        assert not budget.withdraw()
+        budget.deposit()
+        budget.deposit()
+        assert budget.withdraw()
+        for _ in range(10):
+            budget.deposit()
+        assert budget.tokens == 2
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from boum.api_client.v1.streaming import iter_json_array
+
+
+def chunked(document, size: int = 1) -> list[bytes]:
+    body = json.dumps(document, ensure_ascii=False).encode('utf-8')
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+class TestIterJsonArray:
+    @pytest.mark.parametrize('size', [1, 3, 1000])
+    def test__items__are_decoded_across_chunks(self, size):
+        items = [{'id': 'ä€', 'n': 12345}, 67890, 1.5e10, 'text', None, [1, [2]], True]
+        document = {'message': 'ok', 'data': items, 'after': {'ignored': [1]}}
+        assert list(iter_json_array(chunked(document, size))) == items
+
+    def test__top_level_array__works(self):
+        assert list(iter_json_array(chunked([1, 22, 333], 2), key=None)) == [1, 22, 333]
+
+    @pytest.mark.parametrize('document', [{'message': 'ok'}, {'data': None}, {'data': []}])
+    def test__missing_null_or_empty_array__yields_nothing(self, document):
+        assert not list(iter_json_array(chunked(document)))
+
+    def test__items__are_decoded_lazily(self):
+        def chunks():
+            yield b'{"data": [1, '
+            yield b'2, '
+            raise AssertionError('Read too far')
+
+        items = iter_json_array(chunks())
+        assert next(items) == 1
+
+    @pytest.mark.parametrize('body', [b'{"data": [1 2]}', b'{"data": [1, ', b'[1]'])
+    def test__invalid_document__raises(self, body):
+        with pytest.raises(ValueError):
+            list(iter_json_array([body]))
@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from boum.api_client.v1 import telemetry
+from boum.api_client.v1.models import DeviceDataModel
+from boum.api_client.v1.telemetry import TelemetryColumns, parse_timestamps, parse_values, \
+    concat_columns, stack_columns
+from tests.fixtures.api import DevicesWithIdDataGet, DEVICE_ID
+
+
+class TestParseTimestamps:
+    def test__api_format__is_parsed(self):
+        result = parse_timestamps(['2022-01-02T03:04:05Z', '2023-06-07T08:09:10.123Z'])
+        assert result.dtype == np.dtype('datetime64[ns]')
+        assert list(result) == [np.datetime64('2022-01-02T03:04:05'),
+                                np.datetime64('2023-06-07T08:09:10.123')]
+
+    def test__offsets__are_converted_to_utc(self):
+        result = parse_timestamps(['2022-01-02T03:04:05+02:00', '2022-01-02T03:04:05Z'])
+        assert list(result) == [np.datetime64('2022-01-02T01:04:05'),
+                                np.datetime64('2022-01-02T03:04:05')]
+
+    def test__empty__works(self):
+        assert parse_timestamps([]).dtype == np.dtype('datetime64[ns]')
+
+
+class TestParseValues:
+    def test__numbers_and_nulls__are_parsed(self):
+        result = parse_values([1.5, None, 2, '3.5'])
+        assert result.dtype == np.float64
+        np.testing.assert_array_equal(result, [1.5, np.nan, 2.0, 3.5])
+
+    def test__non_numeric_values__become_nan(self):
+        np.testing.assert_array_equal(parse_values(['a', 1, {}]), [np.nan, 1.0, np.nan])
+
+
+class TestTelemetryColumns:
+    def test__from_payload__matches_device_data_model(self):
+        result = TelemetryColumns.from_payload(DevicesWithIdDataGet.data)
+        expected = DeviceDataModel.from_payload(DevicesWithIdDataGet.data).data
+
+        assert result.device_id == DEVICE_ID
+        assert len(result) == 2
+        assert [t.astype('datetime64[us]').item() for t in result.timestamps] == \
+            [t.replace(tzinfo=None) for t in expected['timestamp']]
+        np.testing.assert_array_equal(result.values['someValue'], [1.1, np.nan])
+
+    def test__slice__returns_views(self):
+        columns = TelemetryColumns.from_payload(DevicesWithIdDataGet.data)
+        result = columns[1:]
+        assert len(result) == 1
+        assert np.shares_memory(result.values['someValue'], columns.values['someValue'])
+
+    def test__concat_columns__fills_missing_metrics_with_nan(self):
+        first = TelemetryColumns(DEVICE_ID, parse_timestamps(['2022-01-02T03:04:05Z']),
+                                 {'a': parse_values([1])})
+        second = TelemetryColumns(DEVICE_ID, parse_timestamps(['2022-01-02T03:04:06Z']),
+                                  {'b': parse_values([2])})
+        result = concat_columns([first, second])
+        assert len(result) == 2
+        np.testing.assert_array_equal(result.values['a'], [1, np.nan])
+        np.testing.assert_array_equal(result.values['b'], [np.nan, 2])
+
+    def test__different_lengths__raise_value_error(self):
+        with pytest.raises(ValueError):
+            TelemetryColumns(DEVICE_ID, parse_timestamps(['2022-01-02T03:04:05Z']),
+                             {'someValue': parse_values([1, 2])})
+
+    def test__without_numpy__raises_import_error(self, monkeypatch):
+        monkeypatch.setattr(telemetry, 'np', None)
+        with pytest.raises(ImportError):
+            TelemetryColumns.from_payload(DevicesWithIdDataGet.data)
+
+
+
+class TestConvert:
+    @pytest.fixture
+    def columns(self):
+        return TelemetryColumns.from_payload(DevicesWithIdDataGet.data)
+
+    def test__numpy__does_not_copy_values(self, columns):
+        result = columns.convert('numpy')
+        assert result['someValue'] is columns.values['someValue']
+        assert result['timestamp'] is columns.timestamps
+        assert list(result['deviceId']) == [DEVICE_ID, DEVICE_ID]
+
+    def test__pandas__does_not_copy_values(self, columns):
+        result = columns.convert('pandas')
+        assert isinstance(result, pd.DataFrame)
+        assert np.shares_memory(result['someValue'].to_numpy(), columns.values['someValue'])
+        assert str(result['timestamp'].dt.tz) == 'UTC'
+        assert list(result['deviceId']) == [DEVICE_ID, DEVICE_ID]
+
+    def test__arrow__has_nulls_for_nan(self, columns):
+        pa = pytest.importorskip('pyarrow')
+        result = columns.convert('arrow')
+        assert isinstance(result, pa.Table)
+        assert result.column('someValue').to_pylist() == [1.1, None]
+        assert result.column('deviceId').to_pylist() == [DEVICE_ID, DEVICE_ID]
+
+    def test__columns__returns_itself(self, columns):
+        assert columns.convert('columns') is columns
+
+    def test__unknown_format__raises_value_error(self, columns):
+        with pytest.raises(ValueError):
+            columns.convert('csv')
+
+    @pytest.mark.parametrize('module, as_', [('pd', 'pandas'), ('pa', 'arrow')])
+    def test__missing_library__raises_import_error(self, columns, monkeypatch, module, as_):
+        monkeypatch.setattr(telemetry, module, None)
+        with pytest.raises(ImportError):
+            columns.convert(as_)
+
+
+class TestStackColumns:
+    @pytest.fixture
+    def columns(self):
+        return stack_columns([
+            TelemetryColumns(
+                'a', parse_timestamps(['2022-01-02T03:04:05Z', '2022-01-02T03:04:06Z']),
+                {'x': parse_values([1, 2])}),
+            TelemetryColumns('b', parse_timestamps([]), {'x': parse_values([])}),
+            TelemetryColumns('c', parse_timestamps(['2022-01-02T03:04:05Z']),
+                             {'y': parse_values([3])})])
+
+    def test__devices__are_stacked_in_order(self, columns):
+        assert len(columns) == 3
+        assert columns.device_ids == ['a', 'b', 'c']
+        np.testing.assert_array_equal(columns.codes, [0, 0, 2])
+        np.testing.assert_array_equal(columns.values['x'], [1, 2, np.nan])
+        np.testing.assert_array_equal(columns.values['y'], [np.nan, np.nan, 3])
+        assert columns.timestamps[2] == np.datetime64('2022-01-02T03:04:05')
+
+    def test__empty__works(self):
+        columns = stack_columns([])
+        assert len(columns) == 0
+        assert len(columns.convert('pandas')) == 0
+
+    def test__numpy__has_device_id_per_row(self, columns):
+        assert list(columns.convert('numpy')['deviceId']) == ['a', 'a', 'c']
+
+    def test__pandas__has_categorical_device_ids(self, columns):
+        result = columns.convert('pandas')
+        assert list(result['deviceId']) == ['a', 'a', 'c']
+        assert list(result['deviceId'].cat.categories) == ['a', 'b', 'c']
+        assert str(result['timestamp'].dt.tz) == 'UTC'
+        assert np.shares_memory(result['x'].to_numpy(), columns.values['x'])
+
+    def test__arrow__has_nulls_for_missing_metrics(self, columns):
+        pytest.importorskip('pyarrow')
+        result = columns.convert('arrow')
+        assert result.column('deviceId').to_pylist() == ['a', 'a', 'c']
+        assert result.column('y').to_pylist() == [None, None, 3.0]
@@ -0,0 +1,121 @@
+"""
+This module tests the token store backends and how the api client shares tokens through them.
+"""
+
+import asyncio
+import multiprocessing
+from unittest.mock import Mock, AsyncMock
+
+import pytest
+
+from boum.api_client.v1.async_client import AsyncApiClient
+from boum.api_client.v1.client import ApiClient, ClientConfig
+from boum.api_client.v1.token_store import FileTokenStore, SqliteTokenStore, StoredTokens
+from tests.fixtures.api import AuthSigningPost, AuthTokenPost, Shared, DevicesGet, EMAIL, \
+    PASSWORD, BASE_URL, ACCESS_TOKEN, REFRESH_TOKEN
+
+
+@pytest.fixture(params=[FileTokenStore, SqliteTokenStore])
+def store(request, tmp_path):
+    return request.param(tmp_path / 'tokens')
+
+
+def _increment_in_lock(store_type, path, key):
+    store = store_type(path)
+    for _ in range(20):
+        with store.lock(key):
+            stored = store.load(key)
+            count = int(stored.access_token) if stored else 0
+            store.save(key, StoredTokens(str(count + 1)))
+
+
+class TestTokenStores:
+
+    def test__load_unknown_key__returns_none(self, store):
+        assert store.load('unknown') is None
+
+    def test__saved_tokens__can_be_loaded(self, store):
+        with store.lock('key'):
+            store.save('key', StoredTokens(ACCESS_TOKEN, REFRESH_TOKEN))
+        store.save('other', StoredTokens('other'))
+
+        assert store.load('key') == StoredTokens(ACCESS_TOKEN, REFRESH_TOKEN)
+        assert store.load('other') == StoredTokens('other', None)
+
+    @pytest.mark.parametrize('store_type', [FileTokenStore, SqliteTokenStore])
+    def test__lock__is_exclusive_across_processes(self, store_type, tmp_path):
+        path = tmp_path / 'tokens'
+        store_type(path)
+        processes = [
+            multiprocessing.Process(target=_increment_in_lock, args=(store_type, path, 'key'))
+            for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        assert store_type(path).load('key').access_token == '80'
+
+
+class TestClientWithTokenStore:
+
+    @pytest.fixture
+    def session_mock(self):
+        session_mock = Mock()
+        session_mock.post.return_value = AuthSigningPost.response
+        return session_mock
+
+    def test__first_client__signs_in_and_saves_tokens(self, store, session_mock):
+        with ApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock,
+                       config=ClientConfig(token_store=store)):
+            assert session_mock.post.call_args_list == [AuthSigningPost.call]
+
+        assert store.load(EMAIL) == StoredTokens(ACCESS_TOKEN, REFRESH_TOKEN)
+
+    def test__second_client__reuses_stored_tokens(self, store, session_mock):
+        store.save(EMAIL, StoredTokens('stored_access_token', REFRESH_TOKEN))
+
+        with ApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock,
+                       config=ClientConfig(token_store=store)):
+            session_mock.post.assert_not_called()
+            assert session_mock.headers.update.call_args.args[0] == {
+                'Authorization': 'stored_access_token'}
+
+    def test__expired_stored_token__is_refreshed_and_saved(self, store, session_mock):
+        store.save(EMAIL, StoredTokens('expired_access_token', REFRESH_TOKEN))
+        session_mock.get.side_effect = [Shared.response_access_token_expired, DevicesGet.response]
+        session_mock.post.return_value = AuthTokenPost.response
+
+        with ApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock,
+                       config=ClientConfig(token_store=store)) as client:
+            client.root.devices.get()
+
+        assert session_mock.post.call_args_list == [AuthTokenPost.call]
+        assert store.load(EMAIL) == StoredTokens(ACCESS_TOKEN, REFRESH_TOKEN)
+
+
+class TestAsyncClientWithTokenStore:
+
+    def test__clients_sharing_store__sign_in_once(self, store):
+        session_mock = Mock()
+        for method in ['get', 'post', 'put', 'patch', 'delete', 'aclose']:
+            setattr(session_mock, method, AsyncMock())
+
+        async def post(*_, **__):
+            # Keeps the lock of the store while the other client tries to take it
+            await asyncio.sleep(0.1)
+            return AuthSigningPost.response
+
+        session_mock.post.side_effect = post
+
+        async def connect():
+            async with AsyncApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock,
+                                      config=ClientConfig(token_store=store)) as client:
+                return client.root.session.headers.update.call_args.args[0]
+
+        async def run():
+            return await asyncio.wait_for(asyncio.gather(connect(), connect()), timeout=10)
+
+        assert asyncio.run(run()) == [{'Authorization': ACCESS_TOKEN}] * 2
+        assert session_mock.post.call_count == 1
+        assert store.load(EMAIL) == StoredTokens(ACCESS_TOKEN, REFRESH_TOKEN)
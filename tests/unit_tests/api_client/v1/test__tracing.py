@@ -0,0 +1,140 @@
+"""
+This module tests the tracers and the spans that the api clients open around their requests.
+"""
+
+import asyncio
+from unittest.mock import Mock, AsyncMock
+
+import pytest
+
+from boum.api_client.v1.async_client import AsyncApiClient
+from boum.api_client.v1.client import ApiClient, ClientConfig
+from boum.api_client.v1.models import DeviceModel
+from boum.api_client.v1.retry import RetryPolicy
+from boum.api_client.v1 import tracing
+from boum.api_client.v1.tracing import RecordingTracer, OpenTelemetryTracer, NOOP_SPAN, \
+    start_span
+from tests.fixtures.api import AuthSigningPost, AuthTokenPost, DevicesGet, Shared, EMAIL, \
+    PASSWORD, BASE_URL, DEVICE_ID, DevicesWithIdPatch, DevicesWithIdDataGet, \
+    create_mock_response
+
+
+class TestRecordingTracer:
+
+    def test__nested_spans__are_recorded_with_parents(self):
+        tracer = RecordingTracer()
+        with tracer.start_span('outer', {'a': 1}) as outer:
+            with tracer.start_span('inner') as inner:
+                inner.set_attribute('b', 2)
+
+        assert [span.name for span in tracer.spans] == ['inner', 'outer']
+        assert inner.parent is outer
+        assert outer.parent is None
+        assert inner.attributes == {'b': 2}
+        assert outer.duration >= inner.duration >= 0
+
+    def test__exception__is_recorded_and_reraised(self):
+        tracer = RecordingTracer()
+        with pytest.raises(KeyError):
+            with tracer.start_span('failing'):
+                raise KeyError()
+
+        assert isinstance(tracer.spans[0].error, KeyError)
+        assert tracer.spans[0].end is not None
+
+
+def test__start_span_without_tracer__yields_noop_span():
+    with start_span(None, 'name') as span:
+        assert span is NOOP_SPAN
+
+
+def test__opentelemetry_tracer_without_opentelemetry__raises_import_error(monkeypatch):
+    monkeypatch.setattr(tracing, 'otel_trace', None)
+    with pytest.raises(ImportError):
+        OpenTelemetryTracer()
+
+
+class TestClientTracing:
+
+    @pytest.fixture
+    def tracer(self):
+        return RecordingTracer()
+
+    @pytest.fixture
+    def session_mock(self):
+        session_mock = Mock()
+        session_mock.post.return_value = AuthSigningPost.response
+        return session_mock
+
+    @pytest.fixture
+    def client(self, session_mock, tracer):
+        return ApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock,
+                         config=ClientConfig(retry_policy=RetryPolicy(backoff_factor=0),
+                                             tracer=tracer))
+
+    def test__request__has_nested_decode_span_and_sibling_parse_span(
+            self, client, session_mock, tracer):
+        session_mock.get.return_value = DevicesWithIdDataGet.response
+
+        with client:
+            tracer.clear()
+            client.root.devices(DEVICE_ID).data.get()
+
+        decode, request, parse = tracer.spans
+        assert decode.name == 'boum.json_decode' and decode.parent is request
+        assert request.name == 'boum.request'
+        assert request.attributes['http.method'] == 'GET'
+        assert request.attributes['http.route'] == '/devices/{id}/data'
+        assert request.attributes['http.status_code'] == 200
+        assert parse.name == 'boum.model_parse' and parse.parent is None
+
+    def test__retry_and_auth_refresh__are_nested_in_request(self, client, session_mock, tracer):
+        session_mock.get.side_effect = [
+            create_mock_response(503), Shared.response_access_token_expired, DevicesGet.response]
+        session_mock.post.side_effect = [AuthSigningPost.response, AuthTokenPost.response]
+
+        with client:
+            tracer.clear()
+            client.root.devices.get()
+
+        request = next(s for s in tracer.spans if s.name == 'boum.request' and s.parent is None)
+        children = [s for s in tracer.spans if s.parent is request]
+        assert [s.name for s in children] == [
+            'boum.json_decode', 'boum.retry', 'boum.json_decode', 'boum.auth_refresh',
+            'boum.json_decode']
+        auth_refresh = children[3]
+        assert auth_refresh.attributes['boum.token_source'] == 'api'
+        assert [s.name for s in tracer.spans if s.parent is auth_refresh] == [
+            'boum.request', 'boum.model_parse']
+        assert request.attributes['boum.retries'] == 1
+
+    def test__patch__has_serialize_span(self, client, session_mock, tracer):
+        session_mock.patch.return_value = DevicesWithIdPatch.response
+
+        with client:
+            client.root.devices(DEVICE_ID).patch(
+                DeviceModel(desired_state=DevicesWithIdPatch.desired_state))
+
+        serialize = next(s for s in tracer.spans if s.name == 'boum.model_serialize')
+        assert serialize.attributes['boum.model'] == 'DeviceModel'
+
+    def test__async_request__spans_are_nested(self, tracer):
+        session_mock = Mock()
+        for method in ['get', 'post', 'put', 'patch', 'delete', 'aclose']:
+            setattr(session_mock, method, AsyncMock())
+        session_mock.post.return_value = AuthSigningPost.response
+        session_mock.get.return_value = DevicesGet.response
+        client = AsyncApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock,
+                                config=ClientConfig(tracer=tracer))
+
+        async def run():
+            async with client:
+                tracer.clear()
+                await asyncio.gather(client.root.devices.get(), client.root.devices.get())
+
+        asyncio.run(run())
+
+        requests = [s for s in tracer.spans if s.name == 'boum.request']
+        decodes = [s for s in tracer.spans if s.name == 'boum.json_decode']
+        assert len(requests) == 2
+        assert {id(s.parent) for s in decodes} == {id(s) for s in requests}
@@ -0,0 +1,169 @@
+"""
+This module tests the construction of the transports that the api clients own, without sending
+any requests.
+"""
+
+import socket
+
+import pytest
+import requests
+
+from boum.api_client.v1.client import ApiClient
+from boum.api_client.v1 import transport
+from boum.api_client.v1.transport import ConnectionPoolConfig, create_session, \
+    AsyncHttpxSession, HttpxSession
+from tests.fixtures.api import EMAIL, PASSWORD, BASE_URL, DEVICE_ID
+
+httpx = pytest.importorskip('httpx')
+
+
+class TestConnectionPoolConfig:
+
+    @pytest.mark.parametrize('field', ['pool_connections', 'pool_maxsize', 'max_connections'])
+    @pytest.mark.parametrize('value', [0, -1, '10'])
+    def test__invalid_sizes__raise_value_error(self, field, value):
+        with pytest.raises(ValueError):
+            ConnectionPoolConfig(**{field: value})
+
+    @pytest.mark.parametrize('value', [0, -1.0])
+    def test__invalid_timeout__raises_value_error(self, value):
+        with pytest.raises(ValueError):
+            ConnectionPoolConfig(timeout=value)
+
+    def test__tcp_options__are_translated_to_socket_options(self):
+        config = ConnectionPoolConfig(tcp_nodelay=False, tcp_keepalive=True)
+        assert config.socket_options == [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+
+
+class TestCreateSession:
+
+    def test__pool_config__is_applied_to_adapters(self):
+        config = ConnectionPoolConfig(pool_connections=3, pool_maxsize=64, pool_block=True)
+        session = create_session(config)
+
+        for prefix in ['https://', 'http://']:
+            adapter = session.get_adapter(prefix + 'api.boum.us')
+            assert adapter.poolmanager.connection_pool_kw['maxsize'] == 64
+            assert adapter.poolmanager.connection_pool_kw['block'] is True
+            assert adapter.poolmanager.connection_pool_kw['socket_options'] == \
+                config.socket_options
+
+    @pytest.mark.parametrize('timeout', [None, 2.5])
+    def test__timeout__is_applied_to_requests_without_timeout(self, timeout, monkeypatch):
+        sent = []
+        monkeypatch.setattr(
+            requests.adapters.HTTPAdapter, 'send', lambda _, request, **kwargs: sent.append(kwargs))
+        url = 'https://api.boum.us'
+        adapter = create_session(ConnectionPoolConfig(timeout=timeout)).get_adapter(url)
+        adapter.send(requests.Request('GET', url).prepare())
+        adapter.send(requests.Request('GET', url).prepare(), timeout=1)
+
+        assert [kwargs['timeout'] for kwargs in sent] == [timeout, 1]
+
+    def test__keep_alive_disabled__sets_connection_close_header(self):
+        session = create_session(ConnectionPoolConfig(keep_alive=False))
+        assert session.headers['Connection'] == 'close'
+
+
+class TestClientSession:
+
+    def test__clients_without_session__own_separate_sessions(self):
+        client_a = ApiClient(EMAIL, PASSWORD, base_url=BASE_URL)
+        client_b = ApiClient(EMAIL, PASSWORD, base_url=BASE_URL)
+        # pylint: disable=protected-access
+        assert client_a._session is not client_b._session
+
+    def test__session_and_pool_config__raises_value_error(self):
+        with pytest.raises(ValueError):
+            ApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=create_session(),
+                      pool_config=ConnectionPoolConfig())
+
+
+class TestAsyncHttpxSession:
+
+    def test__pool_config__is_applied_to_transport(self):
+        session = AsyncHttpxSession(ConnectionPoolConfig(pool_connections=2, pool_maxsize=8))
+        # pylint: disable=protected-access
+        client = session._create_client()
+        pool = client._transport._pool
+        assert pool._max_connections == 16
+        assert pool._max_keepalive_connections == 8
+
+
+class TestHttpxSession:
+
+    def test__http2_config__creates_http2_session(self):
+        session = create_session(ConnectionPoolConfig(http2=True, pool_maxsize=4))
+        assert isinstance(session, HttpxSession)
+        # pylint: disable=protected-access
+        pool = session._create_client()._transport._pool
+        assert pool._http2
+        assert pool._max_keepalive_connections == 4
+
+    def test__async_http2_config__is_applied_to_transport(self):
+        session = AsyncHttpxSession(ConnectionPoolConfig(http2=True))
+        # pylint: disable=protected-access
+        assert session._create_client()._transport._pool._http2
+
+    @pytest.mark.parametrize('session_class', [HttpxSession, AsyncHttpxSession])
+    def test__timeout__replaces_httpx_default(self, session_class):
+        # pylint: disable=protected-access
+        assert session_class()._create_client().timeout == httpx.Timeout(None)
+        assert session_class(ConnectionPoolConfig(timeout=2.5))._create_client().timeout == \
+            httpx.Timeout(2.5)
+        assert session_class(ConnectionPoolConfig(timeout=2.5), timeout=1)._create_client() \
+            .timeout == httpx.Timeout(1)
+
+    def test__http2_without_h2__raises_import_error(self, monkeypatch):
+        monkeypatch.setattr(transport, 'h2', None)
+        with pytest.raises(ImportError):
+            HttpxSession(ConnectionPoolConfig(http2=True))
+
+    def test__client_requests__are_sent_with_session_headers(self):
+        requests_sent = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests_sent.append(request)
+            if request.url.path.endswith('/auth/signin'):
+                return httpx.Response(
+                    200, json={'data': {'accessToken': 'token', 'refreshToken': 'refresh'}})
+            return httpx.Response(200, json={'data': [{'id': DEVICE_ID}]})
+
+        session = HttpxSession(transport=httpx.MockTransport(handler))
+        client = ApiClient(EMAIL, PASSWORD, base_url='https://api.boum.test', session=session)
+
+        with client:
+            assert client.root.devices.get() == [DEVICE_ID]
+
+        assert requests_sent[-1].headers['Authorization'] == 'token'
+        assert requests_sent[-1].url == 'https://api.boum.test/v1/devices'
+
+    def test__streamed_requests__are_decoded_incrementally(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path.endswith('/auth/signin'):
+                return httpx.Response(
+                    200, json={'data': {'accessToken': 'token', 'refreshToken': 'refresh'}})
+            return httpx.Response(200, json={'data': [{'id': DEVICE_ID}, {'id': 'other'}]})
+
+        session = HttpxSession(transport=httpx.MockTransport(handler))
+        client = ApiClient(EMAIL, PASSWORD, base_url='https://api.boum.test', session=session)
+
+        with client:
+            assert list(client.root.devices.iter()) == [DEVICE_ID, 'other']
+
+    def test__error_status__raises_requests_http_error(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path.endswith('/auth/signin'):
+                return httpx.Response(
+                    200, json={'data': {'accessToken': 'token', 'refreshToken': 'refresh'}})
+            return httpx.Response(404, json={'message': 'Device not found'})
+
+        session = HttpxSession(transport=httpx.MockTransport(handler))
+        client = ApiClient(EMAIL, PASSWORD, base_url='https://api.boum.test', session=session)
+
+        with client:
+            with pytest.raises(requests.HTTPError) as error_info:
+                client.root.devices(DEVICE_ID).get()
+
+        assert error_info.value.response.status_code == 404
+        assert isinstance(error_info.value.__cause__, httpx.HTTPStatusError)
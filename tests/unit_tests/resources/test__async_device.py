@@ -0,0 +1,73 @@
+"""
+This module tests the async Device resource abstraction up to the calls to the API with the async
+session object. It relies on the API fixtures and on their correct representation of the actual
+API.
+"""
+
+import asyncio
+from unittest.mock import Mock, AsyncMock
+
+import pytest
+
+from boum.api_client.v1.async_client import AsyncApiClient
+from boum.resources.async_device import AsyncDevice
+from tests.fixtures.api import create_mock_response, AuthSigningPost, DEVICE_ID, PASSWORD, EMAIL, BASE_URL, \
+    DevicesWithIdClaimPut, DevicesWithIdDataGet
+
+
+@pytest.fixture
+def session_mock():
+    session = Mock()
+    for method in ['get', 'post', 'put', 'patch', 'delete', 'aclose']:
+        setattr(session, method, AsyncMock())
+    session.post.return_value = AuthSigningPost.response
+    return session
+
+
+@pytest.fixture
+def device(session_mock):
+    client = AsyncApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock)
+    asyncio.run(client.connect())
+    return AsyncDevice(DEVICE_ID, client)
+
+
+class TestGetMany:
+    @staticmethod
+    async def _get(url, **_):
+        if url.endswith('/missing'):
+            response = create_mock_response(404, message='Not found')
+            response.raise_for_status.side_effect = RuntimeError('404 Not Found')
+            return response
+        return create_mock_response(200, data={
+            'state': {'reported': {'pumpState': 'off'}, 'desired': {'pumpState': 'on'}},
+            'flags': {}})
+
+    def test__failed_devices__are_left_out(self, device, session_mock):
+        session_mock.get.side_effect = self._get
+        # pylint: disable=protected-access
+        result = asyncio.run(AsyncDevice.get_many(
+            device._api_client, ['a', 'missing', 'b'], max_concurrency=2))
+        assert list(result) == ['a', 'b']
+        assert all(model.desired_state.pump_state for model in result.values())
+
+    def test__raise_on_error__raises(self, device, session_mock):
+        session_mock.get.side_effect = self._get
+        with pytest.raises(RuntimeError):
+            # pylint: disable=protected-access
+            asyncio.run(AsyncDevice.get_many(
+                device._api_client, ['a', 'missing'], raise_on_error=True))
+
+
+class TestClaimDevice:
+    def test_without_user_id__works(self, device, session_mock):
+        session_mock.put.return_value = DevicesWithIdClaimPut.response
+        asyncio.run(device.claim())
+        assert session_mock.put.call_args == DevicesWithIdClaimPut.call
+
+
+class TestGetTelemetryData:
+    def test__without_arguments__returns_data(self, device, session_mock):
+        session_mock.get.return_value = DevicesWithIdDataGet.response
+        result = asyncio.run(device.get_telemetry_data())
+        assert session_mock.get.call_args == DevicesWithIdDataGet.call_no_args
+        assert result == DevicesWithIdDataGet.data_clean
@@ -3,13 +3,14 @@ This module tests the Device resource abstraction up to the calls to the API wit
 object. It relies on the API fixtures and on their correct representation of the actual API.
 """
 
+import time
 from unittest.mock import Mock
 
 import pytest
 
 from boum.api_client.v1.client import ApiClient
 from boum.resources.device import Device
-from tests.fixtures.api import AuthSigningPost, DevicesGet, DEVICE_ID, PASSWORD, EMAIL, BASE_URL, \
+from tests.fixtures.api import create_mock_response, AuthSigningPost, DevicesGet, DEVICE_ID, PASSWORD, EMAIL, BASE_URL, \
     DevicesWithIdGet, DevicesWithIdPatch, DevicesWithIdClaimPut, USER_ID, \
     DevicesWithIdClaimWithIdPut, DevicesWithIdClaimDelete, DevicesWithIdDataGet
 
@@ -41,6 +42,45 @@ class TestGetDeviceIds:
         assert DEVICE_ID in result
 
 
+class TestGetMany:
+    @staticmethod
+    def _get(url, **_):
+        device_id = url.rsplit('/', 1)[-1]
+        if device_id.startswith('missing'):
+            if device_id == 'missing_slow':
+                time.sleep(0.05)
+            response = create_mock_response(404, message='Not found')
+            response.raise_for_status.side_effect = RuntimeError(f'404 Not Found: {device_id}')
+            return response
+        return create_mock_response(200, data={
+            'state': {'reported': {'pumpState': 'off'}, 'desired': {'pumpState': 'on'}},
+            'flags': {}})
+
+    def test__returns_devices_by_id_in_order(self, client, session_mock):
+        session_mock.get.side_effect = self._get
+        device_ids = [f'device_{i}' for i in range(10)]
+        result = Device.get_many(client, device_ids, max_workers=4)
+        assert list(result) == device_ids
+        assert all(device.desired_state.pump_state for device in result.values())
+        assert session_mock.get.call_count == len(device_ids)
+
+    def test__failed_devices__are_left_out(self, client, session_mock):
+        session_mock.get.side_effect = self._get
+        result = Device.get_many(client, ['a', 'missing', 'b'])
+        assert list(result) == ['a', 'b']
+
+    def test__raise_on_error__raises(self, client, session_mock):
+        session_mock.get.side_effect = self._get
+        with pytest.raises(RuntimeError):
+            Device.get_many(client, ['a', 'missing'], raise_on_error=True)
+
+    def test__raise_on_error__raises_error_of_first_requested_device(self, client, session_mock):
+        session_mock.get.side_effect = self._get
+        with pytest.raises(RuntimeError, match='missing_slow'):
+            Device.get_many(
+                client, ['a', 'missing_slow', 'missing'], max_workers=3, raise_on_error=True)
+
+
 class TestSetDeviceState:
     def test__works(self, device, session_mock):
         session_mock.patch.return_value = DevicesWithIdPatch.response
@@ -96,3 +136,37 @@ class TestGetTelemetryData:
         result = device.get_telemetry_data(interval=DevicesWithIdDataGet.interval)
         assert result == DevicesWithIdDataGet.data_clean
         assert session_mock.get.call_args == DevicesWithIdDataGet.call_interval_args
+
+    @pytest.mark.parametrize('as_', ['numpy', 'pandas', 'arrow'])
+    def test__as__returns_columns_in_format(self, device, session_mock, as_):
+        if as_ == 'arrow':
+            pytest.importorskip('pyarrow')
+        session_mock.get.return_value = DevicesWithIdDataGet.response
+        result = device.get_telemetry_data(as_=as_)
+        assert session_mock.get.call_args == DevicesWithIdDataGet.call_no_args
+        if as_ == 'arrow':
+            result = result.to_pydict()
+        assert list(result['deviceId']) == DevicesWithIdDataGet.data_clean['deviceId']
+        timestamps = list(result['timestamp'])
+        if as_ == 'numpy':
+            # NumPy timestamps are naive UTC
+            timestamps = [t.astype('datetime64[us]').item() for t in timestamps]
+            assert timestamps == [t.replace(tzinfo=None)
+                                  for t in DevicesWithIdDataGet.data_clean['timestamp']]
+        else:
+            assert timestamps == DevicesWithIdDataGet.data_clean['timestamp']
+        assert result['someValue'][0] == 1.1
+
+    def test__invalid_as__raises_value_error(self, device):
+        with pytest.raises(ValueError):
+            device.get_telemetry_data(as_='csv')
+
+
+class TestSendDeviceLogWithShipper:
+    def test__log_is_submitted_to_shipper(self, client, session_mock):
+        device_id = '3e1c2f4a-9b7d-4c1e-8f2a-5d6b7c8e9f01'
+        shipper = Mock()
+        Device(device_id, client).send_device_log('message', shipper=shipper)
+
+        assert not session_mock.post.called
+        assert shipper.submit.call_args.args[0].device_id == device_id
@@ -0,0 +1,113 @@
+"""
+This module tests the Fleet resource abstraction up to the calls to the API with the session
+object.
+"""
+
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from boum.api_client.v1.client import ApiClient
+from boum.resources.fleet import Fleet
+from tests.fixtures.api import AuthSigningPost, PASSWORD, EMAIL, BASE_URL, DevicesWithIdPatch, \
+    DevicesWithIdClaimDelete, create_mock_response
+
+DEVICE_IDS = [f'device_{i}' for i in range(20)]
+
+
+@pytest.fixture
+def session_mock():
+    return Mock()
+
+
+@pytest.fixture
+def client(session_mock):
+    session_mock.post.return_value = AuthSigningPost.response
+    with ApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock) as client:
+        session_mock.post = Mock()
+        yield client
+
+
+class TestFleet:
+    def test__invalid_max_workers__raises(self, client):
+        with pytest.raises(ValueError):
+            Fleet(DEVICE_IDS, client, max_workers=0)
+
+    def test__duplicate_device_ids__are_removed(self, client):
+        assert Fleet(['a', 'b', 'a'], client).device_ids == ['a', 'b']
+
+    def test__set_desired_device_state__patches_all_devices(self, client, session_mock):
+        session_mock.patch.return_value = DevicesWithIdPatch.response
+        report = Fleet(DEVICE_IDS, client, max_workers=4).set_desired_device_state(
+            DevicesWithIdPatch.desired_state)
+
+        assert report.all_succeeded
+        assert sorted(report.succeeded) == sorted(DEVICE_IDS)
+        urls = sorted(c.kwargs['url'] for c in session_mock.patch.call_args_list)
+        assert urls == sorted(f'{BASE_URL}/v1/devices/{i}' for i in DEVICE_IDS)
+        assert all(c.kwargs['json']['state'] == DevicesWithIdPatch.call.kwargs['json']['state']
+                   for c in session_mock.patch.call_args_list)
+
+    def test__failing_devices__are_reported_without_stopping_others(self, client, session_mock):
+        not_found = create_mock_response(404, message='Not found')
+        not_found.raise_for_status.side_effect = RuntimeError('404 Not Found')
+
+        def delete(url, **_):
+            if url.endswith('/device_3/claim'):
+                return not_found
+            return DevicesWithIdClaimDelete.response
+
+        session_mock.delete.side_effect = delete
+        report = Fleet(DEVICE_IDS, client).unclaim()
+
+        assert not report.all_succeeded
+        assert list(report.failed) == ['device_3']
+        assert len(report.succeeded) == len(DEVICE_IDS) - 1
+        assert not report.cancelled
+
+    def test__progress__is_called_for_every_device(self, client, session_mock):
+        session_mock.patch.return_value = create_mock_response(200)
+        progress = Mock()
+        Fleet(DEVICE_IDS, client).send_device_command('reset', progress=progress)
+
+        assert progress.call_count == len(DEVICE_IDS)
+        assert [c.args[0] for c in progress.call_args_list] == list(range(1, len(DEVICE_IDS) + 1))
+        assert all(c.args[1] == len(DEVICE_IDS) for c in progress.call_args_list)
+
+    def test__cancel__reports_remaining_devices_as_cancelled(self, client):
+        fleet = Fleet(DEVICE_IDS, client, max_workers=1)
+        started = []
+        lock = threading.Lock()
+
+        def operation(device):
+            with lock:
+                started.append(device.device_id)
+                if len(started) == 5:
+                    fleet.cancel()
+
+        report = fleet.run(operation)
+
+        assert len(report.results) == len(started)
+        assert len(report.results) + len(report.cancelled) == len(DEVICE_IDS)
+        assert report.cancelled
+        assert not report.all_succeeded
+
+    @pytest.mark.parametrize('error', [KeyboardInterrupt, RuntimeError])
+    def test__error_in_progress__skips_remaining_devices(self, client, error):
+        fleet = Fleet([f'device_{i}' for i in range(200)], client, max_workers=2)
+        started = []
+
+        def progress(done, *_):
+            if done == 3:
+                raise error()
+
+        def operation(device):
+            started.append(device.device_id)
+            time.sleep(0.01)
+
+        with pytest.raises(error):
+            fleet.run(operation, progress)
+
+        assert len(started) < 20
@@ -0,0 +1,119 @@
+"""
+This module tests the FleetInventory resource abstraction.
+"""
+
+from datetime import datetime
+from unittest.mock import Mock
+
+import pytest
+
+from boum.resources.device import Device
+from boum.resources.inventory import FleetInventory
+
+
+def _timestamp(day: int) -> dict:
+    return {'_seconds': datetime(2023, 1, day).timestamp(), '_nanoseconds': 0}
+
+
+DEVICES = [
+    {'id': 'a', 'sku': 'boum-v1', 'hasBeenTested': True, 'createdAt': _timestamp(1)},
+    {'id': 'b', 'sku': 'boum-v2', 'hasBeenTested': False, 'createdAt': _timestamp(2)},
+    {'id': 'c', 'sku': 'boum-v2', 'createdAt': _timestamp(3)},
+    {'id': 'd', 'sku': 'other', 'hasBeenTested': True, 'createdAt': _timestamp(4)},
+]
+CLAIMED_DEVICES = [
+    {'id': 'a', 'ownerId': 'user_1', 'createdAt': _timestamp(10)},
+    {'id': 'c', 'ownerId': 'user_2', 'createdAt': _timestamp(11)},
+    {'id': 'missing', 'ownerId': 'user_1', 'createdAt': _timestamp(12)},
+]
+
+
+@pytest.fixture
+def inventory():
+    return FleetInventory(DEVICES, CLAIMED_DEVICES)
+
+
+class TestFilter:
+    def test__no_criteria__returns_all_devices(self, inventory):
+        assert inventory.filter() == {'a', 'b', 'c', 'd'}
+        assert len(inventory) == 4
+
+    def test__claimed__works(self, inventory):
+        assert inventory.filter(claimed=True) == {'a', 'c'}
+        assert inventory.filter(claimed=False) == {'b', 'd'}
+
+    def test__owner_and_sku__works(self, inventory):
+        assert inventory.filter(owner_id='user_1') == {'a'}
+        assert inventory.filter(sku='boum-v2') == {'b', 'c'}
+        assert inventory.filter(sku_contains='boum') == {'a', 'b', 'c'}
+        assert inventory.filter(sku='unknown') == set()
+
+    def test__tested__counts_devices_without_field_as_tested(self, inventory):
+        assert inventory.filter(tested=True) == {'a', 'c', 'd'}
+        assert inventory.filter(tested=False) == {'b'}
+
+    def test__time_ranges__include_start_and_exclude_end(self, inventory):
+        assert inventory.filter(
+            created_after=datetime(2023, 1, 2), created_before=datetime(2023, 1, 4)) == {'b', 'c'}
+        assert inventory.filter(claimed_after=datetime(2023, 1, 11)) == {'c'}
+
+    def test__criteria__are_combined(self, inventory):
+        assert inventory.filter(sku_contains='boum', tested=True, claimed=False) == set()
+        assert inventory.filter(
+            sku='boum-v2', created_after=datetime(2023, 1, 3), claimed=True) == {'c'}
+
+
+class TestDetails:
+    def test__returns_copies_in_listing_order(self, inventory):
+        details = inventory.details({'d', 'a', 'unknown'})
+        assert [device['id'] for device in details] == ['a', 'd']
+        details[0]['sku'] = 'changed'
+        assert inventory.get('a')['sku'] == 'boum-v1'
+
+    def test__include_claims__adds_owner_and_claim_time(self, inventory):
+        details = inventory.details({'a', 'b'}, include_claims=True)
+        assert details[0]['ownerId'] == 'user_1'
+        assert details[0]['claimedAt'] == datetime(2023, 1, 10)
+        assert 'ownerId' not in details[1]
+
+
+class TestUpdate:
+    def test__changed_devices__are_reindexed(self, inventory):
+        devices = [dict(device) for device in DEVICES if device['id'] != 'd']
+        devices[1]['hasBeenTested'] = True
+        devices.append({'id': 'e', 'sku': 'boum-v3', 'createdAt': _timestamp(5)})
+        claimed_devices = [{'id': 'b', 'ownerId': 'user_1', 'createdAt': _timestamp(13)}]
+        inventory.update(devices, claimed_devices)
+
+        assert 'd' not in inventory
+        assert inventory.filter(tested=False) == set()
+        assert inventory.filter(sku='other') == set()
+        assert inventory.filter(created_after=datetime(2023, 1, 4)) == {'e'}
+        assert inventory.filter(owner_id='user_1') == {'b'}
+        assert inventory.filter(owner_id='user_2') == set()
+
+    def test__refresh__gets_listings(self, inventory):
+        client = Mock()
+        client.root.devices.iter.return_value = iter(DEVICES[:1])
+        client.root.devices.claimed.iter.return_value = iter([])
+        inventory.refresh(client)
+        assert inventory.filter() == {'a'}
+        assert inventory.filter(claimed=True) == set()
+
+
+class TestGetDeviceDetails:
+    def test__only_claimed__adds_claims(self):
+        client = Mock()
+        client.root.devices.get.return_value = DEVICES
+        client.root.devices.claimed.get.return_value = CLAIMED_DEVICES
+        details = Device.get_device_details(client, only_claimed=True, sku_contains='v2')
+        assert [device['id'] for device in details] == ['c']
+        assert details[0]['ownerId'] == 'user_2'
+
+    def test__filters__are_combined(self):
+        client = Mock()
+        client.root.devices.get.return_value = DEVICES
+        client.root.devices.claimed.get.return_value = CLAIMED_DEVICES
+        details = Device.get_device_details(
+            client, only_tested=True, created_after=datetime(2023, 1, 2))
+        assert [device['id'] for device in details] == ['c', 'd']
@@ -0,0 +1,141 @@
+"""
+This module tests the telemetry resource abstractions up to the calls to the API with the session
+object.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from boum.api_client.v1.client import ApiClient
+from boum.api_client.v1.telemetry import TelemetryColumns, parse_timestamps, parse_values
+from boum.resources.telemetry import TelemetryRangeFetcher, get_fleet_telemetry, split_range, \
+    stitch_windows
+from tests.fixtures.api import AuthSigningPost, PASSWORD, EMAIL, BASE_URL, DEVICE_ID, \
+    create_mock_response
+
+START = datetime(2023, 1, 1)
+FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def get_data(url, params=None, **_):
+    """Respond with one sample per hour in [timeStart, timeEnd], including both boundaries."""
+    start = datetime.strptime(params['timeStart'], FORMAT)
+    end = datetime.strptime(params['timeEnd'], FORMAT)
+    hours = int((end - start) / timedelta(hours=1))
+    samples = [{'x': (start + timedelta(hours=i)).strftime(FORMAT), 'y': i} for i in
+               range(hours + 1)]
+    return create_mock_response(200, data={
+        'details': {'deviceId': url.split('/')[-2]}, 'timeSeries': {'value': samples}})
+
+
+@pytest.fixture
+def session_mock():
+    return Mock()
+
+
+@pytest.fixture
+def client(session_mock):
+    session_mock.post.return_value = AuthSigningPost.response
+    with ApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock) as client:
+        yield client
+
+
+class TestSplitRange:
+    def test__range__is_split_into_windows(self):
+        assert split_range(START, START + timedelta(days=5), timedelta(days=2)) == [
+            (START, START + timedelta(days=2)),
+            (START + timedelta(days=2), START + timedelta(days=4)),
+            (START + timedelta(days=4), START + timedelta(days=5))]
+
+    def test__non_positive_window__raises(self):
+        with pytest.raises(ValueError):
+            split_range(START, START + timedelta(days=1), timedelta(0))
+
+
+class TestStitchWindows:
+    def test__overlapping_samples__are_dropped(self):
+        def columns(*timestamps):
+            return TelemetryColumns(DEVICE_ID, parse_timestamps(list(timestamps)),
+                                    {'value': parse_values(list(range(len(timestamps))))})
+
+        result = stitch_windows([
+            columns('2023-01-01T00:00:00Z', '2023-01-01T01:00:00Z'),
+            columns(),
+            columns('2023-01-01T01:00:00Z', '2023-01-01T02:00:00Z')])
+        assert list(result.timestamps) == list(parse_timestamps(
+            ['2023-01-01T00:00:00Z', '2023-01-01T01:00:00Z', '2023-01-01T02:00:00Z']))
+        np.testing.assert_array_equal(result.values['value'], [0, 1, 1])
+
+
+class TestTelemetryRangeFetcher:
+    def test__windows__are_fetched_and_stitched(self, client, session_mock):
+        session_mock.get.side_effect = get_data
+        end = START + timedelta(days=10)
+        fetcher = TelemetryRangeFetcher(client, window=timedelta(days=3), max_workers=2)
+        result = fetcher.get(DEVICE_ID, START, end)
+
+        assert session_mock.get.call_count == 4
+        assert len(result) == 10 * 24 + 1
+        assert np.all(np.diff(result.timestamps) == np.timedelta64(1, 'h'))
+        assert result.timestamps[0] == np.datetime64(START)
+        assert result.timestamps[-1] == np.datetime64(end)
+
+    def test__as__converts_result(self, client, session_mock):
+        session_mock.get.side_effect = get_data
+        fetcher = TelemetryRangeFetcher(client, window=timedelta(days=1))
+        result = fetcher.get(DEVICE_ID, START, START + timedelta(days=2), as_='pandas')
+        assert len(result) == 2 * 24 + 1
+        assert result['timestamp'].is_monotonic_increasing
+
+    def test__failed_window__raises(self, client, session_mock):
+        def get(url, params=None, **kwargs):
+            if params['timeStart'] == '2023-01-02T00:00:00Z':
+                raise RuntimeError('Window failed')
+            return get_data(url, params, **kwargs)
+
+        session_mock.get.side_effect = get
+        fetcher = TelemetryRangeFetcher(client, window=timedelta(days=1), max_workers=1)
+        with pytest.raises(RuntimeError):
+            fetcher.get(DEVICE_ID, START, START + timedelta(days=5))
+
+    def test__window_not_multiple_of_interval__raises(self, client):
+        fetcher = TelemetryRangeFetcher(client, window=timedelta(hours=1))
+        with pytest.raises(ValueError):
+            fetcher.get(DEVICE_ID, START, START + timedelta(days=1), timedelta(minutes=7))
+
+
+class TestGetFleetTelemetry:
+    def test__devices__are_stacked_in_order(self, client, session_mock):
+        session_mock.get.side_effect = get_data
+        device_ids = [f'device_{i}' for i in range(10)]
+        result = get_fleet_telemetry(
+            client, device_ids + ['device_0'], START, START + timedelta(days=1), max_workers=4)
+
+        assert session_mock.get.call_count == 10
+        assert result.device_ids == device_ids
+        assert len(result) == 10 * 25
+        np.testing.assert_array_equal(result.codes, np.repeat(np.arange(10), 25))
+        np.testing.assert_array_equal(result.values['value'], np.tile(np.arange(25), 10))
+
+    def test__as__converts_result(self, client, session_mock):
+        session_mock.get.side_effect = get_data
+        result = get_fleet_telemetry(
+            client, ['a', 'b'], START, START + timedelta(hours=1), as_='pandas')
+        assert list(result['deviceId']) == ['a', 'a', 'b', 'b']
+
+    def test__failed_device__is_left_out(self, client, session_mock):
+        def get(url, params=None, **kwargs):
+            if 'failing' in url:
+                raise RuntimeError('Device failed')
+            return get_data(url, params, **kwargs)
+
+        session_mock.get.side_effect = get
+        result = get_fleet_telemetry(client, ['a', 'failing'], START, START + timedelta(hours=1))
+        assert result.device_ids == ['a']
+
+        with pytest.raises(RuntimeError):
+            get_fleet_telemetry(client, ['a', 'failing'], START, START + timedelta(hours=1),
+                                raise_on_error=True)
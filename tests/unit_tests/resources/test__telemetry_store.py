@@ -0,0 +1,117 @@
+"""
+This module tests the SqliteTelemetryStore resource abstraction up to the calls to the API with
+the session object.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from boum.api_client.v1.client import ApiClient
+from boum.resources.telemetry_store import SqliteTelemetryStore
+from tests.fixtures.api import AuthSigningPost, PASSWORD, EMAIL, BASE_URL, DEVICE_ID
+from tests.unit_tests.resources.test__telemetry import get_data
+
+START = datetime(2023, 1, 1)
+
+
+@pytest.fixture
+def session_mock():
+    session_mock = Mock()
+    session_mock.get.side_effect = get_data
+    return session_mock
+
+
+@pytest.fixture
+def client(session_mock):
+    session_mock.post.return_value = AuthSigningPost.response
+    with ApiClient(EMAIL, PASSWORD, base_url=BASE_URL, session=session_mock) as client:
+        yield client
+
+
+@pytest.fixture
+def store(client, tmp_path):
+    with SqliteTelemetryStore(tmp_path / 'telemetry.db', client) as store:
+        yield store
+
+
+def fetched_ranges(session_mock) -> list[tuple[str, str]]:
+    return [(call.kwargs['params']['timeStart'], call.kwargs['params']['timeEnd'])
+            for call in session_mock.get.call_args_list]
+
+
+class TestSqliteTelemetryStore:
+    def test__get__returns_range_without_end(self, store):
+        result = store.get(DEVICE_ID, START, START + timedelta(days=1))
+        assert len(result) == 24
+        assert result.timestamps[0] == np.datetime64(START)
+        assert np.all(np.diff(result.timestamps) == np.timedelta64(1, 'h'))
+        np.testing.assert_array_equal(result.values['value'], np.arange(24))
+
+    def test__stored_range__is_not_fetched_again(self, store, session_mock):
+        store.get(DEVICE_ID, START, START + timedelta(days=1))
+        session_mock.get.reset_mock()
+        result = store.get(DEVICE_ID, START + timedelta(hours=6), START + timedelta(hours=12))
+        assert session_mock.get.call_count == 0
+        assert len(result) == 6
+
+    def test__only_gaps__are_fetched(self, store, session_mock):
+        store.get(DEVICE_ID, START + timedelta(days=1), START + timedelta(days=2))
+        store.get(DEVICE_ID, START + timedelta(days=3), START + timedelta(days=4))
+        session_mock.get.reset_mock()
+        result = store.get(DEVICE_ID, START, START + timedelta(days=5))
+
+        assert fetched_ranges(session_mock) == [
+            ('2023-01-01T00:00:00Z', '2023-01-02T00:00:00Z'),
+            ('2023-01-03T00:00:00Z', '2023-01-04T00:00:00Z'),
+            ('2023-01-05T00:00:00Z', '2023-01-06T00:00:00Z')]
+        assert len(result) == 5 * 24
+        assert np.all(np.diff(result.timestamps) == np.timedelta64(1, 'h'))
+        assert store.get_gaps(DEVICE_ID, START, START + timedelta(days=5)) == []
+
+    def test__recent_telemetry__is_fetched_again(self, store):
+        # The gaps are naive UTC datetimes
+        end = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+        start = end - timedelta(hours=3)
+        store.get(DEVICE_ID, start, end)
+        assert store.get_gaps(DEVICE_ID, start, end) == [(end - timedelta(hours=1), end)]
+
+    def test__store__is_persisted(self, store, client, session_mock, tmp_path):
+        store.get(DEVICE_ID, START, START + timedelta(days=1))
+        session_mock.get.reset_mock()
+        with SqliteTelemetryStore(tmp_path / 'telemetry.db', client) as other_store:
+            result = other_store.get(DEVICE_ID, START, START + timedelta(days=1), as_='pandas')
+        assert session_mock.get.call_count == 0
+        assert len(result) == 24
+
+    def test__clear__removes_telemetry(self, store):
+        store.get(DEVICE_ID, START, START + timedelta(days=1))
+        store.clear(DEVICE_ID)
+        assert store.get_gaps(DEVICE_ID, START, START + timedelta(days=1)) == [
+            (START, START + timedelta(days=1))]
+
+    def test__failed_fetch__stores_nothing(self, store, session_mock):
+        session_mock.get.side_effect = RuntimeError('Request failed')
+        with pytest.raises(RuntimeError):
+            store.get(DEVICE_ID, START, START + timedelta(days=1))
+        assert store.get_gaps(DEVICE_ID, START, START + timedelta(days=1)) == [
+            (START, START + timedelta(days=1))]
+
+    def test__close__closes_connections_of_all_threads(self, store):
+        store.get_gaps(DEVICE_ID, START, START)
+        thread = threading.Thread(target=store.get_gaps, args=(DEVICE_ID, START, START))
+        thread.start()
+        thread.join()
+        # pylint: disable=protected-access
+        connections = list(store._connections)
+        assert len(connections) == 2
+        store.close()
+
+        for connection in connections:
+            with pytest.raises(sqlite3.ProgrammingError):
+                connection.execute('SELECT 1')
+        assert store.get_gaps(DEVICE_ID, START, START + timedelta(hours=1))